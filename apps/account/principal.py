@@ -0,0 +1,204 @@
+# apps/account/principal.py
+# "Principal": the roles ug church assignment sa naka-login nga user, resolved once.
+#
+# PrincipalMiddleware attaches request.principal lazily; the first access in a request
+# resolves it and every later access (context processors, KadamayRoleRequiredMixin,
+# PaymentListView, the chat access check) reuses the same object. Across requests it is
+# kept in the cache per user.
+#
+# Invalidation is version based, like apps/report/dashboard_cache.py: every user has a
+# version counter, plus one counter shared by all users. The handlers in
+# apps/account/signals.py bump the user's counter when their groups, Profile, UserChurch
+# or InChargeProfile change, and the shared counter when a Group or Church changes
+# (a rename or a new first church can affect everybody). Bumps happen on commit.
+#
+# A bump only reaches the processes that share the cache. With a per-process LocMemCache
+# (the default) another gunicorn worker keeps its copy, so there a Principal is kept for
+# PRINCIPAL_LOCAL_CACHE_TIMEOUT seconds at most: a role change made in one worker shows in
+# the others within that time. Point PRINCIPAL_CACHE_ALIAS at a shared backend (Redis,
+# DatabaseCache) to keep it for PRINCIPAL_CACHE_TIMEOUT.
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
+
+ALL_USERS = 'all'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _cache():
+    return caches[_setting('PRINCIPAL_CACHE_ALIAS', 'default')]
+
+
+def _timeout(cache):
+    timeout = _setting('PRINCIPAL_CACHE_TIMEOUT', 300)
+    if isinstance(cache, LocMemCache):
+        # Invalidations from other processes never reach this copy
+        timeout = min(timeout, _setting('PRINCIPAL_LOCAL_CACHE_TIMEOUT', 5))
+    return timeout
+
+
+def _version_key(scope):
+    return f'principal:version:{scope}'
+
+
+def _entry_key(user_id, versions):
+    return f'principal:{user_id}:' + ':'.join(str(version) for version in versions)
+
+
+def _incr(key):
+    cache = _cache()
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The key was evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+        return 1
+
+
+class Principal:
+    """
+    What the app needs to know about a user for access checks and the page chrome.
+    Plain values only (plus the context church), so it can be pickled into the cache.
+    """
+
+    def __init__(self, user_id=None, is_superuser=False, groups=(), profile_role=None,
+                 church=None, church_ids=(), incharge_church_id=None):
+        self.user_id = user_id
+        self.is_superuser = is_superuser
+        self.groups = frozenset(groups)
+        self.profile_role = profile_role
+        # Church shown in the navigation (the `church` template variable)
+        self.church = church
+        # Every church the user is assigned to (Profile.church_assignment, UserChurch)
+        self.church_ids = frozenset(church_ids)
+        # Church of the user's chat InChargeProfile, if any
+        self.incharge_church_id = incharge_church_id
+
+    @property
+    def is_authenticated(self):
+        return self.user_id is not None
+
+    def in_group(self, *names):
+        """True if the user is in any of the given Django groups (superusers always are)."""
+        return self.is_superuser or not self.groups.isdisjoint(names)
+
+    # Role flags for templates: Django groups OR the Profile role
+
+    @property
+    def is_admin(self):
+        from .models import Profile
+        return self.is_superuser or 'Admin' in self.groups or self.profile_role == Profile.ADMIN
+
+    @property
+    def is_cashier(self):
+        from .models import Profile
+        return 'Cashier' in self.groups or self.profile_role == Profile.CASHIER
+
+    @property
+    def is_incharge(self):
+        from .models import Profile
+        return 'In-Charge' in self.groups or self.profile_role == Profile.IN_CHARGE
+
+    @property
+    def has_payment_access(self):
+        return self.is_admin or self.is_cashier or self.is_incharge
+
+    def __repr__(self):
+        return f'<Principal user={self.user_id} groups={sorted(self.groups)}>'
+
+
+ANONYMOUS = Principal()
+
+
+def _resolve(user):
+    from apps.chat.models import InChargeProfile
+    from apps.church.models import Church
+
+    from .models import Profile, UserChurch
+
+    profile = Profile.objects.filter(user=user).values('role', 'church_assignment_id').first()
+    user_church_id = UserChurch.objects.filter(user=user).values_list('church_id', flat=True).first()
+    church_ids = {church_id for church_id in (
+        profile and profile['church_assignment_id'], user_church_id) if church_id}
+
+    # Same precedence the user_church context processor always had
+    if user.is_superuser:
+        church = Church.objects.first()
+    elif profile and profile['church_assignment_id']:
+        church = Church.objects.filter(pk=profile['church_assignment_id']).first()
+    elif user_church_id:
+        church = Church.objects.filter(pk=user_church_id).first()
+    else:
+        church = None
+
+    return Principal(
+        user_id=user.pk,
+        is_superuser=user.is_superuser,
+        groups=user.groups.values_list('name', flat=True),
+        profile_role=profile['role'] if profile else None,
+        church=church,
+        church_ids=church_ids,
+        incharge_church_id=InChargeProfile.objects.filter(user=user).values_list(
+            'church_id', flat=True).first(),
+    )
+
+
+def get_principal(user):
+    """Returns the (cached) Principal of `user`; ANONYMOUS for anonymous users."""
+    if not user.is_authenticated:
+        return ANONYMOUS
+    cache = _cache()
+    version_keys = [_version_key(ALL_USERS), _version_key(user.pk)]
+    versions = cache.get_many(version_keys)
+    entry_key = _entry_key(user.pk, [versions.get(key, 0) for key in version_keys])
+
+    principal = cache.get(entry_key)
+    if principal is None or principal.is_superuser != user.is_superuser:
+        principal = _resolve(user)
+        cache.set(entry_key, principal, timeout=_timeout(cache))
+    return principal
+
+
+def principal_for(request):
+    """request.principal, or a freshly resolved one where PrincipalMiddleware did not run."""
+    principal = getattr(request, 'principal', None)
+    if principal is None:
+        principal = request.principal = get_principal(request.user)
+    return principal
+
+
+def invalidate_principal(user_id=None):
+    """Drops the cached Principal of one user (or of everybody) once the transaction commits."""
+    key = _version_key(ALL_USERS if user_id is None else user_id)
+    transaction.on_commit(lambda: _incr(key))
+
+
+class PrincipalMiddleware:
+    """Sets request.principal. Must come after AuthenticationMiddleware."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        request.principal = SimpleLazyObject(lambda: get_principal(request.user))
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        # Lazy like request.user: nothing touches the database until a (sync) view reads it
+        request.principal = SimpleLazyObject(lambda: get_principal(request.user))
+        return await self.get_response(request)
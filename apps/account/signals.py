@@ -1,9 +1,14 @@
 # apps/account/signals.py (Corrected Version)
 
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
-from django.contrib.auth.models import User
-from .models import Profile
+from django.contrib.auth.models import Group, User
+
+from apps.chat.models import InChargeProfile
+from apps.church.models import Church
+
+from .models import Profile, UserChurch
+from .principal import invalidate_principal
 
 @receiver(post_save, sender=User)
 def create_or_update_user_profile(sender, instance, created, **kwargs):
@@ -26,3 +31,40 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
             # This is a fallback for legacy data or unexpected scenarios.
             Profile.objects.create(user=instance)
 
+
+
+# --- Cached Principal (apps/account/principal.py) ---
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+@receiver(post_save, sender=UserChurch)
+@receiver(post_delete, sender=UserChurch)
+@receiver(post_save, sender=InChargeProfile)
+@receiver(post_delete, sender=InChargeProfile)
+def invalidate_user_principal(sender, instance, **kwargs):
+    invalidate_principal(instance.pk if sender is User else instance.user_id)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_principal_on_group_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_principal(instance.pk)
+    elif pk_set:
+        # group.user_set.add(...): the users are in pk_set
+        for user_id in pk_set:
+            invalidate_principal(user_id)
+    else:
+        # group.user_set.clear(): the users are already gone
+        invalidate_principal()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Church)
+@receiver(post_delete, sender=Church)
+def invalidate_all_principals(sender, **kwargs):
+    invalidate_principal()
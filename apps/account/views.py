@@ -15,6 +15,7 @@ from django.db import transaction
 # Import Models and Forms from the current app
 from .models import Profile, UserChurch # Include UserChurch if you still plan to use it
 from .forms import ProfileThemeForm, UserDetailsForm, StyledUserCreationForm, UserLoginForm
+from apps.common.pagination import KeysetPaginationMixin
 
 User = get_user_model()
 
@@ -51,11 +52,12 @@ class AdminRequiredMixin(UserPassesTestMixin):
 
 # 👮‍♂️ User Management (Admin Only) - Class-Based Views for consistency
 
-class UserListView(LoginRequiredMixin, AdminRequiredMixin, ListView):
+class UserListView(LoginRequiredMixin, AdminRequiredMixin, KeysetPaginationMixin, ListView):
     model = User
     template_name = 'account/user_list.html'
     context_object_name = 'users'
     paginate_by = 20
+    keyset_ordering = ('username',)  # Unique, so the appended id never decides
 
     def get_queryset(self):
         # Order users by username for consistent display
@@ -0,0 +1,14 @@
+# apps/chat/apps.py
+
+from django.apps import AppConfig
+
+
+class ChatConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.chat'
+
+    def ready(self):
+        """
+        Import signals here so new chat messages are pushed to waiting clients.
+        """
+        import apps.chat.signals  # triggers signal registration
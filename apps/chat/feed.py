@@ -0,0 +1,77 @@
+# apps/chat/feed.py
+# Keyset (cursor) pagination over a church's chat messages.
+#
+# Messages are paged by primary key within a church, which the (church, id) index on
+# ChatMessage serves directly: "after N" (newer, for live updates) and "before N" (older,
+# for "load older") are both index range scans no matter how long the history is, unlike
+# OFFSET paging or ordering by sent_at. Rows are read with values() (sender joined in the
+# same query), never as model instances.
+#
+# Used by GetMessagesView, ChatView and the push transport (apps/chat/stream.py).
+
+from django.conf import settings
+
+from .models import ChatMessage
+
+MESSAGE_FIELDS = (
+    'id', 'message', 'sent_at', 'sender_id',
+    'sender__username', 'sender__first_name', 'sender__last_name',
+)
+
+
+def default_batch_size():
+    return getattr(settings, 'CHAT_MESSAGES_BATCH_SIZE', 50)
+
+
+def max_batch_size():
+    return getattr(settings, 'CHAT_MESSAGES_MAX_BATCH_SIZE', 200)
+
+
+def bounded_limit(value):
+    """Parses a client supplied ?limit=, clamped to 1..CHAT_MESSAGES_MAX_BATCH_SIZE."""
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return default_batch_size()
+    return min(max(limit, 1), max_batch_size())
+
+
+def serialize_message(row, user_id):
+    """Turns a feed row into the JSON the chat page renders."""
+    full_name = f"{row['sender__first_name']} {row['sender__last_name']}".strip()
+    return {
+        'id': row['id'],
+        'sender': full_name or row['sender__username'],
+        'message': row['message'],
+        'sent_at': row['sent_at'].isoformat(),
+        'is_self': row['sender_id'] == user_id,
+    }
+
+
+def _rows(church_id):
+    return ChatMessage.objects.filter(church_id=church_id).values(*MESSAGE_FIELDS)
+
+
+def messages_after(church_id, after_id, limit):
+    """Up to `limit` messages newer than `after_id`, oldest first."""
+    return list(_rows(church_id).filter(id__gt=after_id).order_by('id')[:limit])
+
+
+def messages_before(church_id, before_id=None, limit=None):
+    """
+    Up to `limit` messages older than `before_id` (or the newest ones when None),
+    returned oldest first, plus whether even older messages exist.
+    """
+    limit = limit or default_batch_size()
+    rows = _rows(church_id).order_by('-id')
+    if before_id is not None:
+        rows = rows.filter(id__lt=before_id)
+    # One extra row tells us if there is another page, without a COUNT
+    page = list(rows[:limit + 1])
+    has_more = len(page) > limit
+    return page[:limit][::-1], has_more
+
+
+def latest_message_id(church_id):
+    return ChatMessage.objects.filter(church_id=church_id).order_by('-id').values_list(
+        'id', flat=True).first() or 0
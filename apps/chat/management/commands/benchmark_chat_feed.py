@@ -0,0 +1,88 @@
+# apps/chat/management/commands/benchmark_chat_feed.py
+
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.chat.feed import MESSAGE_FIELDS, messages_after, messages_before
+from apps.chat.models import ChatMessage
+from apps.church.models import Church
+
+BENCHMARK_USERNAME = 'chat-benchmark'
+
+
+def _legacy_page(church_id):
+    """What ChatView did before the keyset feed: newest 50 by sent_at, as model instances."""
+    return ChatMessage.objects.filter(church_id=church_id).select_related('sender').order_by('-sent_at')[:50][::-1]
+
+
+def _legacy_offset(church_id, offset):
+    """OFFSET paging, the usual alternative for "load older"."""
+    return list(ChatMessage.objects.filter(church_id=church_id).order_by('-id').values(
+        *MESSAGE_FIELDS)[offset:offset + 50])
+
+
+class Command(BaseCommand):
+    help = ('Measures the chat message feed on a large room: the old sent_at ordering and OFFSET '
+            'paging against the keyset cursors. With --seed, first adds messages (use a scratch database).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Create this many messages in one church before measuring.')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query (default: 20).')
+
+    def handle(self, *args, **options):
+        if options['repeat'] <= 0:
+            raise CommandError('--repeat must be a positive number.')
+        church = Church.objects.order_by('id').first() or Church.objects.create(name='Chat Benchmark Church')
+        if options['seed']:
+            self._seed(church, options['seed'])
+
+        ids = ChatMessage.objects.filter(church=church).order_by('id').values_list('id', flat=True)
+        total = ids.count()
+        if not total:
+            raise CommandError('The church has no messages; run with --seed.')
+        oldest, newest = ids.first(), ids.last()
+        middle = ids[total // 2]
+        self.stdout.write(f'Church #{church.id}: {total} messages')
+
+        methods = [
+            ('newest page (sent_at)', lambda: _legacy_page(church.id)),
+            ('newest page (keyset)', lambda: messages_before(church.id)),
+            ('after newest-50', lambda: messages_after(church.id, newest - 50, 50)),
+            ('older, middle (OFFSET)', lambda: _legacy_offset(church.id, total // 2)),
+            ('older, middle (keyset)', lambda: messages_before(church.id, middle, 50)),
+            ('older, start (keyset)', lambda: messages_before(church.id, oldest + 50, 50)),
+        ]
+        for name, method in methods:
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                method()
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f'  {name:<24} median {statistics.median(timings):8.2f} ms   max {max(timings):8.2f} ms')
+
+        if connection.vendor == 'sqlite':
+            self._explain(ChatMessage.objects.filter(church=church).order_by('-sent_at')[:50])
+            self._explain(ChatMessage.objects.filter(church=church, id__lt=middle).order_by('-id')[:51])
+
+    def _explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = '; '.join(row[-1] for row in cursor.fetchall())
+        self.stdout.write(f'  plan: {plan}')
+
+    def _seed(self, church, count):
+        self.stdout.write(f'Creating {count} messages in church #{church.id}...')
+        user, _ = get_user_model().objects.get_or_create(username=BENCHMARK_USERNAME)
+        batch_size = 10000
+        for start in range(0, count, batch_size):
+            ChatMessage.objects.bulk_create([
+                ChatMessage(church=church, sender=user, message=f'benchmark message {number}')
+                for number in range(start, min(start + batch_size, count))
+            ], batch_size=batch_size)
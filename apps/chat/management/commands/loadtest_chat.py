@@ -0,0 +1,162 @@
+# apps/chat/management/commands/loadtest_chat.py
+
+import asyncio
+import resource
+import statistics
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from apps.chat.models import ChatMessage
+from apps.chat.notifier import get_notifier
+from apps.church.models import Church
+
+LOADTEST_USERNAME = 'chat-loadtest'
+
+
+def _rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class _StreamClient:
+    """One EventSource-like client talking to the ASGI app directly (no network)."""
+
+    def __init__(self, application, path, cookie):
+        self.scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': path.split('?')[0],
+            'raw_path': path.split('?')[0].encode(), 'query_string': path.partition('?')[2].encode(),
+            'root_path': '', 'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+            'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+        }
+        self.application = application
+        self.status = None
+        self.connected = asyncio.Event()
+        self.received = {}  # message id -> perf_counter() when it arrived
+        self._request_sent = False
+
+    async def _receive(self):
+        if not self._request_sent:
+            self._request_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Event().wait()  # Never disconnects; the task is cancelled instead
+
+    async def _send(self, event):
+        if event['type'] == 'http.response.start':
+            self.status = event['status']
+        elif event['type'] == 'http.response.body':
+            now = time.perf_counter()
+            for line in event.get('body', b'').decode().splitlines():
+                if line.startswith('id: '):
+                    self.received[int(line[4:])] = now
+            self.connected.set()
+
+    async def run(self):
+        await self.application(self.scope, self._receive, self._send)
+
+
+class Command(BaseCommand):
+    help = ('Load test for the church chat: holds many SSE clients on this one process and '
+            'compares it with the old 3-second polling design. Use a scratch database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=1000, help='Concurrent stream clients (default: 1000).')
+        parser.add_argument('--messages', type=int, default=20, help='Messages to send while connected (default: 20).')
+        parser.add_argument('--poll-interval', type=float, default=3.0,
+                            help='Interval of the polling design being compared (default: 3 seconds).')
+        parser.add_argument('--poll-samples', type=int, default=200,
+                            help='Poll requests timed through the full middleware stack (default: 200).')
+
+    def handle(self, *args, **options):
+        if options['clients'] <= 0 or options['messages'] <= 0:
+            raise CommandError('--clients and --messages must be positive numbers.')
+
+        church = Church.objects.order_by('id').first() or Church.objects.create(name='Chat Load Test Church')
+        user, _ = get_user_model().objects.get_or_create(
+            username=LOADTEST_USERNAME, defaults={'is_superuser': True, 'is_staff': True})
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        cookie = f"sessionid={client.cookies['sessionid'].value}"
+
+        self.stdout.write(f"Notifier: {type(get_notifier()).__name__}; church #{church.id}")
+        self._polling_baseline(client, church, user, options)
+        asyncio.run(self._push(church, user, cookie, options))
+
+    # --- Polling design (one full request per client every interval) ---
+
+    def _polling_baseline(self, client, church, user, options):
+        ChatMessage.objects.create(church=church, sender=user, message='baseline')
+        latest = ChatMessage.objects.filter(church=church).order_by('-id').values_list('id', flat=True).first()
+        # A poll that returns immediately (one message after the cursor), like the old 3 s poll
+        url = f"{reverse('chat:poll', args=[church.id])}?after={latest - 1}"
+        timings = []
+        for _ in range(options['poll_samples']):
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise CommandError(f'Poll request failed with HTTP {response.status_code}')
+        per_request = statistics.mean(timings)
+        capacity = options['poll_interval'] / per_request
+        self.stdout.write(
+            f"Polling: {per_request * 1000:.2f} ms CPU per poll request -> one fully busy worker "
+            f"thread serves at most ~{capacity:.0f} clients polling every {options['poll_interval']:g}s "
+            f"(average delivery delay {options['poll_interval'] / 2:g}s)")
+
+    # --- Push design (held SSE connections on the ASGI app) ---
+
+    async def _push(self, church, user, cookie, options):
+        from kadamay.asgi import application
+
+        latest = await sync_to_async(
+            lambda: ChatMessage.objects.filter(church=church).order_by('-id').values_list('id', flat=True).first()
+        )()
+        path = f"{reverse('chat:stream', args=[church.id])}?after={latest}"
+        rss_before = _rss_mb()
+
+        clients = [_StreamClient(application, path, cookie) for _ in range(options['clients'])]
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(stream_client.run()) for stream_client in clients]
+        await asyncio.wait_for(
+            asyncio.gather(*(stream_client.connected.wait() for stream_client in clients)), timeout=300)
+        connect_seconds = time.perf_counter() - started
+        failed = [stream_client.status for stream_client in clients if stream_client.status != 200]
+        if failed:
+            raise CommandError(f'{len(failed)} stream(s) failed, e.g. HTTP {failed[0]}')
+        self.stdout.write(
+            f"Push: {len(clients)} SSE clients connected in {connect_seconds:.1f}s; "
+            f"peak RSS {rss_before:.0f} -> {_rss_mb():.0f} MB")
+
+        create = sync_to_async(lambda text: ChatMessage.objects.create(church=church, sender=user, message=text))
+        sent_at = {}
+        for number in range(options['messages']):
+            started = time.perf_counter()
+            chat_message = await create(f'load test message {number}')
+            sent_at[chat_message.id] = started
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(1)
+
+        latencies = [
+            (stream_client.received[message_id] - sent) * 1000
+            for stream_client in clients
+            for message_id, sent in sent_at.items()
+            if message_id in stream_client.received
+        ]
+        expected = len(clients) * len(sent_at)
+        latencies.sort()
+        if latencies:
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            self.stdout.write(
+                f"Push: {len(latencies)}/{expected} deliveries; fan-out latency median "
+                f"{statistics.median(latencies):.1f} ms, p99 {p99:.1f} ms, max {latencies[-1]:.1f} ms")
+        else:
+            self.stdout.write(self.style.ERROR('Push: no messages were delivered.'))
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
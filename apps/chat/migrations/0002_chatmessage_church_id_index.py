@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-18 07:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['church', 'id'], name='chat_message_church_id_idx'),
+        ),
+    ]
@@ -22,6 +22,10 @@ class ChatMessage(models.Model):
         verbose_name = 'Chat Message'
         verbose_name_plural = 'Chat Messages'
         ordering = ['-sent_at']
+        indexes = [
+            # Keyset paging per church (apps/chat/feed.py): id > N / id < N within a church
+            models.Index(fields=['church', 'id'], name='chat_message_church_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.sender.username} - {self.sent_at.strftime('%Y-%m-%d %H:%M')}"
@@ -0,0 +1,120 @@
+# apps/chat/notifier.py
+# Pub/sub para sa church chat: tells waiting stream/long-poll requests that a church
+# has a new ChatMessage, so they do not have to query the database on a timer.
+#
+# Only "church X has a message newer than N" is published; the waiting request then
+# reads the actual messages from the database. A missed or duplicated notification
+# can therefore never lose or repeat a message, it only changes when the read happens.
+#
+# The backend is chosen with the CHAT_NOTIFIER_BACKEND setting:
+#   - InProcessNotifier (default): waiters in this process are woken immediately.
+#     Right for a single ASGI worker (or for runserver).
+#   - CacheNotifier: the latest message ID per church is kept in the shared cache and
+#     waiters check it every CHAT_NOTIFIER_POLL_INTERVAL seconds. Works across several
+#     worker processes as long as CACHES points to a shared backend. The check is one
+#     cache read, not a Django request or a database query.
+# Other backends (e.g. Redis pub/sub) only need publish() and wait().
+
+import asyncio
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+_notifier = None
+_notifier_lock = threading.Lock()
+
+
+class BaseNotifier:
+
+    def publish(self, church_id, message_id):
+        """Called (from sync code) after a ChatMessage is committed."""
+        raise NotImplementedError
+
+    async def wait(self, church_id, after_id, timeout):
+        """
+        Waits until a message newer than `after_id` is published for the church, or
+        until `timeout` seconds pass. Returns True if there is something new.
+        """
+        raise NotImplementedError
+
+
+class InProcessNotifier(BaseNotifier):
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest = {}   # church_id -> latest published message ID
+        self._waiters = {}  # church_id -> set of (event loop, asyncio.Event)
+
+    def publish(self, church_id, message_id):
+        with self._lock:
+            if message_id > self._latest.get(church_id, 0):
+                self._latest[church_id] = message_id
+            waiters = list(self._waiters.get(church_id, ()))
+        for loop, event in waiters:
+            # publish() runs in a worker thread; the events belong to the event loop
+            loop.call_soon_threadsafe(event.set)
+
+    def waiter_count(self):
+        with self._lock:
+            return sum(len(waiters) for waiters in self._waiters.values())
+
+    async def wait(self, church_id, after_id, timeout):
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            if self._latest.get(church_id, 0) > after_id:
+                return True
+            self._waiters.setdefault(church_id, set()).add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(church_id)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[church_id]
+
+
+class CacheNotifier(BaseNotifier):
+
+    def __init__(self):
+        self._cache = caches[getattr(settings, 'CHAT_NOTIFIER_CACHE_ALIAS', 'default')]
+        self._interval = getattr(settings, 'CHAT_NOTIFIER_POLL_INTERVAL', 0.5)
+
+    def _key(self, church_id):
+        return f'chat:latest:{church_id}'
+
+    def publish(self, church_id, message_id):
+        key = self._key(church_id)
+        # Not atomic, but a lost race only means a waiter reads the database one
+        # interval later: it always reads everything after its own last ID
+        if message_id > (self._cache.get(key) or 0):
+            self._cache.set(key, message_id, timeout=None)
+
+    async def wait(self, church_id, after_id, timeout):
+        key = self._key(church_id)
+        deadline = time.monotonic() + timeout
+        while True:
+            if (await self._cache.aget(key) or 0) > after_id:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(self._interval, remaining))
+
+
+def get_notifier():
+    """Returns the process wide notifier configured by CHAT_NOTIFIER_BACKEND."""
+    global _notifier
+    if _notifier is None:
+        with _notifier_lock:
+            if _notifier is None:
+                backend = getattr(settings, 'CHAT_NOTIFIER_BACKEND', 'apps.chat.notifier.InProcessNotifier')
+                _notifier = import_string(backend)()
+    return _notifier
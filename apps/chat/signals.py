@@ -0,0 +1,18 @@
+# apps/chat/signals.py
+# Publishes every new ChatMessage to the chat notifier (apps/chat/notifier.py) once the
+# saving transaction commits, waking the stream/long-poll requests of that church.
+
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import ChatMessage
+from .notifier import get_notifier
+
+
+@receiver(post_save, sender=ChatMessage)
+def publish_new_chat_message(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    church_id, message_id = instance.church_id, instance.pk
+    transaction.on_commit(lambda: get_notifier().publish(church_id, message_id))
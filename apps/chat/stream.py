@@ -0,0 +1,94 @@
+# apps/chat/stream.py
+# Push transport para sa church chat: Server-Sent Events stream and long-poll.
+#
+# Both hold the request open (as a coroutine, no thread per client under ASGI) until
+# the notifier (apps/chat/notifier.py) says the church has a new message, then read the
+# new messages from the database (apps/chat/feed.py). Serve with the ASGI app
+# (kadamay/asgi.py); under WSGI every open stream ties up a whole worker thread.
+
+import asyncio
+import json
+import time
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .feed import latest_message_id, messages_after, serialize_message
+from .notifier import get_notifier
+
+# Most messages sent per database read
+BATCH_SIZE = 100
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+_latest_message_id = sync_to_async(latest_message_id)
+
+# Reads in flight per event loop, keyed by (church_id, after_id). When a message arrives,
+# every waiting client of the church wakes up with the same cursor at the same moment;
+# they all share one query instead of running one each. A task can only be awaited from
+# its own loop: under ASGI all clients share one, under WSGI (async_to_sync) every
+# request runs its own, so there each request simply reads for itself.
+_pending_reads = weakref.WeakKeyDictionary()
+
+
+async def _messages_after(church_id, after_id):
+    pending = _pending_reads.setdefault(asyncio.get_running_loop(), {})
+    key = (church_id, after_id)
+    task = pending.get(key)
+    if task is None:
+        task = asyncio.ensure_future(sync_to_async(messages_after)(church_id, after_id, BATCH_SIZE))
+        pending[key] = task
+        task.add_done_callback(lambda _: pending.pop(key, None))
+    # shield(): a client disconnecting must not cancel the read the others are waiting for
+    return await asyncio.shield(task)
+
+
+async def resolve_cursor(church_id, after_id):
+    """A missing cursor means "from now on" (the page already shows the history)."""
+    if after_id > 0:
+        return after_id
+    return await _latest_message_id(church_id)
+
+
+async def event_stream(church_id, user_id, after_id):
+    """
+    Yields SSE text. Sends every message after `after_id` (the `id:` field lets the
+    browser resume with Last-Event-ID), a comment line as keepalive, and ends after
+    CHAT_STREAM_MAX_AGE seconds so that dead connections are eventually dropped;
+    EventSource reconnects by itself.
+    """
+    notifier = get_notifier()
+    heartbeat = _setting('CHAT_STREAM_HEARTBEAT', 15)
+    deadline = time.monotonic() + _setting('CHAT_STREAM_MAX_AGE', 300)
+
+    yield f"retry: {_setting('CHAT_STREAM_RETRY_MS', 3000)}\n\n"
+    while True:
+        messages = await _messages_after(church_id, after_id)
+        for row in messages:
+            after_id = row['id']
+            data = json.dumps(serialize_message(row, user_id))
+            yield f"id: {after_id}\nevent: message\ndata: {data}\n\n"
+        if len(messages) == BATCH_SIZE:
+            continue  # More are waiting
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        if not await notifier.wait(church_id, after_id, min(heartbeat, remaining)):
+            yield ": keepalive\n\n"
+
+
+async def long_poll(church_id, user_id, after_id):
+    """
+    Returns the messages after `after_id`, waiting up to CHAT_LONG_POLL_TIMEOUT seconds
+    for one to arrive. An empty list means "nothing new, ask again".
+    """
+    messages = await _messages_after(church_id, after_id)
+    if not messages:
+        if await get_notifier().wait(church_id, after_id, _setting('CHAT_LONG_POLL_TIMEOUT', 25)):
+            messages = await _messages_after(church_id, after_id)
+    return [serialize_message(row, user_id) for row in messages]
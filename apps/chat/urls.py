@@ -12,6 +12,10 @@ urlpatterns = [
     path('<int:church_id>/messages/',
          views.GetMessagesView.as_view(), name='get_messages'),
 
+    # Push transport: Server-Sent Events stream, and long-poll fallback
+    path('<int:church_id>/stream/', views.ChatStreamView.as_view(), name='stream'),
+    path('<int:church_id>/poll/', views.ChatLongPollView.as_view(), name='poll'),
+
     # API for sending a new message
     path('incharge/create/', views.create_incharge_profile_view,
          name='create_incharge'),
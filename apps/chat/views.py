@@ -6,9 +6,13 @@ from django.utils.decorators import method_decorator
 from django.views.generic import ListView, TemplateView, View
 from .models import Church, ChatMessage
 from .forms import ChatMessageForm
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
 from django.contrib.admin.views.decorators import staff_member_required
 from .forms import InChargeProfileForm
+from apps.account.principal import principal_for
+from .feed import bounded_limit, messages_after, messages_before, serialize_message
+from .stream import event_stream, long_poll, resolve_cursor
 
 
 # 1. List all churches with chat rooms (or just all churches)
@@ -23,6 +27,25 @@ class ChurchChatListView(ListView):
 # 2. Chat room detail view for a specific church
 
 
+def chat_access_denied_message(principal, church):
+    """
+    Returns why the user (their request.principal, apps/account/principal.py) may not
+    open the chat room of `church`, or None if they may.
+    Shared by the chat page and the stream/long-poll endpoints.
+    """
+    # ✅ Admins can access all
+    if principal.in_group('Admin'):
+        return None
+
+    # ✅ InCharge can only access their assigned church
+    if principal.in_group('Church_In_Charge'):
+        if principal.incharge_church_id is None:
+            return "No church assignment found for this user."
+        if principal.incharge_church_id != church.id:
+            return "You are not assigned to this church. Access denied."
+    return None
+
+
 @method_decorator(login_required, name='dispatch')
 class ChatView(TemplateView):
     template_name = 'chat/chat_room.html'
@@ -31,21 +54,9 @@ class ChatView(TemplateView):
         church_id = kwargs.get('church_id')
         church = get_object_or_404(Church, id=church_id)
 
-        # ✅ Admins can access all
-        if request.user.is_superuser or request.user.groups.filter(name='Admin').exists():
-            return super().dispatch(request, *args, **kwargs)
-
-        # ✅ InCharge can only access their assigned church
-        if request.user.groups.filter(name='Church_In_Charge').exists():
-            try:
-                if request.user.inchargeprofile.church.id != church.id:
-                    return render(request, 'chat/access_denied.html', {
-                        'message': "You are not assigned to this church. Access denied."
-                    })
-            except:
-                return render(request, 'chat/access_denied.html', {
-                    'message': "No church assignment found for this user."
-                })
+        denied = chat_access_denied_message(principal_for(request), church)
+        if denied:
+            return render(request, 'chat/access_denied.html', {'message': denied})
 
         return super().dispatch(request, *args, **kwargs)
 
@@ -55,33 +66,138 @@ class ChatView(TemplateView):
         church = get_object_or_404(Church, id=church_id)
 
         context['church'] = church
-        context['messages'] = ChatMessage.objects.filter(
-            church=church).order_by('-sent_at')[:50][::-1]
+        # Not 'messages': base.html renders that name as the Django flash messages
+        rows, has_older = messages_before(church.id)
+        # sent_at stays a datetime here so the template can format it
+        context['chat_messages'] = [
+            dict(serialize_message(row, self.request.user.id), sent_at=row['sent_at']) for row in rows]
+        context['has_older_messages'] = has_older
+        context['oldest_message_id'] = rows[0]['id'] if rows else 0
+        context['last_message_id'] = rows[-1]['id'] if rows else 0
+        context['form'] = ChatMessageForm()
         context['messages_url'] = reverse(
             'chat:get_messages', args=[church.id])
+        context['stream_url'] = reverse('chat:stream', args=[church.id])
+        context['poll_url'] = reverse('chat:poll', args=[church.id])
         return context
 
+    def post(self, request, *args, **kwargs):
+        """
+        Saves a new message (sent with AJAX by chat_room.html). Waiting clients get it
+        through the stream once the message is committed (apps/chat/signals.py).
+        """
+        church = get_object_or_404(Church, id=self.kwargs.get('church_id'))
+        form = ChatMessageForm(request.POST)
+        if not form.is_valid():
+            return JsonResponse({'status': 'error', 'errors': form.errors}, status=400)
+
+        chat_message = form.save(commit=False)
+        chat_message.sender = request.user
+        chat_message.church = church
+        chat_message.save()
+        return JsonResponse({'status': 'success', 'id': chat_message.id})
+
+
+# 2b. Push endpoints: Server-Sent Events stream and long-poll (apps/chat/stream.py).
+# These are async views; login_required does not wrap async views in Django 4.2,
+# so the checks are done here.
+
+def _stream_access(request, church_id):
+    """Returns (user id, None) or (None, error response). Runs in a worker thread."""
+    if not request.user.is_authenticated:
+        return None, JsonResponse({'error': 'Authentication required.'}, status=401)
+    church = Church.objects.filter(id=church_id).first()
+    if church is None:
+        return None, JsonResponse({'error': 'Church not found.'}, status=404)
+    denied = chat_access_denied_message(principal_for(request), church)
+    if denied:
+        return None, JsonResponse({'error': denied}, status=403)
+    return request.user.id, None
+
+
+def _cursor(value):
+    try:
+        return max(int(value or 0), 0)
+    except ValueError:
+        return 0
+
+
+class ChatStreamView(View):
+    """
+    text/event-stream of the church's new messages. The browser resumes after a
+    reconnect with the Last-Event-ID header; the first connection passes ?after=<id>.
+    """
+
+    async def get(self, request, church_id):
+        user_id, error = await sync_to_async(_stream_access)(request, church_id)
+        if error:
+            return error
+
+        after_id = await resolve_cursor(
+            church_id, _cursor(request.headers.get('Last-Event-ID') or request.GET.get('after')))
+        response = StreamingHttpResponse(
+            event_stream(church_id, user_id, after_id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Tell nginx not to buffer the stream
+        return response
+
+
+class ChatLongPollView(View):
+    """
+    Fallback for browsers without EventSource: answers as soon as there are messages
+    after ?after=<id>, or with an empty list after CHAT_LONG_POLL_TIMEOUT seconds.
+    """
+
+    async def get(self, request, church_id):
+        user_id, error = await sync_to_async(_stream_access)(request, church_id)
+        if error:
+            return error
+
+        after_id = await resolve_cursor(church_id, _cursor(request.GET.get('after')))
+        messages = await long_poll(church_id, user_id, after_id)
+        return JsonResponse({
+            'messages': messages,
+            'last_message_id': messages[-1]['id'] if messages else after_id,
+        })
+
 
 # 3. API endpoint: get messages JSON for AJAX calls
 
 
 @method_decorator(login_required, name='dispatch')
 class GetMessagesView(View):
+    """
+    Incremental message feed with keyset cursors (apps/chat/feed.py):
+      ?after=<id>   messages newer than <id>, oldest first (live updates)
+      ?before=<id>  the page of messages just older than <id> ("load older")
+      neither       the newest page
+    ?limit= is capped at CHAT_MESSAGES_MAX_BATCH_SIZE. The old ?last_message_id=
+    parameter still works as an alias of ?after=.
+    """
+
     def get(self, request, church_id):
-        last_message_id = request.GET.get('last_message_id', 0)
-        messages = ChatMessage.objects.filter(
-            church_id=church_id, id__gt=last_message_id).order_by('timestamp')
-
-        data = []
-        for msg in messages:
-            data.append({
-                'id': msg.id,
-                'user': msg.user.username,
-                'message': msg.message,
-                'timestamp': msg.sent_at.isoformat(),
-            })
-
-        return JsonResponse({'messages': data})
+        church = get_object_or_404(Church, id=church_id)
+        denied = chat_access_denied_message(principal_for(request), church)
+        if denied:
+            return JsonResponse({'error': denied}, status=403)
+
+        limit = bounded_limit(request.GET.get('limit'))
+        after = request.GET.get('after', request.GET.get('last_message_id'))
+        before = request.GET.get('before')
+
+        if after not in (None, ''):
+            rows = messages_after(church.id, _cursor(after), limit)
+            # A full page means the client should ask again right away
+            has_more = len(rows) == limit
+        else:
+            rows, has_more = messages_before(church.id, _cursor(before) if before else None, limit)
+
+        return JsonResponse({
+            'messages': [serialize_message(row, request.user.id) for row in rows],
+            'has_more': has_more,
+            'oldest_id': rows[0]['id'] if rows else None,
+            'newest_id': rows[-1]['id'] if rows else None,
+        })
 
 # saff
 
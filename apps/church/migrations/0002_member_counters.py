@@ -0,0 +1,33 @@
+# Generated by Django 4.2.23 on 2026-10-18 08:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('church', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='church',
+            name='active_member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='church',
+            name='deceased_member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='church',
+            name='family_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='church',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -29,8 +29,27 @@ class Church(models.Model):
         related_name='churches_managed'
     )
 
+    # Counters over the church's families (members are counted through their family,
+    # like ChurchDetailView always did), maintained by apps/family/signals.py.
+    # Never written by save(): they only change through F() updates.
+    family_count = models.PositiveIntegerField(default=0, editable=False)
+    member_count = models.PositiveIntegerField(default=0, editable=False)
+    active_member_count = models.PositiveIntegerField(default=0, editable=False)  # Active and alive
+    deceased_member_count = models.PositiveIntegerField(default=0, editable=False)
+
+    COUNTER_FIELDS = ('family_count', 'member_count', 'active_member_count', 'deceased_member_count')
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Leave the counters out of the UPDATE (see Family.save)
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name_plural = "Churches"  # Para sa admin panel
@@ -10,15 +10,20 @@ from django.shortcuts import get_object_or_404, render
 from .models import Church, District  # Ensure District is imported
 from apps.family.models import Family
 from apps.individual.models import Individual
+from apps.payment import ledger
+from apps.report.rollups import COUNTED_PAYMENT_STATUSES
+from apps.common.pagination import KeysetPaginationMixin
+from apps.common.replica import ReplicaReadMixin
 
 # --- Church List View (PRIORITY IS CHURCH NAME/ADDRESS/DISTRICT SEARCH ONLY) ---
 
 
-class ChurchListView(LoginRequiredMixin, ListView):
+class ChurchListView(LoginRequiredMixin, ReplicaReadMixin, KeysetPaginationMixin, ListView):
     model = Church
     template_name = 'church/church_list.html'
     context_object_name = 'churches'
     paginate_by = 10
+    keyset_ordering = ('name', 'id')
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -44,29 +49,23 @@ class ChurchListView(LoginRequiredMixin, ListView):
 
 
 # --- Church Detail View ---
-class ChurchDetailView(LoginRequiredMixin, DetailView):
+class ChurchDetailView(LoginRequiredMixin, ReplicaReadMixin, DetailView):
     model = Church
     template_name = 'church/church_detail.html'
     context_object_name = 'church'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        church = self.get_object()
-
-        # Calculate counts for Quick Stats
-        context['total_families_count'] = church.families.count()
-        context['total_members_count'] = Individual.objects.filter(
-            family__church=church).count()
-
-        context['active_members_count'] = Individual.objects.filter(
-            family__church=church,
-            is_active_member=True,
-            is_alive=True
-        ).count()
-        context['deceased_members_count'] = Individual.objects.filter(
-            family__church=church,
-            is_alive=False
-        ).count()
+        church = self.object
+
+        # Quick Stats: the counter columns kept by apps/family/counters.py
+        context['total_families_count'] = church.family_count
+        context['total_members_count'] = church.member_count
+        context['active_members_count'] = church.active_member_count
+        context['deceased_members_count'] = church.deceased_member_count
+        # Counted payments made by the church's members: one range scan of the payment ledger
+        totals = ledger.totals_by('church_id', COUNTED_PAYMENT_STATUSES, church_id=church.pk).get(church.pk)
+        context['contributions_total'] = (totals or {}).get('paid_total') or 0
 
         # Get recent families (e.g., first 5)
         context['recent_families'] = church.families.order_by('-id')[:5]
@@ -147,11 +146,12 @@ class ChurchDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 
 
 # --- Family List in Church View ---
-class FamilyListInChurchView(LoginRequiredMixin, ListView):
+class FamilyListInChurchView(LoginRequiredMixin, ReplicaReadMixin, KeysetPaginationMixin, ListView):
     model = Family
     template_name = 'family/family_list.html'
     context_object_name = 'families'
     paginate_by = 10
+    keyset_ordering = ('family_name', 'id')
 
     def get_queryset(self):
         church_id = self.kwargs.get('church_id')
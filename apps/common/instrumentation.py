@@ -0,0 +1,292 @@
+# apps/common/instrumentation.py
+# Per-view instrumentation: pila ka SQL queries, DB time, template render time ug
+# response size sa matag request, grouped by the resolved view name.
+#
+# InstrumentationMiddleware measures every request and feeds the in-process registry,
+# which /metrics/ serves in the Prometheus text format (histograms per view). The
+# registry is per process: with several workers, scrape each one.
+#
+# Query budgets are declared on the view class (`query_budget = 12`) or, for views
+# you cannot edit, in the INSTRUMENTATION_QUERY_BUDGETS setting keyed by view name.
+# A request over its budget logs a warning, or raises QueryBudgetExceeded when
+# INSTRUMENTATION_BUDGET_MODE = 'raise' (use that in tests so a regression fails).
+#
+# Views can attach debug details to the request with note(); they are logged with
+# the request's numbers at DEBUG level on the 'kadamay.instrumentation' logger.
+
+import bisect
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger('kadamay.instrumentation')
+
+UNRESOLVED = '<unresolved>'
+
+# Histogram buckets (upper bounds); +Inf is implied
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum:g}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class ViewMetrics:
+
+    def __init__(self):
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_seconds = 0.0
+        self.render_seconds = 0.0
+        self.response_bytes = 0
+        self.over_budget = 0
+
+
+class Registry:
+    """Thread-safe per-process store of ViewMetrics by view name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view_name, record):
+        with self._lock:
+            metrics = self._views.get(view_name)
+            if metrics is None:
+                metrics = self._views[view_name] = ViewMetrics()
+            metrics.duration.observe(record.duration)
+            metrics.queries.observe(record.query_count)
+            metrics.db_seconds += record.db_seconds
+            metrics.render_seconds += record.render_seconds
+            metrics.response_bytes += record.response_bytes
+            metrics.over_budget += record.over_budget
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def render(self):
+        """The registry in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            views = sorted(self._views.items())
+            sections = [
+                ('kadamay_view_duration_seconds', 'histogram', 'Request latency by view.',
+                 lambda name, labels, metrics: metrics.duration.render(name, labels)),
+                ('kadamay_view_queries', 'histogram', 'SQL queries per request by view.',
+                 lambda name, labels, metrics: metrics.queries.render(name, labels)),
+                ('kadamay_view_db_seconds_total', 'counter', 'Time spent in SQL by view.',
+                 lambda name, labels, metrics: [f'{name}{{{labels}}} {metrics.db_seconds:g}']),
+                ('kadamay_view_render_seconds_total', 'counter', 'Template render time by view.',
+                 lambda name, labels, metrics: [f'{name}{{{labels}}} {metrics.render_seconds:g}']),
+                ('kadamay_view_response_bytes_total', 'counter', 'Response body bytes by view.',
+                 lambda name, labels, metrics: [f'{name}{{{labels}}} {metrics.response_bytes}']),
+                ('kadamay_view_query_budget_exceeded_total', 'counter', 'Requests over their query budget.',
+                 lambda name, labels, metrics: [f'{name}{{{labels}}} {metrics.over_budget}']),
+            ]
+            for name, kind, help_text, render in sections:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for view_name, metrics in views:
+                    lines.extend(render(name, f'view="{view_name}"', metrics))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class RequestRecord:
+    """The numbers of one request; also the DB execute wrapper that collects them."""
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_seconds = 0.0
+        self.render_seconds = 0.0
+        self.response_bytes = 0
+        self.duration = 0.0
+        self.over_budget = 0
+        self.notes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.query_count += 1
+
+
+def note(request, **details):
+    """Attaches debug details to the current request's instrumentation log line."""
+    record = getattr(request, '_instrumentation', None)
+    if record is not None:
+        record.notes.update(details)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNRESOLVED
+    return match.view_name or match._func_path
+
+
+def query_budget(request):
+    """The declared query budget of the request's view, or None."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    view_class = getattr(match.func, 'view_class', None)
+    budget = getattr(view_class or match.func, 'query_budget', None)
+    if budget is None:
+        budget = _setting('INSTRUMENTATION_QUERY_BUDGETS', {}).get(match.view_name)
+    return budget
+
+
+def _wrap_connections(record):
+    wrappers = [connection.execute_wrapper(record) for connection in connections.all()]
+    for wrapper in wrappers:
+        wrapper.__enter__()
+    return wrappers
+
+
+def _unwrap_connections(wrappers):
+    for wrapper in reversed(wrappers):
+        wrapper.__exit__(None, None, None)
+
+
+class InstrumentationMiddleware:
+    """
+    Records query count, DB time, template render time, response size and latency per
+    view. Put it first in MIDDLEWARE so the numbers cover the whole request.
+    Works under WSGI and ASGI, like Django's own middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = _setting('INSTRUMENTATION_ENABLED', True)
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        record = request._instrumentation = RequestRecord()
+        started = time.perf_counter()
+        wrappers = _wrap_connections(record)
+        try:
+            response = self.get_response(request)
+        finally:
+            _unwrap_connections(wrappers)
+        return self._finish(request, response, record, started)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        record = request._instrumentation = RequestRecord()
+        started = time.perf_counter()
+        # Connections are per thread, and under ASGI the request's queries (sync views and
+        # the async ORM alike) run in its thread-sensitive sync_to_async() thread, so the
+        # wrappers go on that thread's connections
+        wrappers = await sync_to_async(_wrap_connections)(record)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(_unwrap_connections)(wrappers)
+        return self._finish(request, response, record, started)
+
+    def _finish(self, request, response, record, started):
+        record.duration = time.perf_counter() - started
+        if not response.streaming:
+            record.response_bytes = len(response.content)
+
+        name = view_name(request)
+        budget = query_budget(request)
+        if budget is not None and record.query_count > budget:
+            record.over_budget = 1
+        registry.record(name, record)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                '%s %s -> %s: %d queries (%.1f ms), render %.1f ms, %.1f ms total, %d bytes %s',
+                request.method, name, response.status_code, record.query_count,
+                record.db_seconds * 1000, record.render_seconds * 1000, record.duration * 1000,
+                record.response_bytes, record.notes or '')
+        if record.over_budget:
+            message = f'{name} ran {record.query_count} queries, over its budget of {budget}'
+            if _setting('INSTRUMENTATION_BUDGET_MODE', 'warn') == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_template_response(self, request, response):
+        # The handler calls response.render() after this hook; time that call
+        record = getattr(request, '_instrumentation', None)
+        if record is not None:
+            render = response.render
+
+            def timed_render():
+                started = time.perf_counter()
+                try:
+                    return render()
+                finally:
+                    record.render_seconds += time.perf_counter() - started
+
+            response.render = timed_render
+        return response
+
+
+def metrics_view(request):
+    """
+    Prometheus-style text metrics of this process. Open to staff users, and to a
+    scraper sending "Authorization: Bearer <INSTRUMENTATION_METRICS_TOKEN>".
+    """
+    token = _setting('INSTRUMENTATION_METRICS_TOKEN', '')
+    authorized = (
+        (token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'))
+        or (request.user.is_authenticated and request.user.is_staff)
+    )
+    if not authorized:
+        return HttpResponseForbidden('Forbidden')
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
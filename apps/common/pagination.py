@@ -0,0 +1,303 @@
+# apps/common/pagination.py
+# Keyset pagination para sa dagkong lists (payments, members, families, users...).
+#
+# Django's Paginator runs COUNT(*) on every page and reads the page with OFFSET n,
+# which makes the database walk past all n earlier rows: page 5,000 of the payments
+# costs as much as reading 50,000 of them. A keyset page continues from the last row
+# shown instead,
+#
+#   WHERE (surname, given_name, id) > (<last row shown>) ORDER BY surname, given_name, id LIMIT 11
+#
+# which an index on the ordering columns answers in the same time at any depth. The
+# ordering always ends with `id`, so the position is unique, and has_next comes from
+# reading one row more than the page instead of counting.
+#
+# The position travels as an opaque, signed cursor (?after=<cursor> / ?before=<cursor>),
+# so clients cannot depend on (or tamper with) what is inside it. The total shown
+# next to the controls is approximate and cached for PAGINATION_COUNT_CACHE_SECONDS:
+# the planner's row estimate for an unfiltered table on PostgreSQL (a plain COUNT on
+# SQLite, which counts a whole table from its smallest index), and for a filtered list
+# a COUNT that stops at PAGINATION_COUNT_LIMIT rows ("10,000+").
+
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+
+SALT = 'kadamay.pagination.cursor'
+AFTER, BEFORE = 'after', 'before'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder cuts datetimes to milliseconds; a cursor needs the exact value
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class CursorSerializer:
+    """JSON with dates, datetimes and decimals (as strings; the lookups convert them back)."""
+
+    def dumps(self, obj):
+        return CursorEncoder(separators=(',', ':')).encode(obj).encode('latin-1')
+
+    def loads(self, data):
+        return signing.JSONSerializer().loads(data)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def parse_ordering(ordering):
+    """('-or_number',) -> [('or_number', True), ('id', False)]: (field, descending), ending with id."""
+    fields = []
+    for name in ordering:
+        fields.append((name.lstrip('-'), name.startswith('-')))
+    if not fields or fields[-1][0] not in ('id', 'pk'):
+        fields.append(('id', False))
+    return fields
+
+
+def encode_cursor(values):
+    return signing.dumps(list(values), salt=SALT, serializer=CursorSerializer, compress=True)
+
+
+def decode_cursor(cursor, fields):
+    try:
+        values = signing.loads(cursor, salt=SALT, serializer=CursorSerializer)
+    except signing.BadSignature:
+        raise InvalidCursor('Invalid cursor.')
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise InvalidCursor('Cursor does not match this list.')
+    return values
+
+
+def _position(row, fields):
+    """The ordering values of a row (model instance or values() dict)."""
+    if isinstance(row, dict):
+        return [row[name] for name, _ in fields]
+    values = []
+    for name, _ in fields:
+        value = row
+        for part in name.split('__'):
+            value = getattr(value, part)
+        values.append(value)
+    return values
+
+
+def _seek(fields, values, direction):
+    """
+    Rows strictly after (or before) `values` in the ordering:
+    a >= x & ((a > x) | (a = x & b > y) | ...). The redundant a >= x on the first
+    column is what lets the database start a range scan of the index there; the
+    ORs alone are not used as an index bound.
+    """
+    condition, equal = Q(), {}
+    for (name, descending), value in zip(fields, values):
+        lookup = 'lt' if descending != (direction == BEFORE) else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    (name, descending), value = fields[0], values[0]
+    lookup = 'lte' if descending != (direction == BEFORE) else 'gte'
+    return Q(**{f'{name}__{lookup}': value}) & condition
+
+
+def _row_value_seek(queryset, fields, values, direction):
+    """
+    (sql, params) of WHERE (a, b, id) > (x, y, z) when every column is on the model's
+    own table and sorted the same way; both SQLite and PostgreSQL seek an index on
+    (a, b, id) straight to that row. None otherwise (then _seek() is used).
+    """
+    if len({descending for _, descending in fields}) != 1 or any('__' in name for name, _ in fields):
+        return None
+    opts = queryset.model._meta
+    quote = connections[queryset.db].ops.quote_name
+    columns, params = [], []
+    for (name, _), value in zip(fields, values):
+        field = opts.pk if name == 'pk' else opts.get_field(name)
+        if getattr(field, 'column', None) is None:
+            return None
+        columns.append(f'{quote(opts.db_table)}.{quote(field.column)}')
+        params.append(field.get_db_prep_value(field.to_python(value), connections[queryset.db]))
+    operator = '<' if fields[0][1] != (direction == BEFORE) else '>'
+    placeholders = ', '.join(['%s'] * len(params))
+    return f'({", ".join(columns)}) {operator} ({placeholders})', params
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated list. Has the parts of django.core.paginator.Page
+    the templates use (object_list, has_next, has_previous, has_other_pages) plus
+    the cursors of the neighbouring pages and the approximate total.
+    """
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = None
+        self.count_is_capped = False
+        self.next_querystring = self.previous_querystring = ''
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def count_label(self):
+        if self.count is None:
+            return ''
+        return f'{self.count:,}+' if self.count_is_capped else f'about {self.count:,}'
+
+    def as_json(self):
+        return {
+            'next': self.next_cursor,
+            'previous': self.previous_cursor,
+            'approximate_count': self.count,
+            'count_is_capped': self.count_is_capped,
+        }
+
+
+def keyset_page(queryset, ordering, after=None, before=None, page_size=None):
+    """
+    The page of `queryset` in `ordering` (a tuple like ('surname', 'given_name') or
+    ('-or_number', 'id')) just after the `after` cursor, just before the `before`
+    cursor, or the first page. Raises InvalidCursor for a cursor that was tampered
+    with or belongs to a list with another ordering.
+    """
+    page_size = page_size or _setting('PAGINATION_PAGE_SIZE', 20)
+    fields = parse_ordering(ordering)
+    direction = BEFORE if before else AFTER
+    cursor = before or after
+
+    order_by = [('-' if descending != (direction == BEFORE) else '') + name for name, descending in fields]
+    queryset = queryset.order_by(*order_by)
+    if cursor:
+        values = decode_cursor(cursor, fields)
+        row_value = _row_value_seek(queryset, fields, values, direction)
+        queryset = queryset.extra(where=[row_value[0]], params=row_value[1]) if row_value \
+            else queryset.filter(_seek(fields, values, direction))
+
+    rows = list(queryset[:page_size + 1])
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    if direction == BEFORE:
+        rows.reverse()
+        has_next, has_previous = True, more
+    else:
+        has_next, has_previous = more, bool(cursor)
+
+    return KeysetPage(
+        rows,
+        next_cursor=encode_cursor(_position(rows[-1], fields)) if rows and has_next else None,
+        previous_cursor=encode_cursor(_position(rows[0], fields)) if rows and has_previous else None,
+    )
+
+
+# --- Approximate totals ---
+
+def _table_estimate(queryset):
+    """The planner's row estimate of an unfiltered table, where the database keeps one."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql' or queryset.query.where or queryset.query.distinct:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                       [queryset.model._meta.db_table])
+        row = cursor.fetchone()
+    # -1 (or 0) until the table has been vacuumed or analyzed once
+    return row[0] if row and row[0] > 0 else None
+
+
+def approximate_count(queryset):
+    """(count, is_capped) of a queryset, cached by its SQL."""
+    limit = _setting('PAGINATION_COUNT_LIMIT', 10000)
+    queryset = queryset.order_by()
+    sql, params = queryset.values('pk').query.sql_with_params()
+    key = 'pagination:count:' + hashlib.md5(
+        f'{queryset.db}:{sql}:{params!r}'.encode()).hexdigest()
+
+    cached = cache.get(key)
+    if cached is None:
+        estimate = _table_estimate(queryset)
+        if estimate is not None:
+            cached = (estimate, False)
+        elif not queryset.query.where and not queryset.query.distinct:
+            # A whole table: SQLite counts it from its smallest index (~30 ms per million rows)
+            cached = (queryset.count(), False)
+        else:
+            # A sliced count is SELECT COUNT(*) FROM (... LIMIT n): it stops reading at the cap
+            counted = queryset[:limit + 1].count()
+            cached = (min(counted, limit), counted > limit)
+        cache.set(key, cached, _setting('PAGINATION_COUNT_CACHE_SECONDS', 60))
+    return tuple(cached)
+
+
+def page_from_request(request, queryset, ordering, page_size=None):
+    """
+    The keyset page selected by the request's ?after= / ?before= cursor, with its
+    approximate total; for JSON APIs, whose response adds page.as_json() to the rows.
+    """
+    page = keyset_page(queryset, ordering, after=request.GET.get(AFTER), before=request.GET.get(BEFORE),
+                       page_size=page_size)
+    page.count, page.count_is_capped = approximate_count(queryset)
+    return page
+
+
+class KeysetPaginationMixin:
+    """
+    For ListViews: pages with ?after=/?before= cursors over `keyset_ordering`
+    instead of ?page=. The page size is still `paginate_by`. The template gets the
+    usual page_obj / is_paginated, and partials/_keyset_pagination.html renders the
+    controls with the approximate total.
+    """
+    keyset_ordering = None  # e.g. ('surname', 'given_name', 'id'); `id` is appended when missing
+
+    def get_keyset_ordering(self):
+        return self.keyset_ordering or self.get_ordering() or ('id',)
+
+    def paginate_queryset(self, queryset, page_size):
+        try:
+            page = page_from_request(self.request, queryset, self.get_keyset_ordering(), page_size)
+        except InvalidCursor as error:
+            raise Http404(str(error))
+
+        params = self.request.GET.copy()
+        params.pop(AFTER, None)
+        params.pop(BEFORE, None)
+        params.pop('page', None)
+        if page.next_cursor:
+            params[AFTER] = page.next_cursor
+            page.next_querystring = params.urlencode()
+            params.pop(AFTER)
+        if page.previous_cursor:
+            params[BEFORE] = page.previous_cursor
+            page.previous_querystring = params.urlencode()
+        # The page stands in for the paginator too (context['paginator'])
+        return page, page, page.object_list, page.has_other_pages()
@@ -0,0 +1,90 @@
+# apps/common/postgresql_pool/base.py
+# PostgreSQL backend nga mo-hulam og connections gikan sa usa ka pool.
+#
+# Django 4.2 opens a new PostgreSQL connection for every request (CONN_MAX_AGE = 0) or
+# keeps one per thread (CONN_MAX_AGE > 0), which either pays the ~5-20 ms connect and
+# authentication on every request or holds a connection per idle thread. This backend
+# keeps one psycopg_pool.ConnectionPool per database alias and process instead: a
+# request borrows an open connection and gives it back when Django closes it at the
+# end of the request, so CONN_MAX_AGE stays 0 (settings.py does that).
+#
+# Enabled by DATABASE_POOL = True in settings.py, which sets
+#
+#   'ENGINE': 'apps.common.postgresql_pool',
+#   'OPTIONS': {'pool': {'min_size': 2, 'max_size': 10, 'timeout': 30}},
+#
+# The pool options are passed to psycopg_pool.ConnectionPool. The pool is created on
+# first use in each process, so gunicorn workers do not share the master's pool.
+# A connection that broke while borrowed is discarded by the pool, not handed out again.
+
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel, is_psycopg3
+
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError as error:
+    raise ImproperlyConfigured(f'Error loading psycopg_pool module: {error}')
+
+if not is_psycopg3:
+    raise ImproperlyConfigured('apps.common.postgresql_pool needs psycopg 3 (pip install "psycopg[binary]").')
+
+# One pool per database alias in this process
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def close_pools():
+    """Closes every pool of this process (e.g. in a test teardown)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    @property
+    def pool(self):
+        pool = _pools.get(self.alias)
+        if pool is None:
+            with _pools_lock:
+                pool = _pools.get(self.alias)
+                if pool is None:
+                    options = dict(self.settings_dict['OPTIONS'].get('pool') or {})
+                    if self.settings_dict['CONN_HEALTH_CHECKS']:
+                        options.setdefault('check', ConnectionPool.check_connection)
+                    pool = _pools[self.alias] = ConnectionPool(
+                        kwargs=self.get_connection_params(),
+                        name=f'kadamay-{self.alias}',
+                        open=True,
+                        **options,
+                    )
+        return pool
+
+    def get_new_connection(self, conn_params):
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        try:
+            self.isolation_level = IsolationLevel(
+                IsolationLevel.READ_COMMITTED if isolation_level is None else isolation_level)
+        except ValueError:
+            raise ImproperlyConfigured(
+                f'Invalid transaction isolation level {isolation_level} specified. '
+                f'Use one of the psycopg.IsolationLevel values.')
+        connection = self.pool.getconn()
+        # A returned connection keeps the level the last borrower left it at
+        connection.isolation_level = self.isolation_level if isolation_level is not None else None
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                # The pool rolls back anything left open and discards a broken connection
+                return self.pool.putconn(self.connection)
@@ -0,0 +1,258 @@
+# apps/common/replica.py
+# Read replica routing: ang read-only pages (dashboard, summaries, exports, lists) ug ang
+# report jobs mobasa sa `replica` database, aron dili sila makig-agaw sa cashier writes.
+#
+# Nothing reads from the replica unless it asks to:
+#
+#   ReplicaReadMixin / @use_replica   GET and HEAD requests of a view, template rendering
+#                                     and streamed responses included
+#   with read_from_replica():         any block of code, e.g. a report job
+#
+# and even then ReplicaRouter (DATABASE_ROUTERS) only sends a read there when a `replica`
+# database is configured (REPLICA_DATABASE_URL), the model is not in REPLICA_PRIMARY_APPS
+# (a user who just logged in must find their session), no transaction is open on the
+# primary, and the replica is not behind by more than REPLICA_MAX_LAG_SECONDS. Writes
+# always go to `default`, also from inside read_from_replica().
+#
+# Read-your-writes: ReplicaPinningMiddleware notes when a request wrote to the primary and
+# stores a "read from the primary until" time in the session. For REPLICA_PIN_SECONDS that
+# user's pages skip the replica, so the payment a cashier just saved is in the list they
+# are sent back to. The lag of a PostgreSQL standby is measured at most every
+# REPLICA_LAG_CHECK_SECONDS per process; when it cannot be measured (SQLite, a second
+# database that is not a standby) the replica is trusted. A replica that fails the check
+# is left alone until the next one.
+#
+# The dashboard keeps what it computed (apps/report/dashboard_cache.py), so numbers built
+# on the replica can be up to REPLICA_MAX_LAG_SECONDS behind until the next change.
+#
+# To try it locally, point the replica at a copy of the database:
+#   cp db.sqlite3 replica.sqlite3
+#   REPLICA_DATABASE_URL=sqlite:///replica.sqlite3 python manage.py runserver
+# The copy never changes, so which database a page read is easy to see.
+
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger('kadamay.replica')
+
+REPLICA = 'replica'
+PIN_SESSION_KEY = '_replica_pinned_until'
+READ_METHODS = ('GET', 'HEAD')
+
+# Seconds the standby is behind the primary; 0 when it has replayed everything it received
+POSTGRESQL_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+_reading = contextvars.ContextVar('replica_reading', default=False)
+# The current request's _RequestWrites, set by ReplicaPinningMiddleware
+_request_writes = contextvars.ContextVar('replica_request_writes', default=None)
+
+_lag_lock = threading.Lock()
+_lag_state = {'checked_at': None, 'usable': True}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def replica_lag():
+    """
+    Seconds the replica is behind the primary, or None when that cannot be measured.
+    Raises DatabaseError when the replica does not answer.
+    """
+    connection = connections[REPLICA]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(POSTGRESQL_LAG_SQL)
+        lag = cursor.fetchone()[0]
+    return float(lag) if lag is not None else None
+
+
+def replica_usable():
+    """Whether the replica is up and close enough behind, re-checked every REPLICA_LAG_CHECK_SECONDS."""
+    now = time.monotonic()
+    with _lag_lock:
+        checked_at = _lag_state['checked_at']
+        if checked_at is not None and now - checked_at < _setting('REPLICA_LAG_CHECK_SECONDS', 2):
+            return _lag_state['usable']
+        # Claimed before checking, so the other threads keep the last answer meanwhile
+        _lag_state['checked_at'] = now
+    max_lag = _setting('REPLICA_MAX_LAG_SECONDS', 5)
+    try:
+        lag = replica_lag()
+        usable = lag is None or lag <= max_lag
+        if not usable:
+            logger.warning('Replica is %.1f s behind (limit %s s); reading from the primary', lag, max_lag)
+    except DatabaseError:
+        logger.warning('Replica database is not answering; reading from the primary', exc_info=True)
+        usable = False
+    _lag_state['usable'] = usable
+    return usable
+
+
+@contextmanager
+def read_from_replica():
+    """Reads inside the block go to the replica, when ReplicaRouter allows it."""
+    token = _reading.set(True)
+    try:
+        yield
+    finally:
+        _reading.reset(token)
+
+
+def is_pinned(request):
+    """True while a user who just wrote must read from the primary."""
+    session = getattr(request, 'session', None)
+    return session is not None and session.get(PIN_SESSION_KEY, 0) > time.time()
+
+
+def _replica_chunks(chunks):
+    # A streamed response is read after the view returned: step through it on the replica
+    chunks = iter(chunks)
+    while True:
+        with read_from_replica():
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+        yield chunk
+
+
+def _respond_from_replica(request, view, *args, **kwargs):
+    if not replica_configured() or request.method not in READ_METHODS or is_pinned(request):
+        return view(request, *args, **kwargs)
+    with read_from_replica():
+        response = view(request, *args, **kwargs)
+
+    # TemplateResponse: the handler renders it after the view returned
+    if hasattr(response, 'render') and callable(response.render) and not response.is_rendered:
+        render = response.render
+
+        def render_on_replica():
+            with read_from_replica():
+                return render()
+
+        response.render = render_on_replica
+    if response.streaming and not getattr(response, 'is_async', False):
+        response.streaming_content = _replica_chunks(response.streaming_content)
+    return response
+
+
+def use_replica(view_func):
+    """Decorator for function views: GET/HEAD requests read from the replica."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        return _respond_from_replica(request, view_func, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaReadMixin:
+    """
+    For read-only class-based views: GET/HEAD requests read from the replica. Put it
+    after the access mixins, so permission checks read the primary.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        return _respond_from_replica(request, super().dispatch, *args, **kwargs)
+
+
+class _RequestWrites:
+    # Mutated rather than replaced, so a write made in another context (sync_to_async) counts
+    def __init__(self):
+        self.wrote = False
+
+
+class ReplicaRouter:
+    """Sends reads inside read_from_replica() to the replica; everything else to `default`."""
+
+    def _primary_only(self, model):
+        return model._meta.app_label in _setting('REPLICA_PRIMARY_APPS', ('auth', 'contenttypes', 'sessions'))
+
+    def db_for_read(self, model, **hints):
+        if not _reading.get() or not replica_configured() or self._primary_only(model):
+            return None
+        # Inside atomic() on the primary, read what the transaction wrote
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return REPLICA if replica_usable() else None
+
+    def db_for_write(self, model, **hints):
+        writes = _request_writes.get()
+        if writes is not None and model._meta.app_label != 'sessions':
+            writes.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, REPLICA}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """
+    Read-your-writes: after a request that wrote to the primary, the user reads from
+    the primary for REPLICA_PIN_SECONDS (a time stored in the session). Goes after
+    SessionMiddleware. Works under WSGI and ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not replica_configured():
+            return self.get_response(request)
+        writes = _RequestWrites()
+        token = _request_writes.set(writes)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_writes.reset(token)
+        self._pin(request, writes)
+        return response
+
+    async def __acall__(self, request):
+        if not replica_configured():
+            return await self.get_response(request)
+        # sync_to_async() runs the view in a copy of this context: it sees the same
+        # _RequestWrites object, so its writes are noted here
+        writes = _RequestWrites()
+        token = _request_writes.set(writes)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_writes.reset(token)
+        if writes.wrote:
+            # The session may still have to be loaded from the database
+            await sync_to_async(self._pin)(request, writes)
+        return response
+
+    def _pin(self, request, writes):
+        pin_seconds = _setting('REPLICA_PIN_SECONDS', 5)
+        if writes.wrote and pin_seconds > 0 and hasattr(request, 'session'):
+            request.session[PIN_SESSION_KEY] = time.time() + pin_seconds
@@ -0,0 +1,389 @@
+# apps/common/sqlite_to_postgres.py
+# Pagbalhin sa tibuok SQLite database ngadto sa PostgreSQL (migrate_sqlite_to_postgres).
+#
+# dumpdata/loaddata turn every row into a model instance, serialize it to JSON and save
+# it again with one INSERT per row, which takes hours for a multi-gigabyte database.
+# This copies tables instead:
+#
+#   - the target gets the project's schema from `migrate`, and the SQLite file must be
+#     at the same migrations, so the columns match one to one;
+#   - every model table (auto-created many-to-many tables included) is read from SQLite
+#     in chunks of `chunk_size` rows and streamed into PostgreSQL with COPY, parents
+#     before children, all in one transaction;
+#   - rows go into COPY as SQLite returns them, and PostgreSQL parses the text form of
+#     each value: 0/1 booleans, hex UUIDs and datetime text are all valid input (the
+#     datetimes are naive UTC, and the copy runs with TIME ZONE 'UTC'). Only durations,
+#     stored as microseconds, are converted in Python;
+#   - the foreign keys and the plain (non-unique) indexes of the copied tables are
+#     dropped before the copy and created again after it, as pg_restore does: building an
+#     index once from the full table is much faster than updating it row by row, and
+#     adding a foreign key back checks every row in one join instead of queueing a
+#     deferred check per row. Primary keys and unique constraints stay, so duplicates
+#     still fail the copy;
+#   - the id sequences are reset past the copied ids, and the tables are ANALYZEd so the
+#     planner (and the approximate list totals) have statistics from the start;
+#   - each table is verified afterwards: the row count, and a checksum of all rows
+#     computed the same way from both databases. The checksum is the sum of the rows'
+#     hashes, so it does not depend on the order the databases return rows in.
+
+import datetime
+import decimal
+import json
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import connections, router, transaction
+from django.db.migrations.recorder import MigrationRecorder
+
+CHECKSUM_MODULUS = 2 ** 64
+
+
+class MigrationError(Exception):
+    pass
+
+
+@dataclass
+class TableResult:
+    table: str
+    rows: int
+    seconds: float
+    source_count: int = None
+    target_count: int = None
+    source_checksum: int = None
+    target_checksum: int = None
+
+    @property
+    def verified(self):
+        if self.source_count != self.target_count:
+            return False
+        return self.source_checksum == self.target_checksum
+
+
+# --- Values ---
+
+def _datetime(value):
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        # Django keeps datetimes in SQLite as naive UTC when USE_TZ is on
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.astimezone(datetime.timezone.utc)
+
+
+def _date(value):
+    return datetime.date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _time(value):
+    return datetime.time.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _uuid(value):
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+def _duration(value):
+    return value if isinstance(value, datetime.timedelta) else datetime.timedelta(microseconds=value)
+
+
+def _decimal(places):
+    exponent = decimal.Decimal(1).scaleb(-places) if places is not None else None
+
+    def convert(value):
+        value = decimal.Decimal(str(value))
+        return value.quantize(exponent) if exponent is not None else value
+    return convert
+
+
+def _json(value):
+    # COPY takes the JSON text as it is; only the checksum needs it parsed
+    return json.dumps(json.loads(value) if isinstance(value, str) else value, sort_keys=True)
+
+
+def _converter(field):
+    """The function turning a SQLite value of this column into what PostgreSQL takes, or None."""
+    if field.is_relation:
+        field = field.target_field
+    internal_type = field.get_internal_type()
+    if internal_type in ('BooleanField', 'NullBooleanField'):
+        return bool
+    if internal_type == 'DateTimeField':
+        return _datetime
+    if internal_type == 'DateField':
+        return _date
+    if internal_type == 'TimeField':
+        return _time
+    if internal_type == 'UUIDField':
+        return _uuid
+    if internal_type == 'DurationField':
+        return _duration
+    if internal_type == 'DecimalField':
+        return _decimal(field.decimal_places)
+    if internal_type == 'FloatField':
+        return float
+    return None
+
+
+def _copy_converter(field):
+    """The function needed before COPY parses a SQLite value of this column, or None."""
+    if field.is_relation:
+        field = field.target_field
+    return _duration if field.get_internal_type() == 'DurationField' else None
+
+
+def _normalizer(field):
+    """The function giving a value the same form whichever database it was read from."""
+    if field.get_internal_type() == 'JSONField':
+        return _json
+    if field.get_internal_type() == 'BinaryField':
+        return bytes
+    return _converter(field)
+
+
+def _apply(functions, row):
+    return tuple(value if function is None or value is None else function(value)
+                 for function, value in zip(functions, row))
+
+
+
+
+# --- Tables ---
+
+def copied_models(using='default', exclude=()):
+    """
+    The models whose tables are copied, parents before children: concrete, managed
+    models (auto-created many-to-many models included) that migrate creates on
+    `using`, minus the `exclude` app labels or app_label.ModelName.
+    """
+    exclude = {label.lower() for label in exclude}
+    models = [
+        model for model in apps.get_models(include_auto_created=True)
+        if model._meta.managed and not model._meta.proxy
+        and router.allow_migrate_model(using, model)
+        and model._meta.app_label.lower() not in exclude
+        and model._meta.label_lower not in exclude
+    ]
+
+    # Topological order on the foreign keys between the copied models
+    remaining = {model: {field.related_model for field in model._meta.local_concrete_fields
+                         if field.is_relation and field.related_model in models and field.related_model is not model}
+                 for model in models}
+    ordered = []
+    while remaining:
+        ready = sorted((model for model, parents in remaining.items() if not parents),
+                       key=lambda model: model._meta.label)
+        if not ready:
+            # A cycle; the foreign keys are only added back after the copy anyway
+            ready = sorted(remaining, key=lambda model: model._meta.label)[:1]
+        for model in ready:
+            ordered.append(model)
+            del remaining[model]
+        for parents in remaining.values():
+            parents.difference_update(ready)
+    return ordered
+
+
+def _columns(model):
+    return list(model._meta.local_concrete_fields)
+
+
+def open_source(path):
+    """A read-only connection to the SQLite file."""
+    source = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    source.execute('PRAGMA query_only = ON')
+    return source
+
+
+def check_migrations(source, using='default'):
+    """Raises MigrationError unless the SQLite file is at the target's migrations."""
+    try:
+        applied_source = set(source.execute('SELECT app, name FROM django_migrations').fetchall())
+    except sqlite3.DatabaseError as error:
+        raise MigrationError(f'Not a migrated Django SQLite database ({error}).')
+    applied_target = set(MigrationRecorder(connections[using]).applied_migrations())
+    missing = sorted(applied_target - applied_source)
+    extra = sorted(applied_source - applied_target)
+    if missing or extra:
+        details = []
+        if missing:
+            details.append('not applied to the SQLite file: ' + ', '.join(f'{app}.{name}' for app, name in missing[:10]))
+        if extra:
+            details.append('not applied to the target: ' + ', '.join(f'{app}.{name}' for app, name in extra[:10]))
+        raise MigrationError(
+            'The databases are at different migrations (' + '; '.join(details) + '). '
+            'Run `migrate` on the SQLite file with this code first.')
+
+
+def _source_tables(source):
+    return {row[0] for row in source.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def _deferred_schema(cursor, tables):
+    """
+    ([(table, name, definition)] foreign keys, [(name, definition)] plain indexes) of
+    the tables: what is dropped before the copy and created again after it.
+    """
+    cursor.execute(
+        "SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE contype = 'f' AND conrelid = ANY(%s::regclass[]) ORDER BY conrelid, conname", [tables])
+    foreign_keys = cursor.fetchall()
+    cursor.execute(
+        "SELECT indexrelid::regclass::text, pg_get_indexdef(indexrelid) FROM pg_index i "
+        "WHERE indrelid = ANY(%s::regclass[]) AND NOT EXISTS ("
+        "  SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid AND c.conrelid = i.indrelid"
+        "  AND c.contype IN ('p', 'u', 'x')) "
+        "ORDER BY indrelid, indexrelid", [tables])
+    indexes = cursor.fetchall()
+    return foreign_keys, indexes
+
+
+def _chunks(cursor, chunk_size):
+    while True:
+        chunk = cursor.fetchmany(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def copy_table(source, model, using='default', chunk_size=10000):
+    """Streams one table into the target with COPY; returns the number of rows copied."""
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = model._meta.db_table
+    fields = _columns(model)
+    columns = ', '.join(quote(field.column) for field in fields)
+    converters = [_copy_converter(field) for field in fields]
+    needs_conversion = any(converters)
+
+    rows = source.execute(f'SELECT {columns} FROM {quote(table)}')
+    copied = 0
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, 'copy'):
+            # psycopg 3
+            with raw.copy(f'COPY {quote(table)} ({columns}) FROM STDIN') as copy:
+                for chunk in _chunks(rows, chunk_size):
+                    for row in chunk:
+                        copy.write_row(_apply(converters, row) if needs_conversion else row)
+                    copied += len(chunk)
+        else:
+            # psycopg2: INSERTs, one chunk at a time. Parameters are typed, so every
+            # value SQLite stores differently is converted
+            converters = [_converter(field) for field in fields]
+            placeholders = '(' + ', '.join(['%s'] * len(fields)) + ')'
+            for chunk in _chunks(rows, chunk_size):
+                cursor.executemany(f'INSERT INTO {quote(table)} ({columns}) VALUES {placeholders}',
+                                   [_apply(converters, row) for row in chunk])
+                copied += len(chunk)
+    return copied
+
+
+def _checksum(chunks, normalizers):
+    """
+    (rows, checksum) of chunks of rows. A row's hash is Python's hash() of its
+    normalized values, so checksums are only comparable within one process.
+    """
+    count, checksum = 0, 0
+    for chunk in chunks:
+        if any(normalizers):
+            chunk = [_apply(normalizers, row) for row in chunk]
+        checksum += sum(map(hash, chunk))
+        count += len(chunk)
+    return count, checksum % CHECKSUM_MODULUS
+
+
+def source_checksum(source, model, chunk_size=10000):
+    """(rows, checksum) of a table in the SQLite file."""
+    fields = _columns(model)
+    columns = ', '.join(f'"{field.column}"' for field in fields)
+    rows = source.execute(f'SELECT {columns} FROM "{model._meta.db_table}"')
+    return _checksum(_chunks(rows, chunk_size), [_normalizer(field) for field in fields])
+
+
+def target_checksum(model, using='default', chunk_size=10000):
+    """(rows, checksum) of a table in the target, read with a server-side cursor."""
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    fields = _columns(model)
+    columns = ', '.join(quote(field.column) for field in fields)
+    with transaction.atomic(using=using):
+        connection.ensure_connection()
+        with connection.connection.cursor(name=f'verify_{model._meta.db_table}') as cursor:
+            cursor.execute(f'SELECT {columns} FROM {quote(model._meta.db_table)}')
+            return _checksum(_chunks(cursor, chunk_size), [_normalizer(field) for field in fields])
+
+
+def migrate_sqlite_to_postgres(source_path, using='default', chunk_size=10000, exclude=(), verify=True,
+                               progress=None):
+    """
+    Copies every model table of the SQLite file at `source_path` into the (migrated)
+    PostgreSQL database `using`, replacing what the copied tables (and, through
+    TRUNCATE ... CASCADE, excluded tables referencing them) held. Returns the
+    TableResults; raises MigrationError when the databases do not match.
+    `progress(message)` is called as tables are copied and verified.
+    """
+    progress = progress or (lambda message: None)
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        raise MigrationError(f'The target database "{using}" is {connection.vendor}, not PostgreSQL.')
+
+    source = open_source(source_path)
+    try:
+        check_migrations(source, using)
+        models = copied_models(using, exclude)
+        tables = _source_tables(source)
+        missing = [model._meta.db_table for model in models if model._meta.db_table not in tables]
+        if missing:
+            raise MigrationError('Tables missing from the SQLite file: ' + ', '.join(missing))
+
+        quote = connection.ops.quote_name
+        results = []
+        with transaction.atomic(using=using):
+            with connection.cursor() as cursor:
+                # Nothing is lost if the server crashes before the commit; the copy is just run again
+                cursor.execute('SET LOCAL synchronous_commit = off')
+                cursor.execute("SET LOCAL TIME ZONE 'UTC'")
+                # Also empties what `migrate` created, e.g. content types and permissions
+                cursor.execute('TRUNCATE ' + ', '.join(quote(model._meta.db_table) for model in models)
+                               + ' RESTART IDENTITY CASCADE')
+                # Index builds sort in memory up to this much
+                cursor.execute("SET LOCAL maintenance_work_mem = '256MB'")
+                foreign_keys, indexes = _deferred_schema(cursor, [model._meta.db_table for model in models])
+                for table, name, _ in foreign_keys:
+                    cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {quote(name)}')
+                for name, _ in indexes:
+                    cursor.execute(f'DROP INDEX {name}')
+            for model in models:
+                started = time.perf_counter()
+                rows = copy_table(source, model, using, chunk_size)
+                result = TableResult(model._meta.db_table, rows, time.perf_counter() - started)
+                results.append(result)
+                progress(f'{result.table}: {rows} rows in {result.seconds:.1f} s')
+            with connection.cursor() as cursor:
+                started = time.perf_counter()
+                for _, definition in indexes:
+                    cursor.execute(definition)
+                progress(f'{len(indexes)} indexes created in {time.perf_counter() - started:.1f} s')
+                started = time.perf_counter()
+                for table, name, definition in foreign_keys:
+                    cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {quote(name)} {definition}')
+                progress(f'{len(foreign_keys)} foreign keys checked in {time.perf_counter() - started:.1f} s')
+                for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                    cursor.execute(sql)
+
+        with connection.cursor() as cursor:
+            for model in models:
+                cursor.execute(f'ANALYZE {quote(model._meta.db_table)}')
+
+        if verify:
+            for model, result in zip(models, results):
+                result.source_count, result.source_checksum = source_checksum(source, model, chunk_size)
+                result.target_count, result.target_checksum = target_checksum(model, using, chunk_size)
+                progress(f'{result.table}: {"verified" if result.verified else "MISMATCH"}')
+        return results
+    finally:
+        source.close()
@@ -0,0 +1,35 @@
+# apps/common/sqlite_tuned/base.py
+# SQLite backend para sa SQLite performance profile (apps/common/sqlite_tuning.py).
+#
+# The stock SQLite backend plus what the connection_created pragmas cannot do:
+#
+#   - `PRAGMA optimize` before a connection closes (SQLITE_OPTIMIZE_ON_CLOSE). SQLite
+#     then re-analyzes the tables whose statistics the closing connection's queries
+#     showed to be stale; usually it does nothing and costs well under a millisecond.
+#   - BEGIN IMMEDIATE instead of BEGIN for atomic() blocks (SQLITE_IMMEDIATE_TRANSACTIONS).
+#     A deferred transaction that reads and then writes cannot wait for the write lock
+#     (SQLite would deadlock), so it fails with "database is locked" at once; taking the
+#     lock at BEGIN lets busy_timeout do its job.
+#
+# settings.py sets 'ENGINE': 'apps.common.sqlite_tuned' when SQLITE_TUNING is on.
+
+from django.db.backends.sqlite3 import base
+
+from apps.common import sqlite_tuning  # Registers the connection_created pragmas
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def _start_transaction_under_autocommit(self):
+        if sqlite_tuning.immediate_transactions():
+            self.cursor().execute('BEGIN IMMEDIATE')
+        else:
+            super()._start_transaction_under_autocommit()
+
+    def _close(self):
+        if self.connection is not None and sqlite_tuning.optimize_on_close():
+            try:
+                self.connection.execute('PRAGMA optimize')
+            except base.Database.Error:
+                pass  # e.g. locked by a writer; the next connection to close tries again
+        super()._close()
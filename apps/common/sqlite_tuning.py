@@ -0,0 +1,79 @@
+# apps/common/sqlite_tuning.py
+# SQLite performance profile: mga PRAGMA sa matag bag-ong SQLite connection.
+#
+# With Django's defaults SQLite uses a rollback journal: a writer locks out every reader
+# while it commits, and a transaction that read first and then writes can fail at once
+# with "database is locked" when another connection is writing, whatever the timeout.
+# Cashiers saving payments while dashboards load hit exactly that. With SQLITE_TUNING
+# on, every new connection gets
+#
+#   journal_mode = WAL          readers and the one writer no longer block each other
+#                               (stored in the database file: it stays WAL once set)
+#   synchronous = NORMAL        no fsync per commit in WAL mode, only at checkpoints; a
+#                               power cut can lose the last commits, never corrupt the file
+#   mmap_size = SQLITE_MMAP_SIZE              reads go through the OS page cache
+#   cache_size = -SQLITE_CACHE_SIZE_KB        the connection's own page cache
+#   busy_timeout = SQLITE_BUSY_TIMEOUT_MS     how long a writer waits for the lock
+#   temp_store = MEMORY         temporary sorts and indexes stay out of temp files
+#
+# from the connection_created handler below. The tuned backend (apps/common/sqlite_tuned,
+# set as the ENGINE by settings.py when SQLITE_TUNING is on) adds what a signal cannot:
+# `PRAGMA optimize` when a connection closes, and BEGIN IMMEDIATE for atomic() blocks, so
+# a transaction takes the write lock when it starts (waiting up to busy_timeout) instead
+# of failing when it first writes.
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def tuning_enabled():
+    return _setting('SQLITE_TUNING', False)
+
+
+def immediate_transactions():
+    return tuning_enabled() and _setting('SQLITE_IMMEDIATE_TRANSACTIONS', True)
+
+
+def optimize_on_close():
+    return tuning_enabled() and _setting('SQLITE_OPTIMIZE_ON_CLOSE', True)
+
+
+def pragmas():
+    """The (pragma, value) pairs applied to every new connection."""
+    return [
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('mmap_size', int(_setting('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))),
+        # A negative cache_size is in KiB rather than pages
+        ('cache_size', -int(_setting('SQLITE_CACHE_SIZE_KB', 64 * 1024))),
+        ('busy_timeout', int(_setting('SQLITE_BUSY_TIMEOUT_MS', 5000))),
+        ('temp_store', 'MEMORY'),
+    ]
+
+
+def apply_pragmas(connection):
+    """Applies pragmas() to an open SQLite DatabaseWrapper."""
+    with connection.cursor() as cursor:
+        for name, value in pragmas():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def current_pragmas(connection):
+    """{pragma: value} as the connection has them now (for checks and the benchmark)."""
+    values = {}
+    with connection.cursor() as cursor:
+        for name, _ in pragmas():
+            cursor.execute(f'PRAGMA {name}')
+            values[name] = cursor.fetchone()[0]
+    return values
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite' and tuning_enabled():
+        apply_pragmas(connection)
@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import ContributionType
+
+@admin.register(ContributionType)
+class ContributionTypeAdmin(admin.ModelAdmin):
+    list_display = ('name', 'billing_period', 'amount_per_period', 'billing_start', 'updated_at')
+    list_filter = ('billing_period',)
+    search_fields = ('name',)
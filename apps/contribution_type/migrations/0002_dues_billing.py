@@ -0,0 +1,28 @@
+# Generated by Django 4.2.23 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contribution_type', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contributiontype',
+            name='amount_per_period',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Amount each member owes per billing period', max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='contributiontype',
+            name='billing_period',
+            field=models.CharField(blank=True, choices=[('', 'Not billed (one-time or voluntary)'), ('MONTHLY', 'Monthly'), ('QUARTERLY', 'Quarterly'), ('SEMI_ANNUAL', 'Semi-annual'), ('ANNUAL', 'Annual')], default='', help_text='How often members owe this contribution', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='contributiontype',
+            name='billing_start',
+            field=models.DateField(blank=True, help_text="First billed period (default: each member's date added)", null=True),
+        ),
+    ]
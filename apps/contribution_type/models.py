@@ -5,11 +5,39 @@ from django.db import models
 class ContributionType(models.Model):
     """
     Model to define different types of contributions (e.g., Monthly Dues, Special Offering).
+    Types with a billing period are dues: every billed member owes `amount_per_period`
+    each period from `billing_start` (see apps/report/dues.py for arrears).
     """
+    BILLING_NONE = ''
+    BILLING_MONTHLY = 'MONTHLY'
+    BILLING_QUARTERLY = 'QUARTERLY'
+    BILLING_SEMI_ANNUAL = 'SEMI_ANNUAL'
+    BILLING_ANNUAL = 'ANNUAL'
+    BILLING_PERIOD_CHOICES = [
+        (BILLING_NONE, 'Not billed (one-time or voluntary)'),
+        (BILLING_MONTHLY, 'Monthly'),
+        (BILLING_QUARTERLY, 'Quarterly'),
+        (BILLING_SEMI_ANNUAL, 'Semi-annual'),
+        (BILLING_ANNUAL, 'Annual'),
+    ]
+    # Length of each billing period in months
+    PERIOD_MONTHS = {
+        BILLING_MONTHLY: 1,
+        BILLING_QUARTERLY: 3,
+        BILLING_SEMI_ANNUAL: 6,
+        BILLING_ANNUAL: 12,
+    }
+
     name = models.CharField(max_length=100, unique=True,
                             help_text="Name of the contribution type (e.g., 'Monthly Dues')")
     description = models.TextField(blank=True, null=True,
                                    help_text="Detailed description of this contribution type")
+    billing_period = models.CharField(max_length=12, choices=BILLING_PERIOD_CHOICES, blank=True,
+                                      default=BILLING_NONE, help_text="How often members owe this contribution")
+    amount_per_period = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True,
+                                            help_text="Amount each member owes per billing period")
+    billing_start = models.DateField(null=True, blank=True,
+                                     help_text="First billed period (default: each member's date added)")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -20,3 +48,11 @@ class ContributionType(models.Model):
 
     def __str__(self):
         return self.name
+
+    @property
+    def is_billed(self):
+        return bool(self.billing_period and self.amount_per_period)
+
+    @property
+    def period_months(self):
+        return self.PERIOD_MONTHS.get(self.billing_period)
@@ -1,6 +1,14 @@
+# apps/family/apps.py
+
 from django.apps import AppConfig
 
 
 class FamilyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.family'
+
+    def ready(self):
+        """
+        Import signals here so the Family/Church member counters are kept up to date.
+        """
+        import apps.family.signals  # triggers signal registration
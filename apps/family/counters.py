@@ -0,0 +1,143 @@
+# apps/family/counters.py
+# Denormalized member counters sa Family ug Church (member_count, active_member_count,
+# deceased_member_count, ug Church.family_count), para ang lists ug detail pages
+# mobasa ra sa column imbes mag-COUNT kada page load.
+#
+# Every change is applied as one UPDATE with F() expressions (count = count + delta),
+# so concurrent saves never lose increments. A family's church counters are updated in
+# the same statement style through a subquery on the family's church. Decrements never
+# go below 0, so a counter that drifted low only stays wrong until the next reconcile.
+#
+# The signal handlers in apps/family/signals.py call these helpers. QuerySet.update()
+# and bulk_create() send no signals: after bulk changes run
+# `python manage.py reconcile_counters`, which recounts everything from the live rows.
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Subquery
+from django.db.models.functions import Greatest
+
+from apps.church.models import Church
+from apps.individual.models import Individual
+
+from .models import Family
+
+MEMBER_COUNTERS = ('member_count', 'active_member_count', 'deceased_member_count')
+
+ACTIVE = Q(is_active_member=True, is_alive=True)
+DECEASED = Q(is_alive=False)
+
+
+def individual_state(individual):
+    """(family_id, {counter: 0/1}) of one Individual, or None."""
+    if individual is None:
+        return None
+    return individual.family_id, {
+        'member_count': 1,
+        'active_member_count': int(bool(individual.is_active_member and individual.is_alive)),
+        'deceased_member_count': int(not individual.is_alive),
+    }
+
+
+def stored_individual_state(pk):
+    individual = Individual.objects.filter(pk=pk).only('family_id', 'is_active_member', 'is_alive').first()
+    return individual_state(individual)
+
+
+def _apply(model, queryset_filter, deltas):
+    # Decrements stop at 0: a counter that drifted (bulk_create, raw SQL) must not make
+    # the user's delete or move fail on the PositiveIntegerField check
+    changes = {
+        name: F(name) + delta if delta > 0 else Greatest(F(name) + delta, 0)
+        for name, delta in deltas.items() if delta
+    }
+    if changes:
+        model.objects.filter(**queryset_filter).update(**changes)
+
+
+def _add_to_family(family_id, deltas):
+    _apply(Family, {'pk': family_id}, deltas)
+    _apply(Church, {'pk': Subquery(Family.objects.filter(pk=family_id).values('church_id'))}, deltas)
+
+
+def apply_individual_change(previous, current):
+    """Moves one member's contribution from its previous state to its current one."""
+    deltas_by_family = {}
+    for state, sign in ((previous, -1), (current, 1)):
+        if state is None or state[0] is None:
+            continue
+        family_deltas = deltas_by_family.setdefault(state[0], dict.fromkeys(MEMBER_COUNTERS, 0))
+        for name, value in state[1].items():
+            family_deltas[name] += sign * value
+    with transaction.atomic():
+        for family_id, deltas in deltas_by_family.items():
+            _add_to_family(family_id, deltas)
+
+
+def stored_family_counters(pk):
+    return Family.objects.filter(pk=pk).values('church_id', *MEMBER_COUNTERS).first()
+
+
+def apply_family_church_change(counters, old_church_id, new_church_id):
+    """A family (with its stored `counters`) moved between churches, or was added/removed."""
+    if old_church_id == new_church_id:
+        return
+    with transaction.atomic():
+        for church_id, sign in ((old_church_id, -1), (new_church_id, 1)):
+            if church_id is None:
+                continue
+            deltas = {name: sign * counters.get(name, 0) for name in MEMBER_COUNTERS}
+            deltas['family_count'] = sign
+            _apply(Church, {'pk': church_id}, deltas)
+
+
+# --- Reconciliation ---
+
+def _live_family_counters():
+    return {
+        row['family_id']: (row['member_count'], row['active_member_count'], row['deceased_member_count'])
+        for row in Individual.objects.filter(family__isnull=False).values('family_id').annotate(
+            member_count=Count('id'),
+            active_member_count=Count('id', filter=ACTIVE),
+            deceased_member_count=Count('id', filter=DECEASED),
+        ).order_by()
+    }
+
+
+def _live_church_counters():
+    live = {
+        row['church_id']: [row['family_count'], 0, 0, 0]
+        for row in Family.objects.filter(church__isnull=False).values('church_id').annotate(
+            family_count=Count('id')).order_by()
+    }
+    for row in Individual.objects.filter(family__church__isnull=False).values('family__church_id').annotate(
+            member_count=Count('id'),
+            active_member_count=Count('id', filter=ACTIVE),
+            deceased_member_count=Count('id', filter=DECEASED)).order_by():
+        counters = live.setdefault(row['family__church_id'], [0, 0, 0, 0])
+        counters[1:] = [row['member_count'], row['active_member_count'], row['deceased_member_count']]
+    return {church_id: tuple(counters) for church_id, counters in live.items()}
+
+
+def _reconcile(model, fields, live, fix, batch_size):
+    mismatches = []
+    wrong = []
+    for row in model.objects.values_list('pk', *fields).iterator(chunk_size=batch_size):
+        pk, stored = row[0], tuple(row[1:])
+        expected = live.get(pk, (0,) * len(fields))
+        if stored != expected:
+            mismatches.append((model.__name__, pk, stored, expected))
+            wrong.append(model(pk=pk, **dict(zip(fields, expected))))
+    if fix and wrong:
+        with transaction.atomic():
+            model.objects.bulk_update(wrong, fields, batch_size=batch_size)
+    return mismatches
+
+
+def reconcile_counters(fix=True, batch_size=1000):
+    """
+    Recounts every Family and Church from the live rows. Returns the mismatches found
+    as (model name, pk, stored, live) tuples; with fix=True they are also corrected.
+    """
+    mismatches = _reconcile(Family, MEMBER_COUNTERS, _live_family_counters(), fix, batch_size)
+    mismatches += _reconcile(Church, Church.COUNTER_FIELDS, _live_church_counters(), fix, batch_size)
+    return mismatches
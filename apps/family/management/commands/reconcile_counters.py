@@ -0,0 +1,33 @@
+# apps/family/management/commands/reconcile_counters.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.family.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = ('Recounts the member counters of every Family and Church from the live rows and fixes '
+            'the ones that drifted (e.g. after QuerySet.update() or bulk_create()).')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check-only', action='store_true',
+            help='Do not fix anything; only report the counters that do not match.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of rows to read and fix per batch (default: 1000).')
+
+    def handle(self, *args, **options):
+        fix = not options['check_only']
+        mismatches = reconcile_counters(fix=fix, batch_size=options['batch_size'])
+        for model_name, pk, stored, live in mismatches[:50]:
+            self.stderr.write(f'  {model_name} {pk}: stored={stored} live={live}')
+        if len(mismatches) > 50:
+            self.stderr.write(f'  ... and {len(mismatches) - 50} more')
+
+        if mismatches and not fix:
+            raise CommandError(f'{len(mismatches)} counter row(s) do not match the live counts.')
+        if mismatches:
+            self.stdout.write(self.style.SUCCESS(f'Fixed {len(mismatches)} counter row(s).'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All Family and Church counters match the live counts.'))
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.23 on 2026-10-18 08:46
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+ACTIVE = Q(is_active_member=True, is_alive=True)
+DECEASED = Q(is_alive=False)
+
+
+def _count(queryset, group_by, condition=None):
+    counted = queryset.values(group_by).annotate(
+        total=Count('id', filter=condition) if condition is not None else Count('id')).values('total')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def fill_counters(apps, schema_editor):
+    Church = apps.get_model('church', 'Church')
+    Family = apps.get_model('family', 'Family')
+    Individual = apps.get_model('individual', 'Individual')
+
+    members = Individual.objects.filter(family=OuterRef('pk')).order_by()
+    Family.objects.update(
+        member_count=_count(members, 'family'),
+        active_member_count=_count(members, 'family', ACTIVE),
+        deceased_member_count=_count(members, 'family', DECEASED),
+    )
+    church_members = Individual.objects.filter(family__church=OuterRef('pk')).order_by()
+    Church.objects.update(
+        family_count=_count(Family.objects.filter(church=OuterRef('pk')).order_by(), 'church'),
+        member_count=_count(church_members, 'family__church'),
+        active_member_count=_count(church_members, 'family__church', ACTIVE),
+        deceased_member_count=_count(church_members, 'family__church', DECEASED),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('family', '0003_remove_family_description_family_head_of_family_and_more'),
+        ('church', '0002_member_counters'),
+        ('individual', '0003_individualsearchdocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='family',
+            name='active_member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='family',
+            name='deceased_member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='family',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-18 09:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('family', '0004_member_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='family',
+            index=models.Index(fields=['family_name', 'id'], name='family_name_keyset_idx'),
+        ),
+    ]
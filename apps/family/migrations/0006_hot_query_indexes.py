@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-18 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('family', '0005_name_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='family',
+            index=models.Index(fields=['church', 'family_name', 'id'], name='family_church_name_idx'),
+        ),
+    ]
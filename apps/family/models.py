@@ -30,16 +30,40 @@ class Family(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Member counters, maintained by apps/family/signals.py (see apps/family/counters.py).
+    # Never written by save(): they only change through F() updates.
+    member_count = models.PositiveIntegerField(default=0, editable=False)
+    active_member_count = models.PositiveIntegerField(default=0, editable=False)  # Active and alive
+    deceased_member_count = models.PositiveIntegerField(default=0, editable=False)
+
+    COUNTER_FIELDS = ('member_count', 'active_member_count', 'deceased_member_count')
+
     class Meta:
         verbose_name = "Family"
         verbose_name_plural = "Families"
         # FIXED: Changed ordering to 'family_name'
         ordering = ['family_name']
+        indexes = [
+            # Keyset pages of the family lists (apps/common/pagination.py) seek on this order
+            models.Index(fields=['family_name', 'id'], name='family_name_keyset_idx'),
+            # The same within one church (families of a church), proposed by advise_indexes
+            models.Index(fields=['church', 'family_name', 'id'], name='family_church_name_idx'),
+        ]
 
     def __str__(self):
         # FIXED: Changed from self.name to self.family_name
         return self.family_name
 
+    def save(self, *args, **kwargs):
+        # Leave the counters out of the UPDATE, so a form save never overwrites them
+        # with the (possibly stale) values loaded into this instance
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
 class FamilyMember(models.Model):
     RELATIONSHIP_CHOICES = [
         ('HEAD', 'Head of Household'),
@@ -0,0 +1,72 @@
+# apps/family/signals.py
+# Signal handlers nga mo-maintain sa member counters sa Family ug Church
+# (apps/family/counters.py) when an Individual is saved/deleted or moves family,
+# and when a Family is added, deleted or moves church.
+# NOTE: QuerySet.update()/bulk_create() do not send signals. After bulk changes,
+# run `python manage.py reconcile_counters`.
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.individual.models import Individual
+
+from . import counters
+from .models import Family
+
+
+# --- Individual ---
+
+@receiver(pre_save, sender=Individual)
+def remember_counter_state_before_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._counter_previous = counters.stored_individual_state(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=Individual)
+def update_counters_on_individual_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    counters.apply_individual_change(
+        getattr(instance, '_counter_previous', None), counters.individual_state(instance))
+
+
+@receiver(pre_delete, sender=Individual)
+def remember_counter_state_before_delete(sender, instance, **kwargs):
+    instance._counter_previous = counters.stored_individual_state(instance.pk)
+
+
+@receiver(post_delete, sender=Individual)
+def update_counters_on_individual_delete(sender, instance, **kwargs):
+    counters.apply_individual_change(getattr(instance, '_counter_previous', None), None)
+
+
+# --- Family ---
+
+@receiver(pre_save, sender=Family)
+def remember_family_counters_before_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._counter_previous = counters.stored_family_counters(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=Family)
+def update_church_counters_on_family_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_counter_previous', None)
+    counters.apply_family_church_change(
+        previous or {}, previous['church_id'] if previous else None, instance.church_id)
+
+
+@receiver(pre_delete, sender=Family)
+def remember_family_counters_before_delete(sender, instance, **kwargs):
+    instance._counter_previous = counters.stored_family_counters(instance.pk)
+
+
+@receiver(post_delete, sender=Family)
+def update_church_counters_on_family_delete(sender, instance, **kwargs):
+    # The members' family is set to NULL without signals; they simply stop being counted
+    previous = getattr(instance, '_counter_previous', None)
+    if previous:
+        counters.apply_family_church_change(previous, previous['church_id'], None)
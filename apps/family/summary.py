@@ -0,0 +1,103 @@
+# apps/family/summary.py
+# Financial summary sa usa o daghang Family: member stats ug payment totals, with a
+# fixed number of queries no matter how many families or members:
+#
+#   member_stats()    one query: conditional COUNTs over Individual grouped by family
+#   payment_totals()  one query: a range scan of the payment ledger (apps/payment/
+#                     ledger.py) on (family, date_paid), summing the direct payments
+#                     (payer is a member) and the allocations to members
+#
+# Only counted payments (apps/report/rollups.COUNTED_PAYMENT_STATUSES) are included,
+# the same rule as the dashboard. Used by FamilyDetailView, the family summary JSON
+# API and the dashboard's top families table.
+
+from decimal import Decimal
+
+from django.db.models import Count, Q
+
+from apps.individual.models import Individual
+from apps.payment import ledger
+from apps.payment.models import Payment, PaymentCoveredMember
+from apps.report.rollups import COUNTED_PAYMENT_STATUSES
+
+ZERO = Decimal('0.00')
+
+EMPTY_SUMMARY = {
+    'total_members': 0,
+    'active_members': 0,
+    'deceased_members': 0,
+    'payments_made': 0,
+    'paid_total': ZERO,
+    'allocations': 0,
+    'allocated_total': ZERO,
+}
+
+
+def _decimal(value):
+    # SQLite returns SUM() of decimal columns as a float
+    if value is None:
+        return ZERO
+    return Decimal(str(value)).quantize(ZERO)
+
+
+def member_stats(family_ids):
+    """{family_id: {'total_members', 'active_members', 'deceased_members'}} in one query."""
+    return {
+        row.pop('family_id'): row
+        for row in Individual.objects.filter(family_id__in=family_ids).values('family_id').annotate(
+            total_members=Count('id'),
+            active_members=Count('id', filter=Q(is_active_member=True, is_alive=True)),
+            deceased_members=Count('id', filter=Q(is_alive=False)),
+        ).order_by()
+    }
+
+
+def payment_totals(family_ids):
+    """
+    {family_id: {'payments_made', 'paid_total', 'allocations', 'allocated_total'}} in
+    one grouped query over the live payment ledger entries of the families.
+    """
+    return {
+        family_id: {
+            'payments_made': row['payments_made'],
+            'paid_total': _decimal(row['paid_total']),
+            'allocations': row['allocations'],
+            'allocated_total': _decimal(row['allocated_total']),
+        }
+        for family_id, row in ledger.totals_by(
+            'family_id', COUNTED_PAYMENT_STATUSES, family_id__in=family_ids).items()
+    }
+
+
+def family_summaries(family_ids):
+    """{family_id: summary} for many families, in two queries."""
+    family_ids = list(family_ids)
+    if not family_ids:
+        return {}
+    stats = member_stats(family_ids)
+    totals = payment_totals(family_ids)
+    return {
+        family_id: {**EMPTY_SUMMARY, **stats.get(family_id, {}), **totals.get(family_id, {})}
+        for family_id in family_ids
+    }
+
+
+def family_summary(family_id):
+    return family_summaries([family_id])[family_id]
+
+
+def recent_family_payments(family_id, limit=10):
+    """Latest payments made by a member of the family or covering one of them."""
+    # Two id lists, each read through an index, OR-ed on the primary key: an OR across the
+    # individual join instead scans every payment
+    made = Payment.objects.filter(individual__family_id=family_id).values('pk')
+    covering = PaymentCoveredMember.objects.filter(individual__family_id=family_id).values('payment_id')
+    return (
+        Payment.objects.filter(Q(pk__in=made) | Q(pk__in=covering))
+        .select_related('individual').order_by('-date_paid', '-id')[:limit]
+    )
+
+
+def summary_json(summary):
+    """The summary with amounts as strings, for JsonResponse."""
+    return {key: str(value) if isinstance(value, Decimal) else value for key, value in summary.items()}
@@ -9,6 +9,8 @@ urlpatterns = [
     path('', views.FamilyListView.as_view(), name='family_list'),
     # Family Detail
     path('<int:pk>/', views.FamilyDetailView.as_view(), name='family_detail'),
+    # Family member stats and payment totals as JSON (apps/family/summary.py)
+    path('<int:pk>/summary/', views.FamilySummaryAPIView.as_view(), name='family_summary_api'),
     # Family Create (General)
     path('create/', views.FamilyCreateView.as_view(), name='family_create'),
     # Family Create (In Church Context)
@@ -1,5 +1,7 @@
 # apps/family/views.py
+from django.views import View
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
+from django.http import JsonResponse
 from django.urls import reverse_lazy
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
@@ -12,24 +14,27 @@ from apps.church.models import Church
 from apps.individual.models import Individual
 from apps.payment.models import Payment
 from .forms import FamilyForm
+from .summary import family_summary, recent_family_payments, summary_json
+from apps.common.pagination import KeysetPaginationMixin
+from apps.common.replica import ReplicaReadMixin
 from django.db.models.functions import Coalesce
 from apps.payment.models import PaymentCoveredMember
 
 
-class FamilyListView(LoginRequiredMixin, ListView):
+class FamilyListView(LoginRequiredMixin, ReplicaReadMixin, KeysetPaginationMixin, ListView):
     model = Family
     template_name = 'family/family_list.html'
     context_object_name = 'families'
     paginate_by = 10
+    keyset_ordering = ('family_name', 'id')
+    query_budget = 15  # Checked by apps/common/instrumentation.py
 
     def get_queryset(self):
         queryset = super().get_queryset()
 
-        # Prefetch 'head_of_family' and 'members' for efficient access
-        # 'members' is the related_name from Individual to Family
-        queryset = queryset.prefetch_related('head_of_family', 'members').annotate(
-            individual_count=Count('members')
-        )
+        # Church and head of family are shown on every row: join them instead of one
+        # query per family. The member count is the Family.member_count column.
+        queryset = queryset.select_related('church', 'head_of_family')
 
         search_query = self.request.GET.get('search')
         if search_query:
@@ -61,63 +66,43 @@ class FamilyDetailView(LoginRequiredMixin, DetailView):
     model = Family
     template_name = 'family/family_detail.html'
     context_object_name = 'family'
+    query_budget = 15  # Checked by apps/common/instrumentation.py
 
     def get_queryset(self):
-        # Pre-fetch 'head_of_family' and 'members' for efficient access
-        return super().get_queryset().prefetch_related('head_of_family', 'members')
+        return super().get_queryset().select_related('church', 'head_of_family')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        family = self.get_object()
+        family = self.object
+
+        # Member stats and payment totals (apps/family/summary.py), two queries in all
+        summary = family_summary(family.pk)
+        context['family_summary'] = summary
+        context['total_members_count'] = summary['total_members']
+        context['active_members_count'] = summary['active_members']
+        context['deceased_members_count'] = summary['deceased_members']
+        # Counted payments made by members of this family
+        context['total_family_contributions'] = summary['paid_total']
+        # Amounts allocated to members of this family (by any payer)
+        context['total_allocated_to_family_members'] = summary['allocated_total']
+        context['total_allocated_payer_contributions'] = summary['allocated_total']
 
-        # All individuals connected to this family
-        all_individuals = family.members.all()
-
-        # Get a list of all individual IDs that belong to this family
-        # This is the crucial part to fix the ValueError
-        family_individual_ids = all_individuals.values_list('id', flat=True)
-
-        context['total_members_count'] = all_individuals.count()
-        context['active_members_count'] = all_individuals.filter(
-            is_active_member=True, is_alive=True).count()
-        context['deceased_members_count'] = all_individuals.filter(
-            is_alive=False).count()
-
-        # Get the Head of Family directly from the 'head_of_family' field on the Family instance
         context['family_head'] = family.head_of_family
+        context['family_payments'] = recent_family_payments(family.pk)
+        context['all_individuals'] = family.members.all()
+        return context
 
-        # Retrieve recent payments where an individual of this family is the primary payer (Payment.individual)
-        # Or where any CoveredMember from this family is listed.
-        # Modified filter to use `individual__id__in` for correctness
-        context['family_payments'] = Payment.objects.filter(
-            Q(individual__id__in=family_individual_ids) |
-            Q(covered_members__id__in=family_individual_ids)
-        ).distinct().order_by('-date_paid')[:10]
-
-        # Calculate total contributions made by members of this family
-        # Modified filter to use `individual__id__in` for correctness
-        context['total_family_contributions'] = Payment.objects.filter(
-            Q(individual__id__in=family_individual_ids) |
-            Q(covered_members__id__in=family_individual_ids)
-        ).distinct().aggregate(  # Use distinct() to prevent double counting payments
-            total_sum=Coalesce(Sum('amount'), Decimal(
-                '0.00'), output_field=DecimalField())
-        )['total_sum']
-
-        # Calculate the total amount specifically *allocated* to members of this family
-        # Modified filter to use `individual__id__in` for correctness
-        total_allocated_to_family_members = PaymentCoveredMember.objects.filter(
-            individual__id__in=family_individual_ids
-        ).aggregate(
-            total_sum=Coalesce(Sum('amount_covered'), Decimal(
-                '0.00'), output_field=DecimalField())  # Use 'amount_covered'
-        )['total_sum']
-        context['total_allocated_to_family_members'] = total_allocated_to_family_members
-
-        # Pass all individuals to the context for use in the template
-        context['all_individuals'] = all_individuals
 
-        return context
+class FamilySummaryAPIView(LoginRequiredMixin, ReplicaReadMixin, View):
+    """JSON member stats and payment totals of one family (apps/family/summary.py)."""
+
+    def get(self, request, pk):
+        family = get_object_or_404(Family.objects.only('id', 'family_name'), pk=pk)
+        return JsonResponse({
+            'id': family.id,
+            'family_name': family.family_name,
+            **summary_json(family_summary(family.pk)),
+        })
 
 
 class FamilyCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
@@ -252,19 +237,18 @@ class FamilyDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         return super().form_valid(form)
 
 
-class FamilyListInChurchView(LoginRequiredMixin, ListView):
+class FamilyListInChurchView(LoginRequiredMixin, ReplicaReadMixin, KeysetPaginationMixin, ListView):
     model = Family
     template_name = 'family/family_list.html'
     context_object_name = 'families'
     paginate_by = 10
+    keyset_ordering = ('family_name', 'id')
 
     def get_queryset(self):
         church_id = self.kwargs.get('church_id')
         church = get_object_or_404(Church, pk=church_id)
 
-        # Prefetch 'head_of_family' and 'members' for efficient access
-        queryset = Family.objects.filter(church=church).prefetch_related('head_of_family', 'members').annotate(
-            individual_count=Count('members'))
+        queryset = Family.objects.filter(church=church).select_related('church', 'head_of_family')
 
         search_query = self.request.GET.get('search')
         if search_query:
@@ -1,11 +1,21 @@
 # apps/individual/admin.py
 
-from django.contrib import admin
+import io
+
+from django.contrib import admin, messages
+from django.http import HttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from .forms import MemberImportUploadForm
+from .importer import MemberImporter, MemberImportError, read_rows
 from .models import Individual
 
 
 @admin.register(Individual)
 class IndividualAdmin(admin.ModelAdmin):
+    change_list_template = 'admin/individual/individual/change_list.html'
     list_display = (
         'id',
         'membership_id',  # Changed from 'code' to 'membership_id'
@@ -75,3 +85,51 @@ class IndividualAdmin(admin.ModelAdmin):
 
     # Optional: If you want to make date_added read-only in admin
     readonly_fields = ('date_added',)
+
+    # --- Bulk Import (CSV/XLSX) ---
+
+    def get_urls(self):
+        urls = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='individual_individual_import'),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect('admin:individual_individual_changelist')
+
+        importer = None
+        form = MemberImportUploadForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            uploaded = form.cleaned_data['file']
+            download_errors = 'download_errors' in request.POST
+            importer = MemberImporter(
+                batch_size=form.cleaned_data['batch_size'],
+                dry_run=form.cleaned_data['dry_run'] or download_errors,  # The report button never saves
+                create_missing_families=form.cleaned_data['create_missing_families'],
+            )
+            try:
+                importer.run(read_rows(uploaded, uploaded.name))
+            except MemberImportError as e:
+                form.add_error('file', str(e))
+                importer = None
+
+            if importer is not None and download_errors and importer.errors:
+                report = io.StringIO()
+                importer.write_error_report(report)
+                response = HttpResponse(report.getvalue(), content_type='text/csv')
+                response['Content-Disposition'] = 'attachment; filename="member_import_errors.csv"'
+                return response
+
+            if importer is not None and not importer.dry_run and importer.created:
+                messages.success(request, f"Imported {importer.created} member(s).")
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import members',
+            'form': form,
+            'importer': importer,
+            'errors_shown': importer.errors[:200] if importer else [],
+        }
+        return TemplateResponse(request, 'admin/individual/individual/import.html', context)
@@ -0,0 +1,14 @@
+# apps/individual/apps.py
+
+from django.apps import AppConfig
+
+
+class IndividualConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.individual'
+
+    def ready(self):
+        """
+        Import signals here so the member search index is kept up to date.
+        """
+        import apps.individual.signals  # triggers signal registration
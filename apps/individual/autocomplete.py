@@ -0,0 +1,251 @@
+# apps/individual/autocomplete.py
+# In-process prefix index para sa head-of-family autocomplete (IndividualSearchAPIView).
+#
+# Every worker keeps a sorted list of (key, individual id) in memory. The keys are the
+# normalized full name starting at each word ("juan dela cruz", "dela cruz", "cruz") plus
+# the membership ID, so typing the start of any name part finds the member with a bisect
+# instead of a query. The list only answers "which IDs"; the response itself is built
+# with one values_list() query for those IDs, so names shown are always current and
+# deleted members simply drop out.
+#
+# Keeping workers in sync: update_search_documents() (apps/individual/search.py) and the
+# Individual delete signal bump a version counter in the shared cache. A worker that sees
+# a version different from its own re-reads only the search documents changed since its
+# last sync (IndividualSearchDocument.updated_at) before answering. A bump can get lost
+# (a per-process cache, an evicted key, a write that skipped the signals), so a worker
+# also re-reads the changed documents once AUTOCOMPLETE_RESYNC_SECONDS have passed since
+# its last sync, whatever the version says. The index is loaded on first use, not at
+# import time, so management commands never pay for it.
+
+import bisect
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Individual, IndividualSearchDocument
+from .search import normalize
+
+VERSION_KEY = 'autocomplete:individual:version'
+NAME_FIELDS = ('given_name', 'middle_name', 'surname', 'suffix_name')
+
+# How far back a delta sync looks before the last sync time (covers clock skew between
+# the app servers and transactions that committed just after the previous sync)
+SYNC_OVERLAP = timedelta(seconds=5)
+
+# Upper bound of index entries looked at per query when extra terms must be checked
+MAX_SCANNED_KEYS = 5000
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _cache():
+    return caches[_setting('AUTOCOMPLETE_CACHE_ALIAS', 'default')]
+
+
+def display_name(given_name, middle_name, surname, suffix_name):
+    """Same text as Individual.full_name, from plain values."""
+    return " ".join(part for part in (given_name, middle_name, surname, suffix_name) if part).strip()
+
+
+def index_keys(given_name, middle_name, surname, suffix_name, membership_id):
+    name = normalize(display_name(given_name, middle_name, surname, suffix_name))
+    words = name.split()
+    keys = {' '.join(words[start:]) for start in range(len(words))}
+    if membership_id:
+        keys.add(normalize(membership_id))
+    return name, keys
+
+
+class PrefixIndex:
+    """
+    Sorted (key, id) list plus the normalized name of every member (used to check the
+    other terms of a multi-word query). Thread safe; one instance per process.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = []
+        self._keys_by_id = {}
+        self._names = {}
+        self.loaded = False
+        self.version = None
+        self.synced_at = None
+
+    def __len__(self):
+        return len(self._names)
+
+    def _remove(self, individual_id):
+        for key in self._keys_by_id.pop(individual_id, ()):
+            position = bisect.bisect_left(self._entries, (key, individual_id))
+            if position < len(self._entries) and self._entries[position] == (key, individual_id):
+                del self._entries[position]
+        self._names.pop(individual_id, None)
+
+    def _add(self, individual_id, values):
+        name, keys = index_keys(*values)
+        self._names[individual_id] = name
+        self._keys_by_id[individual_id] = keys
+        for key in keys:
+            bisect.insort(self._entries, (key, individual_id))
+
+    def _rows(self, queryset):
+        return queryset.values_list('pk', *NAME_FIELDS, 'membership_id').iterator(chunk_size=5000)
+
+    def load(self):
+        """(Re)loads the whole index from the Individual table."""
+        version = _cache().get(VERSION_KEY, 0)
+        synced_at = timezone.now()
+        entries, keys_by_id, names = [], {}, {}
+        for individual_id, *values in self._rows(Individual.objects.all()):
+            name, keys = index_keys(*values)
+            names[individual_id] = name
+            keys_by_id[individual_id] = keys
+            entries.extend((key, individual_id) for key in keys)
+        entries.sort()
+        with self._lock:
+            self._entries, self._keys_by_id, self._names = entries, keys_by_id, names
+            self.version, self.synced_at, self.loaded = version, synced_at, True
+
+    def _due(self, version):
+        resync = timedelta(seconds=_setting('AUTOCOMPLETE_RESYNC_SECONDS', 30))
+        return version != self.version or timezone.now() - self.synced_at >= resync
+
+    def sync(self):
+        """
+        Loads the index on first use, then applies changes made since the last sync when
+        the version moved or the last sync is AUTOCOMPLETE_RESYNC_SECONDS old.
+        """
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load()
+            return
+        version = _cache().get(VERSION_KEY, 0)
+        if not self._due(version):
+            return
+        with self._lock:
+            if not self._due(version):
+                return  # Another thread synced while we waited for the lock
+            synced_at = timezone.now()
+            changed_ids = IndividualSearchDocument.objects.filter(
+                updated_at__gte=self.synced_at - SYNC_OVERLAP).values('individual_id')
+            for individual_id, *values in self._rows(Individual.objects.filter(pk__in=changed_ids)):
+                self._remove(individual_id)
+                self._add(individual_id, values)
+            self.version, self.synced_at = version, synced_at
+
+    def discard(self, individual_ids):
+        with self._lock:
+            for individual_id in individual_ids:
+                self._remove(individual_id)
+
+    def search(self, query, limit):
+        """
+        Returns (ids, truncated): up to `limit` member IDs whose name has a word starting
+        with every term of the query (or whose membership ID starts with the query).
+        """
+        terms = normalize(query).split()
+        if not terms:
+            return [], False
+        # The longest term is looked up in the index; the others are checked per candidate
+        prefix = max(terms, key=len)
+        others = [term for term in terms if term is not prefix]
+
+        ids, seen = [], set()
+        with self._lock:
+            position = bisect.bisect_left(self._entries, (prefix,))
+            for key, individual_id in self._entries[position:position + MAX_SCANNED_KEYS]:
+                if not key.startswith(prefix):
+                    break
+                if individual_id in seen:
+                    continue
+                if others:
+                    words = self._names.get(individual_id, '').split()
+                    if not all(any(word.startswith(term) for word in words) for term in others):
+                        continue
+                seen.add(individual_id)
+                if len(ids) == limit:
+                    return ids, True
+                ids.append(individual_id)
+        return ids, False
+
+
+_index = PrefixIndex()
+
+
+def get_index():
+    _index.sync()
+    return _index
+
+
+def current_version():
+    return _cache().get(VERSION_KEY, 0)
+
+
+def _bump_version():
+    cache = _cache()
+    cache.add(VERSION_KEY, 0, timeout=None)
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # The key was evicted between add() and incr()
+        cache.set(VERSION_KEY, int(time.time()), timeout=None)
+
+
+def notify_changed():
+    """Tells every worker to re-sync its index once the current transaction commits."""
+    transaction.on_commit(_bump_version)
+
+
+def notify_deleted(individual_ids):
+    """Drops deleted members from this worker's index; other workers drop them on sight."""
+    individual_ids = list(individual_ids)
+
+    def discard_and_bump():
+        _index.discard(individual_ids)
+        _bump_version()
+
+    transaction.on_commit(discard_and_bump)
+
+
+def describe(individual_ids):
+    """Builds the {'id', 'text'} dicts for the given IDs (in that order) with one values_list()."""
+    rows = {
+        individual_id: values
+        for individual_id, *values in Individual.objects.filter(pk__in=individual_ids).values_list(
+            'pk', *NAME_FIELDS, 'membership_id')
+    }
+    results = []
+    for individual_id in individual_ids:
+        if individual_id in rows:
+            *name_values, membership_id = rows[individual_id]
+            results.append({
+                'id': individual_id,
+                'text': f"{display_name(*name_values)} ({membership_id})",
+            })
+    return results
+
+
+def autocomplete(query, limit=10):
+    """
+    Returns ({'id', 'text'} dicts, truncated) for the autocomplete dropdown, in index
+    order (alphabetical by the matched name part).
+    """
+    index = get_index()
+    ids, truncated = index.search(query, limit)
+    if not ids:
+        return [], False
+
+    results = describe(ids)
+    if len(results) < len(ids):
+        # Deleted by another worker before we synced
+        found = {result['id'] for result in results}
+        index.discard([individual_id for individual_id in ids if individual_id not in found])
+    return results, truncated
@@ -63,3 +63,39 @@ class IndividualForm(forms.ModelForm):
             self.fields['church'].queryset = Church.objects.all().order_by(
                 'name')
             self.fields['church'].empty_label = "-- Select Church --"
+
+
+class IndividualImportForm(IndividualForm):
+    """
+    IndividualForm rules for one spreadsheet row of the member import
+    (apps/individual/importer.py). Family and church are given by name in the file
+    and resolved by the importer from in-memory maps, so they are excluded here:
+    no per-row queries, and no ModelChoiceField querysets to copy for every row.
+    """
+    class Meta(IndividualForm.Meta):
+        exclude = IndividualForm.Meta.exclude + ['family', 'church']
+
+
+class MemberImportUploadForm(forms.Form):
+    """
+    Upload form for the member import admin view.
+    """
+    file = forms.FileField(
+        label="CSV or XLSX file",
+        help_text="First row must contain the column names (e.g. given_name, surname, relationship, family, church)."
+    )
+    dry_run = forms.BooleanField(
+        required=False, initial=True,
+        help_text="Validate every row but do not save anything."
+    )
+    create_missing_families = forms.BooleanField(
+        required=False,
+        help_text="Create families that do not exist yet (by family name) instead of reporting an error."
+    )
+    batch_size = forms.IntegerField(min_value=1, max_value=10000, initial=500)
+
+    def clean_file(self):
+        uploaded = self.cleaned_data['file']
+        if not uploaded.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError("Only .csv and .xlsx files are supported.")
+        return uploaded
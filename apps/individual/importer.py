@@ -0,0 +1,295 @@
+# apps/individual/importer.py
+# Bulk member import gikan sa CSV/XLSX spreadsheets.
+#
+# Rows are streamed from the file (csv.reader / openpyxl read-only mode), validated
+# in chunks with the IndividualForm rules, and saved with bulk_create in batches, one
+# transaction per batch. Family and Church are given by name and resolved from lookup
+# maps loaded once at the start, so validation does no per-row queries. Membership IDs
+# are assigned per batch with one range allocation (apps/individual/membership_ids.py).
+# With create_missing_families, a family the file names that does not exist yet is
+# created inside the transaction of the batch that saves its first valid row, so
+# invalid rows and failed batches never leave empty families behind. A row whose family
+# belongs to another church than the row's is an error.
+#
+# Used by the `import_members` management command and the admin upload view.
+
+import csv
+import io
+import os
+
+from django.db import transaction
+
+from apps.church.models import Church
+from apps.family.models import Family
+
+from .forms import IndividualImportForm
+from .membership_ids import assign_membership_ids
+from .models import Individual
+from .search import rebuild_search_index, update_search_documents
+
+# Columns that may appear in the file (header names are case-insensitive)
+IMPORT_COLUMNS = [
+    'given_name', 'middle_name', 'surname', 'suffix_name',
+    'sex', 'civil_status', 'birth_date', 'contact_number', 'email_address', 'address',
+    'relationship', 'membership_status', 'is_active_member', 'is_alive',
+    'family', 'church',
+]
+CHOICE_COLUMNS = ('sex', 'civil_status', 'relationship', 'membership_status')
+BOOLEAN_COLUMNS = ('is_active_member', 'is_alive')
+TRUE_VALUES = ('1', 'true', 'yes', 'y', 'on')
+FALSE_VALUES = ('0', 'false', 'no', 'n', 'off')
+
+# Model defaults used for blank cells
+FIELD_DEFAULTS = {
+    field.name: field.get_default()
+    for field in Individual._meta.concrete_fields
+    if field.name in IMPORT_COLUMNS and field.has_default()
+}
+
+# Marker for names that match more than one Church
+AMBIGUOUS = object()
+
+
+class MemberImportError(Exception):
+    """Raised when the file itself cannot be read (not for invalid rows)."""
+
+
+def _normalize_header(value):
+    return str(value or '').strip().lower().replace(' ', '_')
+
+
+def _cell_to_text(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'strftime'):
+        # openpyxl gives dates as datetime objects
+        return value.strftime('%Y-%m-%d')
+    return str(value).strip()
+
+
+def _read_csv(fileobj):
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    reader = csv.reader(fileobj)
+    header = next(reader, None)
+    if header is None:
+        return
+    header = [_normalize_header(column) for column in header]
+    for values in reader:
+        yield dict(zip(header, (value.strip() for value in values)))
+
+
+def _read_xlsx(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise MemberImportError("Reading .xlsx files requires openpyxl (pip install openpyxl).")
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [_normalize_header(column) for column in header]
+        for values in rows:
+            yield dict(zip(header, (_cell_to_text(value) for value in values or ())))
+    finally:
+        workbook.close()
+
+
+def read_rows(fileobj, filename):
+    """
+    Yields one dict per data row ({column name: text value}), without loading the
+    whole file in memory. The format is picked from the file name extension.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        return _read_csv(fileobj)
+    if extension == '.xlsx':
+        return _read_xlsx(fileobj)
+    raise MemberImportError(f"Unsupported file type '{extension}'. Use .csv or .xlsx.")
+
+
+class MemberImporter:
+    """
+    Validates and saves member rows. After run(), `created`, `rows_read` and
+    `errors` (list of (row number, column, message)) describe the result.
+    Row numbers are spreadsheet line numbers (the header is row 1).
+    """
+
+    def __init__(self, batch_size=500, dry_run=False, create_missing_families=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.create_missing_families = create_missing_families
+        self.rows_read = 0
+        self.created = 0
+        self.families_created = 0
+        self.errors = []
+        self._reindex_all = False
+
+    # --- Lookup Maps ---
+
+    def _load_lookup_maps(self):
+        self.families = {
+            name.lower(): (family_id, church_id)
+            for family_id, name, church_id in Family.objects.values_list('id', 'family_name', 'church_id')
+        }
+        self.churches = {}
+        for church_id, name in Church.objects.values_list('id', 'name'):
+            key = name.strip().lower()
+            self.churches[key] = AMBIGUOUS if key in self.churches else church_id
+
+    def _resolve_church(self, row_number, name):
+        if not name:
+            return None
+        church_id = self.churches.get(name.lower())
+        if church_id is None:
+            self.errors.append((row_number, 'church', f"Church '{name}' not found."))
+        elif church_id is AMBIGUOUS:
+            self.errors.append((row_number, 'church', f"More than one church is named '{name}'."))
+            church_id = None
+        return church_id
+
+    def _resolve_family(self, row_number, name, church_id, check_church=True):
+        """
+        Returns (family id, name of a family still to be created) for the row. The id is
+        None for a family that _save_batch() creates.
+        """
+        if not name:
+            return None, None
+        found = self.families.get(name.lower())
+        if found is None:
+            if not self.create_missing_families:
+                self.errors.append((row_number, 'family', f"Family '{name}' not found."))
+                return None, None
+            return None, name
+        family_id, family_church_id = found
+        if check_church and family_church_id != church_id:
+            self.errors.append((row_number, 'family', f"Family '{name}' belongs to another church."))
+            return None, None
+        return family_id, (name if family_id is None else None)
+
+    # --- Validation ---
+
+    def _form_data(self, row):
+        data = {}
+        for column in IMPORT_COLUMNS[:-2]:  # family and church are resolved separately
+            value = row.get(column, '')
+            if not value and column in FIELD_DEFAULTS:
+                # Blank or missing column means the model default (e.g. membership_status=ACTIVE)
+                value = FIELD_DEFAULTS[column]
+            if column in BOOLEAN_COLUMNS:
+                lowered = str(value).lower()
+                if lowered in FALSE_VALUES:
+                    continue  # Unchecked checkbox
+                if lowered not in TRUE_VALUES:
+                    data[column] = value  # Kept so the row is reported below
+                    continue
+                value = 'on'
+            elif column in CHOICE_COLUMNS:
+                value = value.upper()
+            data[column] = value
+        return data
+
+    def validate_row(self, row_number, row):
+        """Returns an unsaved Individual for a valid row, or None (errors are recorded)."""
+        errors_before = len(self.errors)
+        data = self._form_data(row)
+
+        for column in BOOLEAN_COLUMNS:
+            value = data.get(column, 'on')
+            if value != 'on':
+                self.errors.append((row_number, column, f"'{value}' is not a yes/no value."))
+
+        form = IndividualImportForm(data=data)
+        if not form.is_valid():
+            for column, messages in form.errors.items():
+                for message in messages:
+                    self.errors.append((row_number, column, message))
+
+        church_errors = len(self.errors)
+        church_id = self._resolve_church(row_number, row.get('church', ''))
+        # An unknown church is already reported; comparing it with the family's adds nothing
+        family_id, new_family = self._resolve_family(
+            row_number, row.get('family', ''), church_id, check_church=len(self.errors) == church_errors)
+
+        if len(self.errors) > errors_before:
+            return None
+        if new_family and new_family.lower() not in self.families:
+            # Known from now on, so the following rows of the same family validate
+            self.families[new_family.lower()] = (None, church_id)
+            self.families_created += 1
+        individual = form.save(commit=False)
+        individual.church_id = church_id
+        individual.family_id = family_id
+        individual._import_family = new_family
+        return individual
+
+    # --- Saving ---
+
+    def _create_families(self, individuals):
+        """Creates the families the batch's rows name that do not exist yet, and links the rows."""
+        for individual in individuals:
+            name = individual._import_family
+            if not name:
+                continue
+            family_id, church_id = self.families[name.lower()]
+            if family_id is None:
+                family_id = Family.objects.create(family_name=name, church_id=church_id).id
+                self.families[name.lower()] = (family_id, church_id)
+            individual.family_id = family_id
+
+    def _save_batch(self, individuals):
+        if not individuals:
+            return
+        if not self.dry_run:
+            with transaction.atomic():
+                self._create_families(individuals)
+                assign_membership_ids(individuals)
+                Individual.objects.bulk_create(individuals, batch_size=self.batch_size)
+                if all(individual.pk for individual in individuals):
+                    update_search_documents([individual.pk for individual in individuals])
+                else:
+                    # This backend does not return primary keys from bulk_create()
+                    self._reindex_all = True
+        self.created += len(individuals)
+
+    def _after_import(self):
+        """
+        bulk_create() does not send post_save signals, so everything that is normally
+        kept up to date by signals is refreshed here once for the whole import.
+        (The search documents are written per batch in _save_batch().)
+        """
+        from apps.family.counters import reconcile_counters  # Family app depends on this app
+        from apps.report.rollups import rebuild_rollups  # Report app depends on this app
+        rebuild_rollups()
+        reconcile_counters()
+        if self._reindex_all:
+            rebuild_search_index()
+
+    def run(self, rows):
+        self._load_lookup_maps()
+        batch = []
+        for row_number, row in enumerate(rows, start=2):
+            if not any(row.values()):
+                continue  # Blank line
+            self.rows_read += 1
+            individual = self.validate_row(row_number, row)
+            if individual is not None:
+                batch.append(individual)
+            if len(batch) >= self.batch_size:
+                self._save_batch(batch)
+                batch = []
+        self._save_batch(batch)
+
+        if self.created and not self.dry_run:
+            self._after_import()
+        return self
+
+    def write_error_report(self, fileobj):
+        """Writes the per-row errors as CSV (row, column, message)."""
+        writer = csv.writer(fileobj)
+        writer.writerow(['row', 'column', 'message'])
+        for row_number, column, message in self.errors:
+            writer.writerow([row_number, column, message])
@@ -0,0 +1,137 @@
+# apps/individual/management/commands/benchmark_member_search.py
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from apps.church.models import Church
+from apps.family.models import Family
+from apps.individual.autocomplete import autocomplete, get_index
+from apps.individual.membership_ids import assign_membership_ids
+from apps.individual.models import Individual
+from apps.individual.search import filter_individuals, rebuild_search_index, search_individual_ids
+
+GIVEN_NAMES = ['Juan', 'Maria', 'Jose', 'Ana', 'Pedro', 'Rosa', 'Carlos', 'Elena', 'Miguel', 'Luz',
+               'Ramon', 'Teresa', 'Antonio', 'Carmen', 'Francisco', 'Josefina', 'Manuel', 'Gloria']
+SURNAMES = ['Dela Cruz', 'Santos', 'Reyes', 'Garcia', 'Mendoza', 'Bautista', 'Villanueva', 'Ramos',
+            'Aquino', 'Castillo', 'Fernandez', 'Gonzales', 'Navarro', 'Torres', 'Lopez', 'Flores']
+TOWNS = ['Cebu City', 'Mandaue', 'Lapu-Lapu', 'Talisay', 'Danao', 'Toledo', 'Carcar', 'Naga']
+
+DEFAULT_QUERIES = ['juan', 'dela cruz', 'maria santos', 'mandaue', 'garc', 'lo', '0917', 'jo re', 'fernandez luz']
+
+
+def _legacy_filter(queryset, query):
+    """The icontains search the list views used before the search index."""
+    return queryset.filter(
+        Q(given_name__icontains=query) |
+        Q(middle_name__icontains=query) |
+        Q(surname__icontains=query) |
+        Q(contact_number__icontains=query) |
+        Q(address__icontains=query) |
+        Q(family__family_name__icontains=query) |
+        Q(church__name__icontains=query) |
+        Q(membership_id__icontains=query)
+    )
+
+
+def _legacy_api(query):
+    """The icontains search IndividualSearchAPIView used before the search index."""
+    return list(Individual.objects.filter(
+        Q(given_name__icontains=query) |
+        Q(middle_name__icontains=query) |
+        Q(surname__icontains=query) |
+        Q(membership_id__icontains=query)
+    ).distinct().values_list('pk', flat=True)[:20])
+
+
+class Command(BaseCommand):
+    help = ('Compares member search latency: the old icontains Q-object search against the search index. '
+            'With --seed, first adds synthetic members (use a scratch database).')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Create this many synthetic members (and reindex) before measuring.')
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Times each query is run per search method (default: 5).')
+        parser.add_argument(
+            '--query', action='append', dest='queries',
+            help='Search text to measure (repeatable). Defaults to a fixed mix of names/places/numbers.')
+
+    def handle(self, *args, **options):
+        if options['repeat'] <= 0:
+            raise CommandError('--repeat must be a positive number.')
+        if options['seed']:
+            self._seed(options['seed'])
+
+        queries = options['queries'] or DEFAULT_QUERIES
+        self.stdout.write(f'{Individual.objects.count()} members; {len(queries)} queries x {options["repeat"]} runs')
+
+        list_page = Individual.objects.select_related('family', 'church').order_by('surname', 'given_name')
+        methods = [
+            ('list page (icontains)', lambda q: self._list_page(_legacy_filter(list_page, q))),
+            ('list page (index)', lambda q: self._list_page(filter_individuals(list_page, q))),
+            ('api top 20 (icontains)', _legacy_api),
+            ('api top 20 (index)', lambda q: search_individual_ids(q, limit=20)),
+            ('autocomplete (prefix)', lambda q: autocomplete(q, limit=10)),
+        ]
+        started = time.perf_counter()
+        get_index()
+        self.stdout.write(f'  autocomplete index loaded in {(time.perf_counter() - started) * 1000:.0f} ms')
+
+        for name, method in methods:
+            timings = []
+            for query in queries:
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    method(query)
+                    timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            self.stdout.write(
+                f'  {name:<24} median {statistics.median(timings):8.2f} ms   '
+                f'p95 {p95:8.2f} ms   p99 {p99:8.2f} ms')
+
+    def _list_page(self, queryset):
+        # What a paginated ListView does: count() plus the first page
+        return queryset.count(), list(queryset[:10])
+
+    def _seed(self, count):
+        self.stdout.write(f'Creating {count} synthetic members...')
+        rng = random.Random(count)
+        churches = list(Church.objects.all()[:20]) or [
+            Church.objects.create(name=f'Benchmark Church {number}') for number in range(1, 21)]
+        family_count = max(1, count // 4)
+        existing = Family.objects.filter(family_name__startswith='Benchmark Family ').count()
+        Family.objects.bulk_create([
+            Family(family_name=f'Benchmark Family {number}', church=churches[number % len(churches)])
+            for number in range(existing + 1, existing + family_count + 1)
+        ], batch_size=1000)
+        families = list(Family.objects.filter(
+            family_name__startswith='Benchmark Family ').values_list('pk', 'church_id'))
+
+        batch_size = 5000
+        for start in range(0, count, batch_size):
+            batch = []
+            for _ in range(min(batch_size, count - start)):
+                family_id, church_id = rng.choice(families)
+                batch.append(Individual(
+                    given_name=rng.choice(GIVEN_NAMES),
+                    middle_name=rng.choice(SURNAMES),
+                    surname=rng.choice(SURNAMES),
+                    relationship='HEAD',
+                    contact_number=f'09{rng.randint(100000000, 999999999)}',
+                    address=f'{rng.randint(1, 999)} Purok {rng.randint(1, 9)}, {rng.choice(TOWNS)}',
+                    family_id=family_id,
+                    church_id=church_id,
+                ))
+            assign_membership_ids(batch)
+            Individual.objects.bulk_create(batch, batch_size=1000)
+
+        self.stdout.write('Rebuilding search index...')
+        rebuild_search_index()
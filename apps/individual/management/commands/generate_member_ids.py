@@ -1,36 +1,48 @@
 # apps/individual/management/commands/generate_member_ids.py
 
 from django.core.management.base import BaseCommand, CommandError
-from django.utils import timezone
+from django.db import transaction
+from django.db.models import Q
 from apps.individual.models import Individual # Import your Individual model
+from apps.individual.membership_ids import assign_membership_ids
+
 
 class Command(BaseCommand):
     help = 'Generates membership_ids for existing Individual records that do not have one.'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of individuals to update per range allocation and bulk_update (default: 1000).')
+
     def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size <= 0:
+            raise CommandError('--batch-size must be a positive number.')
+
         self.stdout.write(self.style.SUCCESS('Starting to generate membership IDs for existing individuals...'))
 
         # Get all individuals that do NOT have a membership_id
-        individuals_to_update = Individual.objects.filter(membership_id__isnull=True).order_by('pk')
+        individuals_to_update = Individual.objects.filter(
+            Q(membership_id__isnull=True) | Q(membership_id='')
+        ).order_by('pk')
 
         if not individuals_to_update.exists():
             self.stdout.write(self.style.SUCCESS('No individuals found without a membership ID. Exiting.'))
             return
 
         updated_count = 0
-        
-        # Iterate over each individual and generate an ID
-        for individual in individuals_to_update:
-            try:
-                # Re-use the ID generation logic from the Individual model's save method
-                # We'll temporarily set membership_id to None to force re-generation if needed,
-                # though for isnull=True filter, it's already None.
-                individual.membership_id = None # Ensure it's None to trigger generation logic
-                individual.save() # Call save to trigger the custom save method
-                updated_count += 1
-                self.stdout.write(self.style.SUCCESS(f'Successfully assigned ID {individual.membership_id} to {individual.full_name} (PK: {individual.pk})'))
-            except Exception as e:
-                self.stderr.write(self.style.ERROR(f'Failed to assign ID to {individual.full_name} (PK: {individual.pk}): {e}'))
 
-        self.stdout.write(self.style.SUCCESS(f'Finished! Updated {updated_count} individual(s) with new membership IDs.'))
+        # Each batch gets its IDs from one range allocation and is written with one bulk_update.
+        # Always take the first batch again: the rows updated before no longer match the filter.
+        while True:
+            batch = list(individuals_to_update.only('pk', 'membership_id')[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                assign_membership_ids(batch)
+                Individual.objects.bulk_update(batch, ['membership_id'])
+            updated_count += len(batch)
+            self.stdout.write(f'  Assigned {batch[0].membership_id} .. {batch[-1].membership_id} ({updated_count} so far)')
 
+        self.stdout.write(self.style.SUCCESS(f'Finished! Updated {updated_count} individual(s) with new membership IDs.'))
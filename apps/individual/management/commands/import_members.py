@@ -0,0 +1,68 @@
+# apps/individual/management/commands/import_members.py
+
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.individual.importer import MemberImporter, MemberImportError, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Imports members (Individuals) from a CSV or XLSX file. Family and church columns are matched by name.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the .csv or .xlsx file.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Validate every row but do not save anything.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of rows validated and saved per transaction (default: 500).')
+        parser.add_argument(
+            '--create-missing-families', action='store_true',
+            help='Create families that do not exist yet instead of reporting an error.')
+        parser.add_argument(
+            '--errors',
+            help='Write the per-row error report (CSV) to this path.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'File not found: {path}')
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be a positive number.')
+
+        importer = MemberImporter(
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+            create_missing_families=options['create_missing_families'],
+        )
+
+        started = time.monotonic()
+        try:
+            with open(path, 'rb') as fileobj:
+                importer.run(read_rows(fileobj, path))
+        except MemberImportError as e:
+            raise CommandError(str(e))
+        elapsed = time.monotonic() - started
+
+        verb = 'Would import' if importer.dry_run else 'Imported'
+        self.stdout.write(
+            f'{verb} {importer.created} of {importer.rows_read} row(s) in {elapsed:.1f}s '
+            f'({importer.families_created} new family(ies)).')
+
+        if options['errors']:
+            with open(options['errors'], 'w', newline='', encoding='utf-8') as report:
+                importer.write_error_report(report)
+            self.stdout.write(f'Error report written to {options["errors"]}')
+        else:
+            for row_number, column, message in importer.errors[:20]:
+                self.stderr.write(self.style.ERROR(f'  Row {row_number} [{column}]: {message}'))
+            if len(importer.errors) > 20:
+                self.stderr.write(f'  ... and {len(importer.errors) - 20} more (use --errors to get all).')
+
+        if importer.errors:
+            self.stdout.write(self.style.WARNING(f'{len(importer.errors)} error(s) found.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No errors found.'))
@@ -0,0 +1,22 @@
+# apps/individual/management/commands/reindex_members.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.individual.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the member search index (one search document per Individual).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of search documents to insert per bulk_create batch (default: 1000).')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be a positive number.')
+
+        self.stdout.write('Rebuilding member search index...')
+        written = rebuild_search_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {written} individual(s).'))
@@ -0,0 +1,63 @@
+# apps/individual/membership_ids.py
+# Membership ID allocator (format YYMMDD-XXXX, e.g. 250619-0001).
+#
+# Each day has one MembershipIdSequence row. A range of IDs is taken with a single
+# `UPDATE ... SET last_number = last_number + n` plus a read of the new value in the
+# same transaction, so bulk registration gets any number of IDs in one round trip and
+# concurrent saves never get the same ID. The sequence part is zero-padded to 4 digits
+# and simply grows to 5+ digits after 9999 IDs in one day.
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Individual, MembershipIdSequence
+
+
+def format_membership_id(day, number):
+    return f"{day:%y%m%d}-{number:04d}"
+
+
+def _ensure_sequence(day):
+    """
+    Creates the counter row for a day the first time it is used, starting after the
+    highest ID already saved for that day (e.g. IDs created before this table existed).
+    """
+    if MembershipIdSequence.objects.filter(day=day).exists():
+        return
+    prefix = f"{day:%y%m%d}-"
+    highest = 0
+    for membership_id in Individual.objects.filter(
+            membership_id__startswith=prefix).values_list('membership_id', flat=True):
+        sequence_part = membership_id[len(prefix):]
+        if sequence_part.isdigit():
+            highest = max(highest, int(sequence_part))
+    try:
+        with transaction.atomic():
+            MembershipIdSequence.objects.create(day=day, last_number=highest)
+    except IntegrityError:
+        pass  # Another request created it first
+
+
+def allocate_membership_ids(count, day=None):
+    """Returns `count` new, unique membership IDs for the given day (default: today)."""
+    if count <= 0:
+        return []
+    day = day or timezone.localdate()
+    _ensure_sequence(day)
+    with transaction.atomic():
+        MembershipIdSequence.objects.filter(day=day).update(last_number=F('last_number') + count)
+        last = MembershipIdSequence.objects.filter(day=day).values_list('last_number', flat=True).get()
+    return [format_membership_id(day, number) for number in range(last - count + 1, last + 1)]
+
+
+def assign_membership_ids(individuals, day=None):
+    """
+    Gives every (unsaved or existing) Individual in the list without a membership_id
+    a new one, using a single range allocation. Use before bulk_create()/bulk_update().
+    Returns the individuals that got a new ID.
+    """
+    missing = [individual for individual in individuals if not individual.membership_id]
+    for individual, membership_id in zip(missing, allocate_membership_ids(len(missing), day)):
+        individual.membership_id = membership_id
+    return missing
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.23 on 2026-10-18 07:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('individual', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MembershipIdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('last_number', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Membership ID Sequence',
+                'verbose_name_plural': 'Membership ID Sequences',
+            },
+        ),
+    ]
@@ -0,0 +1,106 @@
+# Generated by Django 4.2.23 on 2026-10-18 07:27
+
+import unicodedata
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copies of what apps/individual/search.py had when this migration was written:
+# the migration must keep producing the same table, triggers and documents even after
+# that module changes. reindex_members rebuilds documents with the current code.
+
+DOCUMENT_FIELDS = (
+    'given_name', 'middle_name', 'surname', 'suffix_name', 'membership_id',
+    'contact_number', 'email_address', 'address', 'family__family_name', 'church__name',
+)
+
+SQLITE_INDEX_SQL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS individual_search_fts USING fts5("
+    "document, content='individual_individualsearchdocument', content_rowid='individual_id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS individual_search_fts_ai AFTER INSERT ON individual_individualsearchdocument BEGIN "
+    "INSERT INTO individual_search_fts(rowid, document) VALUES (new.individual_id, new.document); END",
+    "CREATE TRIGGER IF NOT EXISTS individual_search_fts_ad AFTER DELETE ON individual_individualsearchdocument BEGIN "
+    "INSERT INTO individual_search_fts(individual_search_fts, rowid, document) "
+    "VALUES ('delete', old.individual_id, old.document); END",
+    "CREATE TRIGGER IF NOT EXISTS individual_search_fts_au AFTER UPDATE ON individual_individualsearchdocument BEGIN "
+    "INSERT INTO individual_search_fts(individual_search_fts, rowid, document) "
+    "VALUES ('delete', old.individual_id, old.document); "
+    "INSERT INTO individual_search_fts(rowid, document) VALUES (new.individual_id, new.document); END",
+]
+SQLITE_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS individual_search_fts_ai",
+    "DROP TRIGGER IF EXISTS individual_search_fts_ad",
+    "DROP TRIGGER IF EXISTS individual_search_fts_au",
+    "DROP TABLE IF EXISTS individual_search_fts",
+]
+POSTGRESQL_INDEX_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS individual_search_document_trgm "
+    "ON individual_individualsearchdocument USING gin (document gin_trgm_ops)",
+]
+POSTGRESQL_DROP_SQL = [
+    "DROP INDEX IF EXISTS individual_search_document_trgm",
+]
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', str(text or ''))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.lower().split())
+
+
+def build_document(values):
+    return ' '.join(filter(None, (normalize(values.get(field)) for field in DOCUMENT_FIELDS)))
+
+
+def _execute(schema_editor, statements_by_vendor):
+    for statement in statements_by_vendor.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(statement)
+
+
+def create_index(apps, schema_editor):
+    _execute(schema_editor, {'sqlite': SQLITE_INDEX_SQL, 'postgresql': POSTGRESQL_INDEX_SQL})
+
+
+def drop_index(apps, schema_editor):
+    _execute(schema_editor, {'sqlite': SQLITE_DROP_SQL, 'postgresql': POSTGRESQL_DROP_SQL})
+
+
+def fill_search_documents(apps, schema_editor):
+    # Documents for the members that already exist (the index triggers fill the FTS table)
+    Individual = apps.get_model('individual', 'Individual')
+    IndividualSearchDocument = apps.get_model('individual', 'IndividualSearchDocument')
+    batch = []
+    for row in Individual.objects.order_by('pk').values('id', 'church_id', *DOCUMENT_FIELDS).iterator():
+        batch.append(IndividualSearchDocument(
+            individual_id=row['id'], church_id=row['church_id'], document=build_document(row)))
+        if len(batch) >= 1000:
+            IndividualSearchDocument.objects.bulk_create(batch)
+            batch = []
+    IndividualSearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('church', '0001_initial'),
+        ('individual', '0002_membershipidsequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndividualSearchDocument',
+            fields=[
+                ('individual', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='individual.individual')),
+                ('document', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('church', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='church.church')),
+            ],
+            options={
+                'verbose_name': 'Individual Search Document',
+                'verbose_name_plural': 'Individual Search Documents',
+            },
+        ),
+        migrations.RunPython(create_index, drop_index),
+        migrations.RunPython(fill_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-18 07:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('individual', '0003_individualsearchdocument'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='individualsearchdocument',
+            index=models.Index(fields=['updated_at'], name='individual_search_updated_idx'),
+        ),
+    ]
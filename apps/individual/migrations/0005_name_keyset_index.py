@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-18 09:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('individual', '0004_individualsearchdocument_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='individual',
+            index=models.Index(fields=['surname', 'given_name', 'id'], name='individual_name_keyset_idx'),
+        ),
+    ]
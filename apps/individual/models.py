@@ -80,38 +80,12 @@ class Individual(models.Model):
     def save(self, *args, **kwargs):
         # Only generate a new membership_id if it's not already set
         if not self.membership_id:
-            today = timezone.localdate()  # Get current date in local timezone
-
-            # Format the date part (YYMMDD)
-            # e.g., '250619' for June 19, 2025
-            date_part = today.strftime('%y%m%d')
-
-            # Find the last membership_id for today's date
-            # We need to filter by IDs that start with the current date part
-            # and then order by the ID in descending order to get the latest one.
-            # Using __startswith for efficient lookup if you have many records.
-            last_individual_for_today = Individual.objects.filter(
-                # Filter IDs like '250619-'
-                membership_id__startswith=f"{date_part}-"
-                # Get the highest sequence number
-            ).order_by('-membership_id').first()
-
-            new_sequence = 1
-            if last_individual_for_today:
-                # Extract the numeric sequence part from the last ID
-                # e.g., if last ID is '250619-0012', we get '0012'
-                last_id_sequence_str = last_individual_for_today.membership_id.split(
-                    '-')[-1]
-                try:
-                    last_sequence = int(last_id_sequence_str)
-                    new_sequence = last_sequence + 1
-                except ValueError:
-                    # Fallback if the sequence part is not a valid number (shouldn't happen with proper IDs)
-                    new_sequence = 1  # Reset to 1 if parsing fails unexpectedly
-
-            # Format the new membership ID: YYMMDD-XXXX (e.g., 250619-0001)
-            # Use zfill(4) to ensure it's always 4 digits, padding with leading zeros
-            self.membership_id = f"{date_part}-{str(new_sequence).zfill(4)}"
+            # Imported here because membership_ids.py imports this module
+            from .membership_ids import allocate_membership_ids
+
+            # Format: YYMMDD-XXXX (e.g., 250619-0001), taken from today's
+            # MembershipIdSequence row so concurrent saves never get the same ID
+            self.membership_id = allocate_membership_ids(1)[0]
 
         # Call the original save method to save the instance to the database
         super().save(*args, **kwargs)
@@ -142,4 +116,52 @@ class Individual(models.Model):
         return self.full_name
 
     class Meta:
-        verbose_name_plural = "Individuals"
\ No newline at end of file
+        verbose_name_plural = "Individuals"
+        indexes = [
+            # Keyset pages of the member lists (apps/common/pagination.py) seek on this order
+            models.Index(fields=['surname', 'given_name', 'id'], name='individual_name_keyset_idx'),
+            # The same within one church (IndividualListByChurchView), proposed by advise_indexes
+            models.Index(fields=['church', 'surname', 'given_name', 'id'], name='individual_church_name_idx'),
+        ]
+
+
+class MembershipIdSequence(models.Model):
+    """
+    Counter for the daily membership_id sequence (the XXXX part of YYMMDD-XXXX).
+    One row per day; `last_number` is the last sequence number handed out that day.
+    Only apps/individual/membership_ids.py should touch this table.
+    """
+    day = models.DateField(unique=True)
+    last_number = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Membership ID Sequence"
+        verbose_name_plural = "Membership ID Sequences"
+
+    def __str__(self):
+        return f"{self.day:%y%m%d}: {self.last_number}"
+
+
+class IndividualSearchDocument(models.Model):
+    """
+    Denormalized search text for one Individual (names, membership ID, contact, address,
+    family name and church name), kept in sync by apps/individual/signals.py.
+    The database index on `document` is backend specific (FTS5 trigram table on SQLite,
+    pg_trgm GIN index on PostgreSQL) and is created in the migration.
+    Only apps/individual/search.py should write to this table.
+    """
+    individual = models.OneToOneField(
+        Individual, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    church = models.ForeignKey(
+        Church, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    document = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Individual Search Document"
+        verbose_name_plural = "Individual Search Documents"
+        # Used by the autocomplete index to find the documents changed since its last sync
+        indexes = [models.Index(fields=['updated_at'], name='individual_search_updated_idx')]
+
+    def __str__(self):
+        return self.document
@@ -0,0 +1,257 @@
+# apps/individual/search.py
+# Member search index.
+#
+# Every Individual has one IndividualSearchDocument row: its names, membership ID,
+# contact number, email, address, family name and church name, lowercased and without
+# accents, in one text column. The signal handlers in apps/individual/signals.py keep it
+# up to date; `python manage.py reindex_members` rebuilds it from scratch.
+#
+# The text column is indexed per backend:
+#   - SQLite: an FTS5 table with the trigram tokenizer (external content, kept in sync
+#     by triggers on the document table). Matches substrings like icontains did, and
+#     results are ranked with bm25.
+#   - PostgreSQL: a pg_trgm GIN index, which serves the LIKE '%term%' filters; results
+#     are ranked by trigram similarity.
+#   - Anything else: plain LIKE on the single document column (still one table, no joins).
+#
+# A query is split into terms and every term must match (so "juan cruz" finds Juan Dela
+# Cruz even though the two words are in different fields).
+
+import unicodedata
+
+from django.db import connection, transaction
+
+from .models import Individual, IndividualSearchDocument
+
+# Individual values that go into the search document
+DOCUMENT_FIELDS = (
+    'given_name', 'middle_name', 'surname', 'suffix_name', 'membership_id',
+    'contact_number', 'email_address', 'address', 'family__family_name', 'church__name',
+)
+
+FTS_TABLE = 'individual_search_fts'
+DOCUMENT_TABLE = IndividualSearchDocument._meta.db_table
+PG_INDEX = 'individual_search_document_trgm'
+
+# The trigram tokenizer cannot match terms shorter than this; they are matched with LIKE
+MIN_FTS_TERM_LENGTH = 3
+
+
+def normalize(text):
+    """Lowercases, strips accents (ñ -> n) and collapses whitespace."""
+    text = unicodedata.normalize('NFKD', str(text or ''))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.lower().split())
+
+
+def build_document(values):
+    """Builds the search text from a dict with the DOCUMENT_FIELDS keys."""
+    return ' '.join(filter(None, (normalize(values.get(field)) for field in DOCUMENT_FIELDS)))
+
+
+def _like_pattern(term):
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+# --- Backend Index (used by the migration and reindex_members) ---
+
+def _sqlite_index_statements():
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"document, content='{DOCUMENT_TABLE}', content_rowid='individual_id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {DOCUMENT_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.individual_id, new.document); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {DOCUMENT_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) "
+        f"VALUES ('delete', old.individual_id, old.document); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {DOCUMENT_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) "
+        f"VALUES ('delete', old.individual_id, old.document); "
+        f"INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.individual_id, new.document); END",
+    ]
+
+
+def create_search_index(schema_editor):
+    """
+    Creates the backend specific index. Safe to run again: on SQLite it also restores
+    the triggers, which are lost whenever a migration rebuilds the document table.
+    """
+    vendor = schema_editor.connection.vendor
+    _fts_available.pop(schema_editor.connection.alias, None)
+    if vendor == 'sqlite':
+        for statement in _sqlite_index_statements():
+            schema_editor.execute(statement)
+    elif vendor == 'postgresql':
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON {DOCUMENT_TABLE} USING gin (document gin_trgm_ops)")
+
+
+def drop_search_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    _fts_available.pop(schema_editor.connection.alias, None)
+    if vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute(f"DROP INDEX IF EXISTS {PG_INDEX}")
+
+
+# Whether the FTS table exists, per database alias (checked once per process)
+_fts_available = {}
+
+
+def _uses_fts():
+    if connection.vendor != 'sqlite':
+        return False
+    if connection.alias not in _fts_available:
+        _fts_available[connection.alias] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_available[connection.alias]
+
+
+# --- Keeping Documents Up To Date ---
+
+def _notify_autocomplete():
+    # The autocomplete prefix index syncs from the documents' updated_at
+    from .autocomplete import notify_changed  # autocomplete.py imports this module
+    notify_changed()
+
+
+def _document_rows(individual_ids):
+    return Individual.objects.filter(pk__in=individual_ids).values('id', 'church_id', *DOCUMENT_FIELDS)
+
+
+def update_search_documents(individual_ids, batch_size=1000):
+    """(Re)builds the search documents of the given Individuals."""
+    individual_ids = list(individual_ids)
+    for start in range(0, len(individual_ids), batch_size):
+        chunk = individual_ids[start:start + batch_size]
+        documents = [
+            IndividualSearchDocument(
+                individual_id=row['id'], church_id=row['church_id'], document=build_document(row))
+            for row in _document_rows(chunk)
+        ]
+        with transaction.atomic():
+            # Delete + insert instead of update so one statement covers the whole chunk
+            IndividualSearchDocument.objects.filter(individual_id__in=chunk).delete()
+            IndividualSearchDocument.objects.bulk_create(documents, batch_size=batch_size)
+    _notify_autocomplete()
+
+
+def rebuild_search_index(batch_size=1000):
+    """
+    Recreates every search document (and on SQLite the FTS table contents).
+    Returns the number of documents written.
+    """
+    with connection.schema_editor() as schema_editor:
+        create_search_index(schema_editor)
+
+    written = 0
+    with transaction.atomic():
+        IndividualSearchDocument.objects.all().delete()
+        rows = Individual.objects.order_by('pk').values('id', 'church_id', *DOCUMENT_FIELDS)
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(IndividualSearchDocument(
+                individual_id=row['id'], church_id=row['church_id'], document=build_document(row)))
+            if len(batch) >= batch_size:
+                IndividualSearchDocument.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        IndividualSearchDocument.objects.bulk_create(batch)
+        written += len(batch)
+
+    if _uses_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    _notify_autocomplete()
+    return written
+
+
+# --- Searching ---
+
+def _sqlite_search_sql(terms, church_id=None, ranked=False):
+    long_terms = [term for term in terms if len(term) >= MIN_FTS_TERM_LENGTH]
+    short_terms = [term for term in terms if len(term) < MIN_FTS_TERM_LENGTH]
+
+    params = []
+    if long_terms:
+        sql = f"SELECT {FTS_TABLE}.rowid FROM {FTS_TABLE}"
+        where = [f"{FTS_TABLE} MATCH %s"]
+        params.append(' AND '.join('"{}"'.format(term.replace('"', '""')) for term in long_terms))
+        id_column = f"{FTS_TABLE}.rowid"
+        document_column = f"{FTS_TABLE}.document"
+    else:
+        sql = f"SELECT {DOCUMENT_TABLE}.individual_id FROM {DOCUMENT_TABLE}"
+        where = []
+        id_column = f"{DOCUMENT_TABLE}.individual_id"
+        document_column = f"{DOCUMENT_TABLE}.document"
+
+    for term in short_terms:
+        where.append(f"{document_column} LIKE %s ESCAPE '\\'")
+        params.append(_like_pattern(term))
+
+    if church_id is not None:
+        where.append(f"{id_column} IN (SELECT individual_id FROM {DOCUMENT_TABLE} WHERE church_id = %s)")
+        params.append(church_id)
+
+    sql += " WHERE " + " AND ".join(where)
+    if ranked:
+        sql += " ORDER BY rank" if long_terms else f" ORDER BY {document_column}"
+    return sql, params
+
+
+def _document_queryset(terms, church_id=None):
+    documents = IndividualSearchDocument.objects.all()
+    for term in terms:
+        documents = documents.filter(document__contains=term)
+    if church_id is not None:
+        documents = documents.filter(church_id=church_id)
+    return documents
+
+
+def filter_individuals(queryset, query, church_id=None):
+    """
+    Narrows an Individual queryset to the members matching the search query
+    (ordering is left to the caller).
+    """
+    terms = normalize(query).split()
+    if not terms:
+        return queryset
+    if _uses_fts():
+        from django.db.models.expressions import RawSQL
+        sql, params = _sqlite_search_sql(terms, church_id)
+        return queryset.filter(pk__in=RawSQL(sql, params))
+    return queryset.filter(pk__in=_document_queryset(terms, church_id).values('individual_id'))
+
+
+def search_individual_ids(query, limit=20, church_id=None):
+    """Returns the IDs of the best `limit` matches, best first."""
+    terms = normalize(query).split()
+    if not terms:
+        return []
+
+    if _uses_fts():
+        sql, params = _sqlite_search_sql(terms, church_id, ranked=True)
+        with connection.cursor() as cursor:
+            cursor.execute(sql + " LIMIT %s", params + [limit])
+            return [row[0] for row in cursor.fetchall()]
+
+    documents = _document_queryset(terms, church_id)
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramSimilarity
+        documents = documents.annotate(
+            similarity=TrigramSimilarity('document', ' '.join(terms))).order_by('-similarity')
+    else:
+        documents = documents.order_by('document')
+    return list(documents.values_list('individual_id', flat=True)[:limit])
+
+
+def search_individuals(query, limit=20, church_id=None):
+    """Same as search_individual_ids() but returns the Individuals (family/church joined)."""
+    ids = search_individual_ids(query, limit, church_id)
+    by_id = Individual.objects.select_related('family', 'church').in_bulk(ids)
+    return [by_id[pk] for pk in ids if pk in by_id]
@@ -0,0 +1,89 @@
+# apps/individual/signals.py
+# Signal handlers nga mo-update sa member search documents (apps/individual/search.py)
+# when an Individual is saved, or when the family/church name it is searched by changes.
+# Deleting an Individual deletes its document by cascade and drops it from the
+# autocomplete prefix index (apps/individual/autocomplete.py).
+# NOTE: QuerySet.update()/bulk_create() do not send signals. After bulk changes,
+# run `python manage.py reindex_members`.
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.church.models import Church
+from apps.family.models import Family
+
+from .autocomplete import notify_deleted
+from .models import Individual
+from .search import update_search_documents
+
+
+def _reindex_on_commit(individual_ids):
+    individual_ids = list(individual_ids)
+    if individual_ids:
+        transaction.on_commit(lambda: update_search_documents(individual_ids))
+
+
+# --- Individual ---
+
+@receiver(post_save, sender=Individual)
+def update_search_document_on_individual_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    update_search_documents([instance.pk])
+
+
+@receiver(post_delete, sender=Individual)
+def drop_individual_from_autocomplete(sender, instance, **kwargs):
+    notify_deleted([instance.pk])
+
+
+# --- Family / Church (their names are part of the members' documents) ---
+
+@receiver(pre_save, sender=Family)
+def remember_family_name(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        return
+    instance._search_previous_name = Family.objects.filter(
+        pk=instance.pk).values_list('family_name', flat=True).first()
+
+
+@receiver(post_save, sender=Family)
+def reindex_family_members(sender, instance, created, raw=False, **kwargs):
+    if raw or created or getattr(instance, '_search_previous_name', None) == instance.family_name:
+        return
+    _reindex_on_commit(instance.members.values_list('pk', flat=True))
+
+
+@receiver(pre_save, sender=Church)
+def remember_church_name(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        return
+    instance._search_previous_name = Church.objects.filter(
+        pk=instance.pk).values_list('name', flat=True).first()
+
+
+@receiver(post_save, sender=Church)
+def reindex_church_members(sender, instance, created, raw=False, **kwargs):
+    if raw or created or getattr(instance, '_search_previous_name', None) == instance.name:
+        return
+    _reindex_on_commit(instance.individuals.values_list('pk', flat=True))
+
+
+# Deleting a family/church sets the members' foreign key to NULL without signals,
+# so remember who they were and drop the old name from their documents afterwards.
+
+@receiver(pre_delete, sender=Family)
+def remember_family_members(sender, instance, **kwargs):
+    instance._search_member_ids = list(instance.members.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Church)
+def remember_church_members(sender, instance, **kwargs):
+    instance._search_member_ids = list(instance.individuals.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Family)
+@receiver(post_delete, sender=Church)
+def reindex_members_after_delete(sender, instance, **kwargs):
+    _reindex_on_commit(getattr(instance, '_search_member_ids', []))
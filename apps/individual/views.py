@@ -4,21 +4,32 @@ from django.views.generic import (
     CreateView, DetailView, ListView, UpdateView, DeleteView, View
 )
 from django.urls import reverse_lazy
-from django.db.models import Q
 from django.http import JsonResponse
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+import hashlib
 import json
+import time
 
 from apps.individual.models import Individual
 from apps.church.models import Church
 from apps.family.models import Family
 # Import PaymentCoveredMember (assuming this is the class name you're using)
 from apps.payment.models import PaymentCoveredMember, Payment
+from apps.payment import ledger
+from apps.report.rollups import COUNTED_PAYMENT_STATUSES
 from apps.individual.forms import IndividualForm
+from apps.individual import autocomplete
+from apps.individual.search import filter_individuals
+from apps.common.pagination import KeysetPaginationMixin
+from apps.common.replica import ReplicaReadMixin
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.shortcuts import get_object_or_404
 
 
-class IndividualListView(ListView):
+class IndividualListView(ReplicaReadMixin, KeysetPaginationMixin, ListView):
     """
     Lists all Individual objects with search functionality.
     """
@@ -26,6 +37,7 @@ class IndividualListView(ListView):
     template_name = 'individual/individual_list.html'
     context_object_name = 'individuals'
     paginate_by = 10
+    keyset_ordering = ('surname', 'given_name', 'id')
 
     def get_queryset(self):
         """
@@ -40,16 +52,8 @@ class IndividualListView(ListView):
 
         search_query = self.request.GET.get('search')
         if search_query:
-            queryset = queryset.filter(
-                Q(given_name__icontains=search_query) |
-                Q(middle_name__icontains=search_query) |
-                Q(surname__icontains=search_query) |
-                Q(contact_number__icontains=search_query) |
-                Q(address__icontains=search_query) |
-                Q(family__family_name__icontains=search_query) |
-                Q(church__name__icontains=search_query) |
-                Q(membership_id__icontains=search_query)
-            )
+            # Uses the member search index (names, contact, address, family, church, ID)
+            queryset = filter_individuals(queryset, search_query)
         return queryset.order_by('surname', 'given_name')
 
 
@@ -109,71 +113,38 @@ class IndividualDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 
 class IndividualDetailView(DetailView):
     """
-    Detailed view for an Individual, designed to efficiently fetch all related
-    payment information using prefetch_related for optimal database performance.
+    Detailed view for an Individual with their payment history: the live entries of
+    the payment ledger (apps/payment/ledger.py), direct payments and allocations
+    together, paginated in the database.
     """
     model = Individual
     template_name = 'individual/individual_detail.html'
     context_object_name = 'individual'
+    query_budget = 15  # Checked by apps/common/instrumentation.py
 
     def get_queryset(self):
-        queryset = Individual.objects.all().prefetch_related(
-            'payments_made__contribution_type',
-            'payments_made__church', # Note: The Payment model doesn't directly link to Church in your provided models.py. This might cause issues later if not handled.
-            # ETO NA ANG SAKTO NA RELATED_NAME!
-            'paymentcoveredmember_set',
-            'paymentcoveredmember_set__payment__contribution_type',
-            'paymentcoveredmember_set__payment__church' # Note: The Payment model doesn't directly link to Church in your provided models.py. This might cause issues later if not handled.
-        )
-        return queryset
+        return Individual.objects.select_related('family', 'church')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         individual = self.object
 
-        combined_payments = []
-
-        # The loop below now correctly accesses 'payments_made'
-        for payment in individual.payments_made.all():
-            combined_payments.append({
-                'payment_type': 'Direct Payment',
-                'receipt_number': payment.or_number,
-                'amount': payment.amount,
-                'allocated_amount': payment.amount, # Amount from the direct payment
-                'date_paid': payment.date_paid,
-                'contribution_type_name': payment.contribution_type.name if payment.contribution_type else 'N/A',
-                'payment_status_display': payment.get_status_display(),
-                'primary_payer_name': individual.full_name,
-                'primary_payer_id': individual.pk,
-                'payment_id': payment.pk,
-            })
-
-        # ETO NA ANG SAKTO NA RELATED_NAME!
-        for allocation in individual.paymentcoveredmember_set.all():
-            combined_payments.append({
-                'payment_type': 'Allocation',
-                'receipt_number': allocation.payment.or_number,
-                'amount': allocation.payment.amount,
-                'allocated_amount': allocation.amount_covered, # Here we access amount_covered from the allocation object
-                'date_paid': allocation.payment.date_paid,
-                'contribution_type_name': allocation.payment.contribution_type.name if allocation.payment.contribution_type else 'N/A',
-                'payment_status_display': allocation.payment.get_status_display(),
-                'primary_payer_name': allocation.payment.individual.full_name if allocation.payment.individual else 'N/A',
-                'primary_payer_id': allocation.payment.individual.pk if allocation.payment.individual else None,
-                'payment_id': allocation.payment.pk,
-            })
-
-        combined_payments.sort(key=lambda x: x['date_paid'], reverse=True)
-
-        context['combined_payments'] = combined_payments
+        history = ledger.history(individual_id=individual.pk)
+        paginator = Paginator(history, getattr(settings, 'LEDGER_PAGE_SIZE', 20))
+        page = paginator.get_page(self.request.GET.get('page'))
+        context['ledger_page'] = page
+        context['ledger_entries'] = page.object_list
+        context['ledger_totals'] = ledger.totals_by(
+            'individual_id', COUNTED_PAYMENT_STATUSES, individual_id=individual.pk).get(individual.pk)
         return context
 
 
-class IndividualListByChurchView(ListView):
+class IndividualListByChurchView(ReplicaReadMixin, KeysetPaginationMixin, ListView):
     model = Individual
     template_name = 'individual/individual_list.html'
     context_object_name = 'individuals'
     paginate_by = 10
+    keyset_ordering = ('surname', 'given_name', 'id')
 
     def get_queryset(self):
         church_id = self.kwargs['church_id']
@@ -184,15 +155,7 @@ class IndividualListByChurchView(ListView):
 
         search_query = self.request.GET.get('search')
         if search_query:
-            queryset = queryset.filter(
-                Q(given_name__icontains=search_query) |
-                Q(middle_name__icontains=search_query) |
-                Q(surname__icontains=search_query) |
-                Q(contact_number__icontains=search_query) |
-                Q(address__icontains=search_query) |
-                Q(family__family_name__icontains=search_query) |
-                Q(membership_id__icontains=search_query)
-            )
+            queryset = filter_individuals(queryset, search_query, church_id=church_id)
         return queryset.order_by('surname', 'given_name')
 
     def get_context_data(self, **kwargs):
@@ -234,32 +197,48 @@ class IndividualCreateForFamilyView(LoginRequiredMixin, CreateView):
 
 
 # NEW CLASS: API View for searching individuals by name or membership ID
-class IndividualSearchAPIView(View):
+class IndividualSearchAPIView(LoginRequiredMixin, View):
     """
-    API endpoint to search for Individual records by full name or membership ID.
-    Returns results as a JSON array suitable for autocomplete/search suggestions.
+    Autocomplete endpoint for the Head of Family search (family_form.html).
+    Answers from the in-process prefix index (apps/individual/autocomplete.py) and
+    supports ETags, so repeated keystrokes for the same text are answered with 304.
+
+    ?query=<text> -> members with a name part (or membership ID) starting with each word
+    ?id=<pk>      -> that one member (used to fill the field when editing a family)
+
+    Response: {"results": [{"id", "text"}], "truncated", "min_query_length", "debounce_ms"}
     """
 
+    def _etag(self, request, *args, **kwargs):
+        # Every change to a member bumps the index version, so this identifies the answer;
+        # the resync period is in it too, for changes whose bump got lost
+        return '"{}:{}:{}:{}:{}"'.format(
+            autocomplete.current_version(),
+            int(time.time() // settings.AUTOCOMPLETE_RESYNC_SECONDS),
+            hashlib.md5(request.GET.get('query', '').strip().lower().encode()).hexdigest()[:12],
+            request.GET.get('id', ''),
+            settings.AUTOCOMPLETE_LIMIT,
+        )
+
     def get(self, request, *args, **kwargs):
-        query = request.GET.get('query', '')
-        individuals = []
-
-        if query:
-            # Search by given name, middle name, surname, or membership_id
-            # Using Q objects for OR conditions
-            results = Individual.objects.filter(
-                Q(given_name__icontains=query) |
-                Q(middle_name__icontains=query) |
-                Q(surname__icontains=query) |
-                Q(membership_id__icontains=query)
-            ).distinct()[:20] # Limit results to top 20 for performance
-
-            for individual in results:
-                individuals.append({
-                    'id': individual.pk,
-                    # Format for display
-                    'text': f"{individual.full_name} ({individual.membership_id})"
-                })
-
-        # safe=False allows non-dict objects (like lists)
-        return JsonResponse(individuals, safe=False)
\ No newline at end of file
+        return condition(etag_func=self._etag)(self._get)(request, *args, **kwargs)
+
+    def _get(self, request, *args, **kwargs):
+        query = request.GET.get('query', '').strip()
+        individual_id = request.GET.get('id', '')
+        results, truncated = [], False
+
+        if individual_id.isdigit():
+            results, truncated = autocomplete.describe([int(individual_id)]), False
+        elif len(query) >= settings.AUTOCOMPLETE_MIN_QUERY_LENGTH:
+            results, truncated = autocomplete.autocomplete(query, limit=settings.AUTOCOMPLETE_LIMIT)
+
+        response = JsonResponse({
+            'results': results,
+            'truncated': truncated,
+            # Hints so the client does not send requests that cannot return anything
+            'min_query_length': settings.AUTOCOMPLETE_MIN_QUERY_LENGTH,
+            'debounce_ms': settings.AUTOCOMPLETE_DEBOUNCE_MS,
+        })
+        patch_cache_control(response, private=True, max_age=settings.AUTOCOMPLETE_MAX_AGE)
+        return response
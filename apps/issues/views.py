@@ -2,6 +2,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
 from django.urls import reverse_lazy
 from apps.issues.models import IssueReport
+from apps.common.pagination import KeysetPaginationMixin
 
 # Admin-only view mixin (checks if user is superuser)
 
@@ -13,20 +14,22 @@ class AdminRequiredMixin(UserPassesTestMixin):
 # 1. Admin list: all issue report
 
 
-class IssueReportListView(LoginRequiredMixin, AdminRequiredMixin, ListView):
+class IssueReportListView(LoginRequiredMixin, AdminRequiredMixin, KeysetPaginationMixin, ListView):
     model = IssueReport
     template_name = 'issues/issue_list.html'
     context_object_name = 'issues'
     paginate_by = 20  # Pagination if you want
+    keyset_ordering = ('-created_at', '-id')  # Newest first
 
 # 2. User’s own issues list
 
 
-class UserIssueListView(LoginRequiredMixin, ListView):
+class UserIssueListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = IssueReport
     template_name = 'issues/user_issue_list.html'
     context_object_name = 'issues'
     paginate_by = 20
+    keyset_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
         return IssueReport.objects.filter(reporter=self.request.user).order_by('-created_at')
@@ -0,0 +1,14 @@
+# apps/payment/apps.py
+
+from django.apps import AppConfig
+
+
+class PaymentConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.payment'
+
+    def ready(self):
+        """
+        Import signals here so the payment ledger is written with every payment change.
+        """
+        import apps.payment.signals  # triggers signal registration
@@ -104,8 +104,10 @@ class PaymentForm(forms.ModelForm):
 
         # If it's a new payment (instance is None or no pk), pre-fill OR number
         if self.instance.pk is None: # Creating a new payment
-            # Check if or_number is already set (e.g., from POST data during validation)
-            if 'or_number' not in self.initial or not self.initial['or_number']:
+            # PaymentCreateView passes the session's reserved number as initial. Only an
+            # unbound form without one peeks at the sequence; a POST never needs it
+            # (the submitted value is used, and Payment.save() allocates a blank one).
+            if not self.is_bound and not self.initial.get('or_number'):
                 self.initial['or_number'] = generate_next_or_number()
         # If it's an existing payment, make the or_number field readonly.
         # This prevents accidental changes to existing OR numbers.
@@ -196,3 +198,22 @@ PaymentCoveredMemberFormSet = inlineformset_factory(
     #     'amount_covered': 'Amount Covered',
     # }
 )
+
+
+class GCashStatementForm(forms.Form):
+    """
+    Upload of a GCash transaction export (CSV) for the bulk validation in apps/payment/gcash.py.
+    """
+    statement = forms.FileField(
+        label="GCash Statement (CSV)",
+        help_text="The transaction history exported from GCash.",
+        widget=forms.ClearableFileInput(attrs={
+            'class': 'file-input file-input-bordered file-input-sm w-full',
+            'accept': '.csv,text/csv',
+        }),
+    )
+    preview = forms.BooleanField(
+        required=False,
+        label="Preview only (validate nothing)",
+        widget=forms.CheckboxInput(attrs={'class': 'checkbox checkbox-sm checkbox-primary'}),
+    )
@@ -0,0 +1,263 @@
+# apps/payment/gcash.py
+# GCash statement reconciliation: i-upload ang GCash transaction export (CSV) ug i-validate
+# tanang pending GCash payments nga mo-match, imbis usa-usa nga click sa Validate.
+#
+#   read_statement()   parses the CSV: finds the header row (exports start with a few title
+#                      lines), the reference column and the amount column (Credit when the
+#                      export has Debit/Credit columns, else Amount). Debit rows are skipped.
+#   reconcile()        loads every GCash payment awaiting validation in one query into a
+#                      {reference: [payments]} map, matches each statement row by reference
+#                      and amount, and validates all matches with batched UPDATEs, in one
+#                      transaction.
+#
+# A row is
+#   matched      one pending payment has its reference and amount
+#   mismatched   pending payments have its reference, but not its amount (or several have both)
+#   unmatched    no pending payment has its reference; the reason says whether a payment
+#                with it was already validated or cancelled
+#   duplicate    its reference already appeared higher up in the statement
+#   invalid      no reference, or an amount that is not a number
+#
+# References are compared without spaces: GCash prints them in groups ("1234 567 890123").
+#
+# Admins and cashiers reconcile every church. Anyone else only sees the payments of members
+# of their assigned churches (church_scope()): a row whose payment belongs to another church
+# is reported as unmatched, with the same reason as a reference nobody has.
+#
+# QuerySet.update() sends no signals, so reconcile() does what the signal handlers would:
+# ledger.sync_payments() for the validated payments and invalidate_dashboard() for their
+# churches. The rollups and dues coverage stay as they are: PENDING and PAID payments are
+# both counted (apps/report/rollups.py).
+
+import csv
+import io
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.report.dashboard_cache import invalidate_dashboard
+
+from . import ledger
+from .models import Payment
+
+REFERENCE_COLUMNS = ('reference no.', 'reference no', 'reference number', 'ref no.', 'ref no', 'reference')
+AMOUNT_COLUMNS = ('credit', 'amount')
+# Title lines before the header row in a GCash export
+HEADER_SEARCH_ROWS = 20
+BATCH_SIZE = 1000
+
+
+class StatementError(Exception):
+    pass
+
+
+@dataclass
+class StatementRow:
+    line: int
+    reference: str
+    amount: Decimal
+
+
+@dataclass
+class Statement:
+    rows: list                                    # StatementRows with a reference and an amount received
+    invalid: list = field(default_factory=list)   # {'line', 'reference', 'amount', 'reason'} of unreadable rows
+    skipped: int = 0                              # debit rows
+
+
+@dataclass
+class Reconciliation:
+    # Each entry is a dict with line, reference, amount and, where there is one, the payment
+    matched: list = field(default_factory=list)
+    mismatched: list = field(default_factory=list)
+    unmatched: list = field(default_factory=list)
+    duplicates: list = field(default_factory=list)
+    invalid: list = field(default_factory=list)
+    skipped: int = 0      # debit rows
+    validated: int = 0    # matched payments validated (0 for a preview)
+
+    @property
+    def rows(self):
+        return (len(self.matched) + len(self.mismatched) + len(self.unmatched)
+                + len(self.duplicates) + len(self.invalid))
+
+
+def normalize_reference(value):
+    return ''.join((value or '').split())
+
+
+def parse_amount(value):
+    """Decimal of '₱1,250.00' / 'PHP 1250' / '1250'; None when blank; raises InvalidOperation."""
+    value = (value or '').replace(',', '').replace('₱', '').replace('PHP', '').strip()
+    if not value:
+        return None
+    return Decimal(value)
+
+
+def _column(header, names):
+    for name in names:
+        if name in header:
+            return header.index(name)
+    return None
+
+
+def read_statement(file, encoding='utf-8-sig'):
+    """The Statement in a GCash CSV export (a binary file). Raises StatementError."""
+    try:
+        lines = list(csv.reader(io.StringIO(file.read().decode(encoding), newline='')))
+    except (UnicodeDecodeError, csv.Error) as error:
+        raise StatementError(f'The file is not a CSV export: {error}')
+
+    for header_index, header in enumerate(lines[:HEADER_SEARCH_ROWS]):
+        header = [name.strip().lower() for name in header]
+        reference_column = _column(header, REFERENCE_COLUMNS)
+        amount_column = _column(header, AMOUNT_COLUMNS)
+        if reference_column is not None and amount_column is not None:
+            break
+    else:
+        raise StatementError('No header row with a reference number and a credit or amount column was found.')
+    credit_only = header[amount_column] == 'credit'
+
+    statement = Statement(rows=[])
+    for line, values in enumerate(lines[header_index + 1:], start=header_index + 2):
+        if not any(value.strip() for value in values):
+            continue
+        reference = normalize_reference(values[reference_column] if reference_column < len(values) else '')
+        raw_amount = values[amount_column] if amount_column < len(values) else ''
+        try:
+            amount = parse_amount(raw_amount)
+        except InvalidOperation:
+            statement.invalid.append({'line': line, 'reference': reference, 'amount': raw_amount,
+                                      'reason': f'Amount "{raw_amount}" is not a number.'})
+            continue
+        if amount is None and credit_only:
+            statement.skipped += 1  # Money sent out
+            continue
+        if not reference:
+            statement.invalid.append({'line': line, 'reference': '', 'amount': raw_amount,
+                                      'reason': 'No reference number.'})
+        elif amount is None or amount <= 0:
+            statement.invalid.append({'line': line, 'reference': reference, 'amount': raw_amount,
+                                      'reason': 'No amount received.'})
+        else:
+            statement.rows.append(StatementRow(line, reference, amount))
+    return statement
+
+
+def church_scope(principal):
+    """The church IDs whose payments the user may reconcile, or None for every church."""
+    if principal.in_group('Admin', 'Cashier'):
+        return None
+    return principal.church_ids
+
+
+def _in_scope(payments, church_ids):
+    if church_ids is None:
+        return payments
+    return payments.filter(individual__church_id__in=church_ids)
+
+
+def pending_by_reference(lock=False, church_ids=None):
+    """
+    {normalized reference: [payment dicts]} of the GCash payments awaiting validation, in
+    one query; only those of members of `church_ids` unless it is None.
+    """
+    payments = _in_scope(Payment.objects.filter(
+        payment_method='GCASH', status='PENDING', is_validated=False, gcash_reference_number__gt=''), church_ids)
+    if lock:
+        payments = payments.select_for_update(of=('self',))
+    pending = {}
+    for payment in payments.values('id', 'or_number', 'amount', 'gcash_reference_number', 'individual__church_id'):
+        pending.setdefault(normalize_reference(payment['gcash_reference_number']), []).append(payment)
+    return pending
+
+
+def _entry(row, payment=None, reason=''):
+    return {
+        'line': row.line,
+        'reference': row.reference,
+        'amount': row.amount,
+        'payment_id': payment['id'] if payment else None,
+        'or_number': payment['or_number'] if payment else '',
+        'payment_amount': payment['amount'] if payment else None,
+        'church_id': payment['individual__church_id'] if payment else None,
+        'reason': reason,
+    }
+
+
+def match(statement, pending, church_ids=None):
+    """Sorts the statement's rows against the pending payments map; nothing is written."""
+    result = Reconciliation(invalid=list(statement.invalid), skipped=statement.skipped)
+    seen = set()
+    for row in statement.rows:
+        if row.reference in seen:
+            result.duplicates.append(_entry(row, reason='Reference already appears higher up in the statement.'))
+            continue
+        seen.add(row.reference)
+        candidates = pending.get(row.reference)
+        if not candidates:
+            result.unmatched.append(_entry(row))
+            continue
+        same_amount = [payment for payment in candidates if payment['amount'] == row.amount]
+        if len(same_amount) == 1:
+            result.matched.append(_entry(row, same_amount[0]))
+        elif same_amount:
+            result.mismatched.append(_entry(
+                row, reason=f'{len(same_amount)} pending payments have this reference and amount.'))
+        else:
+            payment = candidates[0]
+            result.mismatched.append(_entry(
+                row, payment, reason=f'Statement amount {row.amount} differs from OR#{payment["or_number"]} '
+                                     f'({payment["amount"]}).'))
+    _explain_unmatched(result.unmatched, church_ids)
+    return result
+
+
+def _explain_unmatched(entries, church_ids=None):
+    # Looks up the references that have a payment which is not pending any more; payments
+    # of other churches are not looked at, so their rows read like unknown references
+    references = sorted({entry['reference'] for entry in entries})
+    known = {}
+    for start in range(0, len(references), BATCH_SIZE):
+        payments = _in_scope(Payment.objects.filter(
+            gcash_reference_number__in=references[start:start + BATCH_SIZE]
+        ), church_ids).values_list('gcash_reference_number', 'or_number', 'status', 'is_validated')
+        for reference, or_number, status, is_validated in payments:
+            known[normalize_reference(reference)] = (or_number, status, is_validated)
+    for entry in entries:
+        if entry['reference'] not in known:
+            entry['reason'] = 'No GCash payment has this reference.'
+            continue
+        or_number, status, is_validated = known[entry['reference']]
+        entry['or_number'] = or_number
+        if status == 'CANCELLED':
+            entry['reason'] = f'OR#{or_number} was cancelled.'
+        elif is_validated:
+            entry['reason'] = f'OR#{or_number} is already validated.'
+        else:
+            entry['reason'] = f'OR#{or_number} is not a pending GCash payment.'
+
+
+def reconcile(statement, user, apply=True, church_ids=None):
+    """
+    Matches a Statement (read_statement()) to the pending GCash payments (of the members
+    of `church_ids`, see church_scope()) and, when `apply`, validates the matched ones
+    as `user`. Returns a Reconciliation.
+    """
+    with transaction.atomic():
+        # Locked, so a Validate click meanwhile waits instead of validating twice
+        result = match(statement, pending_by_reference(lock=apply, church_ids=church_ids), church_ids)
+        if apply and result.matched:
+            # Every match gets the same values, so a plain UPDATE per batch does it; bulk_update()
+            # would send each row's values in a CASE WHEN of the whole batch
+            now = timezone.now()
+            payment_ids = [entry['payment_id'] for entry in result.matched]
+            for start in range(0, len(payment_ids), BATCH_SIZE):
+                result.validated += Payment.objects.filter(
+                    pk__in=payment_ids[start:start + BATCH_SIZE], status='PENDING', is_validated=False,
+                ).update(status='PAID', is_validated=True, validated_by=user, updated_at=now)
+            ledger.sync_payments(payment_ids, batch_size=BATCH_SIZE)
+            invalidate_dashboard(*{entry['church_id'] for entry in result.matched})
+    return result
@@ -0,0 +1,170 @@
+# apps/payment/ledger.py
+# Ang payment ledger (LedgerEntry): usa ka row kada (individual, payment, allocation)
+# with its amount, date, contribution type and status, copied from the payment.
+#
+#   DIRECT       the payer's own entry, for the whole Payment.amount
+#   ALLOCATION   one per PaymentCoveredMember, for its amount_covered
+#
+# sync_payments() compares the live entries of some payments with what the payments
+# look like now and appends the difference: changed or removed entries are marked
+# superseded and get a reversal row (negated amount), changed or new ones get a fresh
+# entry. Unchanged entries are left alone, so saving a payment twice writes nothing.
+# The signal handlers in apps/payment/signals.py call it inside the transaction of the
+# payment create/update/cancel/delete, and again when a member changes family/church.
+#
+# Member history, family totals and church totals read the live entries through the
+# (individual|family|church, date_paid) indexes: one range scan, paginated in SQL.
+#
+# NOTE: QuerySet.update()/bulk_create() do not send signals. After bulk changes call
+# sync_payments() with the payment ids, or run `python manage.py rebuild_ledger`.
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import LedgerEntry, Payment, PaymentCoveredMember
+
+LIVE = Q(is_reversal=False, superseded_at__isnull=True)
+
+# Columns copied from the payment; an entry whose copy differs is reversed and re-appended
+ENTRY_FIELDS = ('entry_type', 'individual_id', 'family_id', 'church_id', 'payment_id', 'allocation_id',
+                'payer_id', 'or_number', 'amount', 'date_paid', 'contribution_type_id', 'status')
+
+
+def live_entries():
+    return LedgerEntry.objects.filter(LIVE)
+
+
+def expected_entries(payment_ids):
+    """{(payment_id, allocation_id or None): entry fields} the ledger should hold for the payments."""
+    expected = {}
+    direct = (
+        Payment.objects.select_for_update(of=('self',)).filter(pk__in=payment_ids).order_by()
+        .values_list('pk', 'individual_id', 'individual__family_id', 'individual__church_id',
+                     'or_number', 'amount', 'date_paid', 'contribution_type_id', 'status')
+    )
+    for pk, payer_id, family_id, church_id, or_number, amount, date_paid, type_id, status in direct:
+        expected[(pk, None)] = {
+            'entry_type': LedgerEntry.DIRECT, 'individual_id': payer_id, 'family_id': family_id,
+            'church_id': church_id, 'payment_id': pk, 'allocation_id': None, 'payer_id': payer_id,
+            'or_number': or_number, 'amount': amount, 'date_paid': date_paid,
+            'contribution_type_id': type_id, 'status': status,
+        }
+    allocations = (
+        PaymentCoveredMember.objects.filter(payment_id__in=payment_ids).order_by()
+        .values_list('pk', 'payment_id', 'individual_id', 'individual__family_id', 'individual__church_id',
+                     'payment__individual_id', 'payment__or_number', 'amount_covered', 'payment__date_paid',
+                     'payment__contribution_type_id', 'payment__status')
+    )
+    for (pk, payment_id, individual_id, family_id, church_id, payer_id, or_number, amount, date_paid,
+         type_id, status) in allocations:
+        expected[(payment_id, pk)] = {
+            'entry_type': LedgerEntry.ALLOCATION, 'individual_id': individual_id, 'family_id': family_id,
+            'church_id': church_id, 'payment_id': payment_id, 'allocation_id': pk, 'payer_id': payer_id,
+            'or_number': or_number, 'amount': amount, 'date_paid': date_paid,
+            'contribution_type_id': type_id, 'status': status,
+        }
+    return expected
+
+
+def _reversal(entry, now):
+    fields = {name: getattr(entry, name) for name in ENTRY_FIELDS}
+    fields['amount'] = -entry.amount
+    return LedgerEntry(**fields, is_reversal=True, superseded_at=now)
+
+
+def sync_payments(payment_ids, batch_size=1000):
+    """
+    Brings the ledger of the given payments (existing or deleted) up to date.
+    Returns (entries superseded, entries appended).
+    """
+    payment_ids = list(set(payment_ids))
+    if not payment_ids:
+        return 0, 0
+    now = timezone.now()
+    with transaction.atomic():
+        expected = expected_entries(payment_ids)
+        live = {
+            (entry.payment_id, entry.allocation_id): entry
+            for entry in live_entries().filter(payment_id__in=payment_ids)
+        }
+        superseded = []
+        appended = []
+        for key, entry in live.items():
+            fields = expected.get(key)
+            if fields is not None and all(getattr(entry, name) == value for name, value in fields.items()):
+                continue
+            superseded.append(entry.pk)
+            appended.append(_reversal(entry, now))
+        stale = set(superseded)
+        for key, fields in expected.items():
+            if key not in live or live[key].pk in stale:
+                appended.append(LedgerEntry(**fields))
+
+        if superseded:
+            LedgerEntry.objects.filter(pk__in=superseded).update(superseded_at=now)
+        LedgerEntry.objects.bulk_create(appended, batch_size=batch_size)
+    return len(superseded), len(appended)
+
+
+def sync_individual(individual_id, family_id, church_id):
+    """Re-files the live entries of a member who moved to another family or church."""
+    moved = (
+        live_entries().filter(individual_id=individual_id)
+        .exclude(family_id=family_id, church_id=church_id)
+        .values_list('payment_id', flat=True).distinct()
+    )
+    return sync_payments(moved)
+
+
+def rebuild_ledger(batch_size=1000):
+    """
+    Syncs every payment, plus the live entries of payments deleted without signals.
+    Returns (entries superseded, entries appended).
+    """
+    totals = [0, 0]
+
+    def sync(ids):
+        for index, count in enumerate(sync_payments(ids, batch_size=batch_size)):
+            totals[index] += count
+
+    batch = []
+    for pk in Payment.objects.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=batch_size):
+        batch.append(pk)
+        if len(batch) == batch_size:
+            sync(batch)
+            batch = []
+    sync(batch)
+
+    orphans = list(
+        live_entries().exclude(payment_id__in=Payment.objects.values('pk'))
+        .values_list('payment_id', flat=True).distinct()
+    )
+    for start in range(0, len(orphans), batch_size):
+        sync(orphans[start:start + batch_size])
+    return tuple(totals)
+
+
+# --- Reading ---
+
+def history(**filters):
+    """Live entries (newest first) matching e.g. individual_id=..., ready to paginate."""
+    return live_entries().filter(**filters).select_related('payer', 'contribution_type')
+
+
+def totals_by(field, statuses, **filters):
+    """
+    {value of `field`: {'payments_made', 'paid_total', 'allocations', 'allocated_total'}}
+    over the live entries with the given payment statuses, in one grouped query.
+    """
+    direct = Q(entry_type=LedgerEntry.DIRECT)
+    allocation = Q(entry_type=LedgerEntry.ALLOCATION)
+    rows = (
+        live_entries().filter(status__in=statuses, **filters).values(field).annotate(
+            payments_made=Count('id', filter=direct),
+            paid_total=Sum('amount', filter=direct),
+            allocations=Count('id', filter=allocation),
+            allocated_total=Sum('amount', filter=allocation),
+        ).order_by()
+    )
+    return {row.pop(field): row for row in rows}
@@ -0,0 +1,23 @@
+# apps/payment/management/commands/rebuild_ledger.py
+
+from django.core.management.base import BaseCommand
+
+from apps.payment.ledger import rebuild_ledger
+
+
+class Command(BaseCommand):
+    help = ('Compares the payment ledger with every payment and appends the reversals and entries that '
+            'are missing (e.g. after QuerySet.update(), bulk_create() or deletes without signals).')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of payments to sync per transaction (default: 1000).')
+
+    def handle(self, *args, **options):
+        superseded, appended = rebuild_ledger(batch_size=options['batch_size'])
+        if appended:
+            self.stdout.write(self.style.SUCCESS(
+                f'Reversed {superseded} stale entry(ies) and appended {appended} entry(ies).'))
+        else:
+            self.stdout.write(self.style.SUCCESS('The payment ledger matches every payment.'))
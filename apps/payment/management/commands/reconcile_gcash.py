@@ -0,0 +1,51 @@
+# apps/payment/management/commands/reconcile_gcash.py
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.account.principal import get_principal
+from apps.payment.gcash import StatementError, church_scope, read_statement, reconcile
+
+
+class Command(BaseCommand):
+    help = ('Validates the pending GCash payments whose reference number and amount are in a GCash '
+            'transaction export (CSV), like the GCash Statement page (apps/payment/gcash.py), and lists '
+            'the statement rows that did not match. Users who are not Admin or Cashier only reconcile '
+            'their assigned churches.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('statement', help='The CSV exported from GCash.')
+        parser.add_argument('--user', required=True, help='Username recorded as validated_by.')
+        parser.add_argument('--preview', action='store_true', help='Only report what would be validated.')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user named {options["user"]!r}.')
+        try:
+            with open(options['statement'], 'rb') as file:
+                statement = read_statement(file)
+        except (OSError, StatementError) as error:
+            raise CommandError(str(error))
+
+        started = time.perf_counter()
+        # Same churches the user could reconcile on the GCash Statement page
+        result = reconcile(statement, user, apply=not options['preview'],
+                           church_ids=church_scope(get_principal(user)))
+        seconds = time.perf_counter() - started
+
+        for title, entries in (('Amount mismatch', result.mismatched), ('Unmatched', result.unmatched),
+                               ('Duplicate', result.duplicates), ('Invalid', result.invalid)):
+            for entry in entries:
+                self.stdout.write(f'  {title}: line {entry["line"]} {entry["reference"] or "-"} '
+                                  f'{entry["amount"]}  {entry["reason"]}')
+        summary = (f'{result.rows} row(s): {len(result.matched)} matched, {len(result.mismatched)} amount '
+                   f'mismatch, {len(result.unmatched)} unmatched, {len(result.duplicates)} duplicate, '
+                   f'{len(result.invalid)} invalid, {result.skipped} debit row(s) skipped ({seconds:.2f} s).')
+        if options['preview']:
+            self.stdout.write(f'Preview, nothing validated. {summary}')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Validated {result.validated} payment(s). {summary}'))
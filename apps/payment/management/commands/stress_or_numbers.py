@@ -0,0 +1,139 @@
+# apps/payment/management/commands/stress_or_numbers.py
+# Saves payments from many threads at once on a scratch copy of the schema (the same
+# throwaway database the test runner would create), never on the live database: the
+# payments would take real OR numbers and leave reversal rows in the append-only ledger.
+
+import datetime
+import os
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection
+from django.test import override_settings
+
+from apps.church.models import Church
+from apps.contribution_type.models import ContributionType
+from apps.individual.models import Individual
+from apps.payment.models import Payment
+from apps.payment.or_numbers import reserve_or_number
+
+MEMBERS = 50
+
+
+def _release_frames(error):
+    # A failed query's exception and its traceback frames form a reference cycle that holds
+    # the thread's SQLite cursor. Left to the garbage collector, that cursor is freed from
+    # whichever thread happens to collect, which then waits on this thread's connection:
+    # with eight busy writers the run can stall for minutes. Clearing the frames frees it here.
+    while error is not None:
+        traceback.clear_frames(error.__traceback__)
+        error = error.__cause__ or error.__context__
+
+
+class Command(BaseCommand):
+    help = (
+        'Saves payments from many threads at once, the way cashiers do, and checks that every '
+        'save succeeds and no OR number is handed out twice. Runs on a scratch test database '
+        'that is created and dropped by the command; on SQLite it needs SQLITE_TUNING=1.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Number of parallel threads (default: 8).')
+        parser.add_argument('--count', type=int, default=2000, help='Total number of payments (default: 2000).')
+        parser.add_argument(
+            '--busy-timeout', type=int, default=30000,
+            help='SQLite busy_timeout of the scratch database in ms (default: 30000). The threads save '
+                 'back to back, so a writer can queue longer than a cashier ever would.')
+        parser.add_argument(
+            '--reserve', action='store_true',
+            help='Reserve each number for the thread\'s session first, like the payment form does.')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.settings_dict['ENGINE'] != 'apps.common.sqlite_tuned':
+            # Without WAL and BEGIN IMMEDIATE, writers that queue up longer than the default
+            # 5 s give up with "database is locked"; that is a deployment setting, not a bug
+            raise CommandError('Run with SQLITE_TUNING=1 (apps/common/sqlite_tuning.py): the stress '
+                               'test needs WAL, busy_timeout and immediate transactions on SQLite.')
+
+        scratch_dir = tempfile.mkdtemp(prefix='stress_or_numbers-')
+        if connection.vendor == 'sqlite':
+            # A file, not the test runner's shared-cache memory database: that one locks
+            # whole tables and fails at once instead of waiting for busy_timeout
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(scratch_dir, 'stress.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f'Scratch database: {connection.settings_dict["NAME"]}')
+            with override_settings(SQLITE_BUSY_TIMEOUT_MS=options['busy_timeout']):
+                saved, errors, elapsed = self._run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(scratch_dir, ignore_errors=True)  # SQLite's -wal and -shm files
+
+        threads = options['threads']
+        duplicates = [number for number, seen in Counter(saved).items() if seen > 1]
+        self.stdout.write(
+            f'{len(saved)} payment(s) saved from {threads} thread(s) in {elapsed:.2f}s '
+            f'({len(saved) / elapsed:.0f}/s)')
+        for name, count in errors.items():
+            self.stderr.write(self.style.ERROR(f'  {name}: {count}'))
+        if duplicates:
+            raise CommandError(f'{len(duplicates)} duplicate OR number(s), e.g. {duplicates[:5]}')
+        if errors:
+            raise CommandError('Payment saves failed (see above).')
+        self.stdout.write(self.style.SUCCESS('Every payment saved, no duplicate OR numbers.'))
+
+    def _run(self, options):
+        threads = options['threads']
+        per_thread = max(1, options['count'] // threads)
+
+        church = Church.objects.create(name='Stress Test Church')
+        contribution_type = ContributionType.objects.create(name='Stress Test')
+        members = [
+            Individual.objects.create(given_name=f'Member {number}', surname='Stress', sex='MALE',
+                                      relationship='HEAD', church=church).pk
+            for number in range(MEMBERS)
+        ]
+
+        saved = []
+        errors = Counter()
+        lock = threading.Lock()
+
+        def worker(index):
+            session_key = f'stress-{index}'
+            taken = []
+            try:
+                for number in range(per_thread):
+                    payment = Payment(
+                        individual_id=members[number % len(members)], contribution_type=contribution_type,
+                        amount=1, date_paid=datetime.date.today(), payment_method='CASH', status='PAID',
+                    )
+                    try:
+                        if options['reserve']:
+                            payment.or_number = reserve_or_number(session_key)
+                            payment._or_session_key = session_key
+                        payment.save()
+                        taken.append(payment.or_number)
+                    except IntegrityError:
+                        with lock:
+                            errors['IntegrityError'] += 1
+                    except Exception as exc:  # Report every other failure too (e.g. "database is locked")
+                        with lock:
+                            errors[f'{type(exc).__name__}: {exc}'] += 1
+                        _release_frames(exc)
+            finally:
+                connection.close()  # Each thread has its own connection
+            with lock:
+                saved.extend(taken)
+
+        started = time.perf_counter()
+        pool = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        return saved, errors, time.perf_counter() - started
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.23 on 2026-10-18 07:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('payment', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ORSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('series', models.CharField(max_length=50, unique=True, verbose_name='Series')),
+                ('next_number', models.BigIntegerField(verbose_name='Next OR Number')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'OR Sequence',
+                'verbose_name_plural': 'OR Sequences',
+            },
+        ),
+        migrations.CreateModel(
+            name='ORReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('series', models.CharField(max_length=50, verbose_name='Series')),
+                ('number', models.BigIntegerField(verbose_name='OR Number')),
+                ('session_key', models.CharField(blank=True, max_length=40, verbose_name='Session Key')),
+                ('reserved_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(verbose_name='Expires At')),
+                ('reserved_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='or_reservations', to=settings.AUTH_USER_MODEL, verbose_name='Reserved By')),
+            ],
+            options={
+                'verbose_name': 'OR Reservation',
+                'verbose_name_plural': 'OR Reservations',
+                'ordering': ['series', 'number'],
+                'unique_together': {('series', 'number')},
+            },
+        ),
+    ]
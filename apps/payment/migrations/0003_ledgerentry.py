@@ -0,0 +1,82 @@
+# Generated by Django 4.2.23 on 2026-10-18 08:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 2000
+
+
+def fill_ledger(apps, schema_editor):
+    LedgerEntry = apps.get_model('payment', 'LedgerEntry')
+    Payment = apps.get_model('payment', 'Payment')
+    PaymentCoveredMember = apps.get_model('payment', 'PaymentCoveredMember')
+
+    def entries():
+        for row in Payment.objects.order_by().values(
+                'pk', 'individual_id', 'individual__family_id', 'individual__church_id', 'or_number',
+                'amount', 'date_paid', 'contribution_type_id', 'status').iterator(chunk_size=BATCH_SIZE):
+            yield LedgerEntry(
+                entry_type='DIRECT', individual_id=row['individual_id'], family_id=row['individual__family_id'],
+                church_id=row['individual__church_id'], payment_id=row['pk'], payer_id=row['individual_id'],
+                or_number=row['or_number'], amount=row['amount'], date_paid=row['date_paid'],
+                contribution_type_id=row['contribution_type_id'], status=row['status'])
+        for row in PaymentCoveredMember.objects.order_by().values(
+                'pk', 'payment_id', 'individual_id', 'individual__family_id', 'individual__church_id',
+                'payment__individual_id', 'payment__or_number', 'amount_covered', 'payment__date_paid',
+                'payment__contribution_type_id', 'payment__status').iterator(chunk_size=BATCH_SIZE):
+            yield LedgerEntry(
+                entry_type='ALLOCATION', individual_id=row['individual_id'], family_id=row['individual__family_id'],
+                church_id=row['individual__church_id'], payment_id=row['payment_id'], allocation_id=row['pk'],
+                payer_id=row['payment__individual_id'], or_number=row['payment__or_number'],
+                amount=row['amount_covered'], date_paid=row['payment__date_paid'],
+                contribution_type_id=row['payment__contribution_type_id'], status=row['payment__status'])
+
+    batch = []
+    for entry in entries():
+        batch.append(entry)
+        if len(batch) == BATCH_SIZE:
+            LedgerEntry.objects.bulk_create(batch)
+            batch = []
+    LedgerEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('individual', '0004_individualsearchdocument_updated_at_index'),
+        ('church', '0002_member_counters'),
+        ('contribution_type', '0001_initial'),
+        ('family', '0004_member_counters'),
+        ('payment', '0002_orsequence_orreservation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_type', models.CharField(choices=[('DIRECT', 'Direct Payment'), ('ALLOCATION', 'Allocation')], max_length=10, verbose_name='Entry Type')),
+                ('or_number', models.CharField(max_length=50, verbose_name='Official Receipt Number')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Amount')),
+                ('date_paid', models.DateField(verbose_name='Date Paid')),
+                ('status', models.CharField(max_length=10, verbose_name='Payment Status')),
+                ('is_reversal', models.BooleanField(default=False, verbose_name='Is Reversal?')),
+                ('superseded_at', models.DateTimeField(blank=True, null=True, verbose_name='Superseded At')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('allocation', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to='payment.paymentcoveredmember', verbose_name='Allocation')),
+                ('church', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to='church.church', verbose_name='Church')),
+                ('contribution_type', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='contribution_type.contributiontype', verbose_name='Contribution Type')),
+                ('family', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to='family.family', verbose_name='Family')),
+                ('individual', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to='individual.individual', verbose_name='Individual')),
+                ('payer', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='individual.individual', verbose_name='Payer')),
+                ('payment', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to='payment.payment', verbose_name='Payment')),
+            ],
+            options={
+                'verbose_name': 'Ledger Entry',
+                'verbose_name_plural': 'Ledger Entries',
+                'ordering': ['-date_paid', '-id'],
+                'indexes': [models.Index(fields=['individual', 'date_paid'], name='ledger_individual_date_idx'), models.Index(fields=['family', 'date_paid'], name='ledger_family_date_idx'), models.Index(fields=['church', 'date_paid'], name='ledger_church_date_idx'), models.Index(fields=['payment'], name='ledger_payment_idx')],
+            },
+        ),
+        migrations.RunPython(fill_ledger, migrations.RunPython.noop),
+    ]
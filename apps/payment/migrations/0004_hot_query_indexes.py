@@ -0,0 +1,21 @@
+# Generated by Django 4.2.23 on 2026-10-18 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment', '0003_ledgerentry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['date_paid'], name='payment_date_paid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'date_paid'], name='payment_status_date_idx'),
+        ),
+    ]
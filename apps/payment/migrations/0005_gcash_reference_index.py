@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment', '0004_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['gcash_reference_number'], name='payment_gcash_ref_idx'),
+        ),
+    ]
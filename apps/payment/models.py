@@ -1,6 +1,6 @@
 # apps/payment/models.py (Corrected Version)
 
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from apps.church.models import Church # Import Church model - assuming still needed for other models in the future, or delete if not.
 # No direct import of Individual or ContributionType here due to string references.
@@ -74,22 +74,35 @@ class Payment(models.Model):
         verbose_name_plural = "Payments"
         # Updated ordering to use 'date_paid'
         ordering = ['-date_paid', 'or_number'] 
+        # Proposed by `manage.py advise_indexes` on the synthetic dataset
+        indexes = [
+            # Latest payments first (the default ordering, dashboard "Recent Payments")
+            models.Index(fields=['date_paid'], name='payment_date_paid_idx'),
+            # Counted payments (status IN ...) of a date range: exports, monthly totals
+            models.Index(fields=['status', 'date_paid'], name='payment_status_date_idx'),
+            # GCash statement rows looked up by reference number (apps/payment/gcash.py)
+            models.Index(fields=['gcash_reference_number'], name='payment_gcash_ref_idx'),
+        ]
 
     def __str__(self):
         # Using 'amount' now
         return f"OR #{self.or_number} - {self.amount} ({self.get_payment_method_display()})"
 
     def save(self, *args, **kwargs):
-        # Auto-generate OR number if not set (or is empty string)
-        if not self.or_number:
-            last_payment = Payment.objects.order_by('-or_number').first()
-            if last_payment and last_payment.or_number.isdigit():
-                # Assuming OR numbers are purely numeric like 2000134
-                next_or_number = int(last_payment.or_number) + 1
-            else:
-                next_or_number = 2000001 # Starting OR number for KADAMAY project
-            self.or_number = str(next_or_number)
-        super().save(*args, **kwargs)
+        # Imported here because or_numbers.py imports this module
+        from .or_numbers import allocate_or_number, consume_or_number, payment_series
+
+        with transaction.atomic():
+            # Auto-generate OR number if not set (or is empty string)
+            if not self.or_number:
+                self.or_number = allocate_or_number(payment_series())
+            elif self._state.adding:
+                # OR number was reserved (or typed in manually): release the reservation
+                # and make sure the sequence never hands this number out again. Views set
+                # _or_session_key so the cashier's own reservation is accepted; a number
+                # another session holds raises ORNumberReserved.
+                consume_or_number(self.or_number, payment_series(), getattr(self, '_or_session_key', None))
+            super().save(*args, **kwargs)
 
 class PaymentCoveredMember(models.Model):
     """
@@ -128,4 +141,124 @@ class PaymentCoveredMember(models.Model):
             except Exception:
                 pass # If Individual object cannot be retrieved or has no name
 
-        return f"Payment OR#{self.payment.or_number} for {individual_name} - {self.amount_covered}"
\ No newline at end of file
+        return f"Payment OR#{self.payment.or_number} for {individual_name} - {self.amount_covered}"
+
+
+class ORSequence(models.Model):
+    """
+    Counter for Official Receipt numbers, one row per series.
+    `next_number` is the next number that has never been handed out.
+    Only apps/payment/or_numbers.py should touch this table.
+    """
+    series = models.CharField(max_length=50, unique=True, verbose_name="Series")
+    next_number = models.BigIntegerField(verbose_name="Next OR Number")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "OR Sequence"
+        verbose_name_plural = "OR Sequences"
+
+    def __str__(self):
+        return f"{self.series}: next OR #{self.next_number}"
+
+
+class ORReservation(models.Model):
+    """
+    An OR number handed out to a cashier's session (shown on the payment form) but not
+    used by a saved Payment yet. Expired reservations are given out again, so numbers
+    from abandoned forms do not leave gaps in the series.
+    """
+    series = models.CharField(max_length=50, verbose_name="Series")
+    number = models.BigIntegerField(verbose_name="OR Number")
+    session_key = models.CharField(max_length=40, blank=True, verbose_name="Session Key")
+    reserved_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='or_reservations', verbose_name="Reserved By"
+    )
+    reserved_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(verbose_name="Expires At")
+
+    class Meta:
+        verbose_name = "OR Reservation"
+        verbose_name_plural = "OR Reservations"
+        unique_together = ('series', 'number')
+        ordering = ['series', 'number']
+
+    def __str__(self):
+        return f"OR #{self.number} ({self.series}) reserved until {self.expires_at:%Y-%m-%d %H:%M}"
+
+
+class LedgerEntry(models.Model):
+    """
+    Append-only payment ledger: one row per (individual, payment, allocation), written
+    by apps/payment/ledger.py in the same transaction as the payment change.
+    A change never edits a row: the old entry is marked superseded and a reversal
+    (negated amount) plus the new entry are appended. "Live" entries are the ones
+    that are neither reversals nor superseded.
+
+    The foreign keys have no database constraint and do nothing on delete, so the
+    history (and its reversals) outlives deleted payments and members.
+    """
+    DIRECT = 'DIRECT'
+    ALLOCATION = 'ALLOCATION'
+    ENTRY_TYPE_CHOICES = [
+        (DIRECT, 'Direct Payment'),
+        (ALLOCATION, 'Allocation'),
+    ]
+
+    entry_type = models.CharField(max_length=10, choices=ENTRY_TYPE_CHOICES, verbose_name="Entry Type")
+    individual = models.ForeignKey(
+        'individual.Individual', on_delete=models.DO_NOTHING, db_constraint=False,
+        related_name='ledger_entries', verbose_name="Individual"
+    )
+    # Family and church of the individual, so family/church totals are range scans too
+    family = models.ForeignKey(
+        'family.Family', on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        related_name='ledger_entries', verbose_name="Family"
+    )
+    church = models.ForeignKey(
+        Church, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        related_name='ledger_entries', verbose_name="Church"
+    )
+    payment = models.ForeignKey(
+        Payment, on_delete=models.DO_NOTHING, db_constraint=False,
+        related_name='ledger_entries', verbose_name="Payment"
+    )
+    allocation = models.ForeignKey(
+        PaymentCoveredMember, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        related_name='ledger_entries', verbose_name="Allocation"
+    )
+    payer = models.ForeignKey(
+        'individual.Individual', on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        related_name='+', verbose_name="Payer"
+    )
+    or_number = models.CharField(max_length=50, verbose_name="Official Receipt Number")
+    amount = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Amount")
+    date_paid = models.DateField(verbose_name="Date Paid")
+    contribution_type = models.ForeignKey(
+        'contribution_type.ContributionType', on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, related_name='+', verbose_name="Contribution Type"
+    )
+    status = models.CharField(max_length=10, verbose_name="Payment Status")
+
+    is_reversal = models.BooleanField(default=False, verbose_name="Is Reversal?")
+    superseded_at = models.DateTimeField(null=True, blank=True, verbose_name="Superseded At")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Ledger Entry"
+        verbose_name_plural = "Ledger Entries"
+        ordering = ['-date_paid', '-id']
+        indexes = [
+            models.Index(fields=['individual', 'date_paid'], name='ledger_individual_date_idx'),
+            models.Index(fields=['family', 'date_paid'], name='ledger_family_date_idx'),
+            models.Index(fields=['church', 'date_paid'], name='ledger_church_date_idx'),
+            models.Index(fields=['payment'], name='ledger_payment_idx'),
+        ]
+
+    def __str__(self):
+        sign = "Reversal of " if self.is_reversal else ""
+        return f"{sign}{self.get_entry_type_display()} OR #{self.or_number} - {self.amount}"
+
+    def get_status_display(self):
+        return dict(Payment.PAYMENT_STATUS_CHOICES).get(self.status, self.status.title())
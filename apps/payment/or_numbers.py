@@ -0,0 +1,194 @@
+# apps/payment/or_numbers.py
+# Official Receipt (O.R.) number allocator.
+#
+# Every series has one ORSequence counter row. Every allocation starts its transaction
+# with a write to that row (_lock_sequence), before reading anything: it takes the row
+# lock on PostgreSQL and the database write lock on SQLite. Allocations of a series run
+# one after the other, two cashiers can never get the same number, and a SQLite
+# transaction never holds a read lock it later has to upgrade (that upgrade fails at once
+# with "database is locked" when another connection is writing). Numbers are then taken
+# with `UPDATE ... SET next_number = next_number + n` and a read of the new value.
+#
+# Cashier sessions get a small block of numbers at once (ORReservation rows). The form
+# shows the lowest one; saving a Payment with it deletes the reservation. A number typed
+# in by hand that another session holds is refused (ORNumberReserved), so that cashier's
+# form keeps working. Reservations that expire unused are handed out again before the
+# counter moves, so abandoned forms do not leave gaps in the series.
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, F, Max
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import ORReservation, ORSequence, Payment
+
+DEFAULT_SERIES = 'default'
+FIRST_OR_NUMBER = 2000001  # Starting OR number for KADAMAY project
+
+
+def payment_series():
+    """The series Payment.save() and the payment form take numbers from."""
+    return getattr(settings, 'OR_NUMBER_SERIES', DEFAULT_SERIES)
+
+
+def _block_size():
+    return getattr(settings, 'OR_NUMBER_BLOCK_SIZE', 10)
+
+
+def _reservation_ttl():
+    return timedelta(seconds=getattr(settings, 'OR_NUMBER_RESERVATION_TTL', 8 * 60 * 60))
+
+
+class ORNumberReserved(ValidationError):
+    """The OR number is reserved for another cashier's session."""
+
+
+def _lock_sequence(series):
+    """
+    Locks the counter row of a series for the rest of the transaction; must be its first
+    statement. The row is created the first time a series is used, starting after the
+    highest numeric OR number already saved (so existing data never collides).
+    """
+    # A write that changes nothing: the UPDATE takes the lock, unlike a SELECT on SQLite
+    if ORSequence.objects.filter(series=series).update(next_number=F('next_number')):
+        return
+    highest = Payment.objects.filter(or_number__regex=r'^[0-9]+$').aggregate(
+        highest=Max(Cast('or_number', BigIntegerField()))
+    )['highest']
+    try:
+        with transaction.atomic():
+            ORSequence.objects.create(
+                series=series,
+                next_number=max(FIRST_OR_NUMBER, (highest or 0) + 1),
+            )
+    except IntegrityError:
+        # Another request created it first; wait for its lock
+        ORSequence.objects.filter(series=series).update(next_number=F('next_number'))
+
+
+def _take_from_counter(series, count):
+    """Moves the (locked) counter forward by `count` and returns the numbers taken."""
+    ORSequence.objects.filter(series=series).update(next_number=F('next_number') + count)
+    end = ORSequence.objects.filter(series=series).values_list('next_number', flat=True).get()
+    return list(range(end - count, end))
+
+
+def _reclaim_expired(series, count):
+    """Takes up to `count` expired reservations (lowest numbers first); the series is locked."""
+    now = timezone.now()
+    candidates = ORReservation.objects.filter(
+        series=series, expires_at__lt=now
+    ).order_by('number').values_list('pk', 'number')[:count]
+
+    candidates = list(candidates)
+    ORReservation.objects.filter(pk__in=[pk for pk, _ in candidates]).delete()
+    numbers = [number for _, number in candidates]
+
+    if numbers:
+        # Safety net: drop numbers that were used without going through consume_or_number()
+        used = set(Payment.objects.filter(
+            or_number__in=[str(number) for number in numbers]
+        ).values_list('or_number', flat=True))
+        numbers = [number for number in numbers if str(number) not in used]
+    return numbers
+
+
+def allocate_block(series=DEFAULT_SERIES, count=1):
+    """
+    Returns `count` OR numbers (ints) that nobody else will get: expired reservations
+    first, then fresh numbers from the counter.
+    """
+    with transaction.atomic():
+        _lock_sequence(series)
+        numbers = _reclaim_expired(series, count)
+        if len(numbers) < count:
+            numbers.extend(_take_from_counter(series, count - len(numbers)))
+    return sorted(numbers)
+
+
+def allocate_or_number(series=DEFAULT_SERIES):
+    """Allocates one OR number for a Payment saved without one."""
+    return str(allocate_block(series, 1)[0])
+
+
+def reserve_or_number(session_key, user=None, series=DEFAULT_SERIES):
+    """
+    Returns the OR number to show on a cashier's payment form.
+    The session keeps its block of reserved numbers until they are used or expire, so
+    reloading the form does not burn numbers and two cashiers never see the same one.
+    """
+    now = timezone.now()
+    reserved = ORReservation.objects.filter(
+        series=series, session_key=session_key, expires_at__gte=now
+    ).order_by('number').values_list('number', flat=True).first()
+    if reserved is not None:
+        return str(reserved)
+
+    with transaction.atomic():
+        numbers = allocate_block(series, _block_size())
+        ORReservation.objects.bulk_create([
+            ORReservation(
+                series=series,
+                number=number,
+                session_key=session_key,
+                reserved_by=user if user is not None and user.is_authenticated else None,
+                expires_at=now + _reservation_ttl(),
+            )
+            for number in numbers
+        ])
+    return str(numbers[0])
+
+
+def reserve_or_number_for_request(request, series=None):
+    """reserve_or_number() for the current request's session."""
+    if not request.session.session_key:
+        request.session.save()
+    return reserve_or_number(request.session.session_key, request.user, series or payment_series())
+
+
+def consume_or_number(or_number, series=DEFAULT_SERIES, session_key=None):
+    """
+    Called when a Payment is saved with an OR number given by the form (reserved or
+    typed in manually): drops its reservation and moves the counter past it if needed.
+    Raises ORNumberReserved when another session (not `session_key`) holds the number.
+    """
+    or_number = str(or_number).strip()
+    if not or_number.isdigit():
+        return
+    number = int(or_number)
+
+    with transaction.atomic():
+        _lock_sequence(series)
+        holder = ORReservation.objects.filter(
+            series=series, number=number, expires_at__gte=timezone.now()
+        ).values_list('session_key', flat=True).first()
+        if holder is not None and holder != session_key:
+            raise ORNumberReserved(
+                f'OR number {or_number} is reserved for another cashier; use the number on your form.',
+                code='reserved')
+        # Own or expired reservation
+        ORReservation.objects.filter(series=series, number=number).delete()
+        ORSequence.objects.filter(series=series, next_number__lte=number).update(next_number=number + 1)
+
+
+def peek_next_or_number(series=DEFAULT_SERIES):
+    """
+    Returns the number the allocator would most likely give out next, without reserving it.
+    For display only; use reserve_or_number()/allocate_or_number() to actually get one.
+    """
+    expired = ORReservation.objects.filter(
+        series=series, expires_at__lt=timezone.now()
+    ).order_by('number').values_list('number', flat=True).first()
+    if expired is not None:
+        return str(expired)
+    next_number = ORSequence.objects.filter(series=series).values_list('next_number', flat=True).first()
+    if next_number is None:
+        # First use of the series: create its counter row
+        with transaction.atomic():
+            _lock_sequence(series)
+        next_number = ORSequence.objects.filter(series=series).values_list('next_number', flat=True).get()
+    return str(next_number)
@@ -0,0 +1,61 @@
+# apps/payment/signals.py
+# Signal handlers nga mo-sulat sa payment ledger (apps/payment/ledger.py) in the same
+# transaction as every Payment/PaymentCoveredMember save or delete, and when a member
+# moves to another family or church. Deleting a Family or Church moves its members too
+# (SET_NULL, an UPDATE without signals): their entries are re-filed once that commits.
+# NOTE: QuerySet.update()/bulk_create() do not send signals. After bulk changes,
+# run `python manage.py rebuild_ledger`.
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.church.models import Church
+from apps.family.models import Family
+from apps.individual.models import Individual
+
+from . import ledger
+from .models import Payment, PaymentCoveredMember
+
+# Payments re-filed per sync_payments() call after a Family/Church delete
+REFILE_BATCH_SIZE = 1000
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def record_payment_in_ledger(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    ledger.sync_payments([instance.pk])
+
+
+@receiver(post_save, sender=PaymentCoveredMember)
+@receiver(post_delete, sender=PaymentCoveredMember)
+def record_allocation_in_ledger(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    ledger.sync_payments([instance.payment_id])
+
+
+@receiver(post_save, sender=Individual)
+def refile_ledger_on_individual_save(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    ledger.sync_individual(instance.pk, instance.family_id, instance.church_id)
+
+
+@receiver(pre_delete, sender=Family)
+@receiver(pre_delete, sender=Church)
+def refile_ledger_on_family_or_church_delete(sender, instance, **kwargs):
+    # The members' family/church is only cleared after this, so the payments are collected now
+    field = 'family_id' if sender is Family else 'church_id'
+    payment_ids = list(
+        ledger.live_entries().filter(**{field: instance.pk}).values_list('payment_id', flat=True).distinct())
+    if not payment_ids:
+        return
+
+    def refile():
+        for start in range(0, len(payment_ids), REFILE_BATCH_SIZE):
+            ledger.sync_payments(payment_ids[start:start + REFILE_BATCH_SIZE])
+
+    transaction.on_commit(refile)
@@ -9,6 +9,7 @@ from .views import (
     PaymentDeleteView,
     PaymentValidateView,
     PaymentCancelView,
+    GCashReconcileView,
     # These are the new class-based API views:
     IndividualSearchAPIView,
     GetFamilyMembersAPIView,
@@ -29,9 +30,10 @@ urlpatterns = [
     path('<int:pk>/update/', PaymentUpdateView.as_view(), name='payment_update'),
     path('<int:pk>/delete/', PaymentDeleteView.as_view(), name='payment_delete'),
     
-    # Specific Payment Actions (Validate, Cancel)
+    # Specific Payment Actions (Validate, Cancel, bulk GCash validation)
     path('<int:pk>/validate/', PaymentValidateView.as_view(), name='payment_validate'),
     path('<int:pk>/cancel/', PaymentCancelView.as_view(), name='payment_cancel'),
+    path('gcash/reconcile/', GCashReconcileView.as_view(), name='gcash_reconcile'),
 
     # NEW/UPDATED API Endpoints for dynamic data fetching (e.g., for forms via AJAX)
     # Using .as_view() for class-based views
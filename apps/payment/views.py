@@ -1,7 +1,7 @@
 # apps/payment/views.py (Corrected Version)
 
 from django.shortcuts import render, redirect, get_object_or_404
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, FormView
 from django.urls import reverse_lazy
 from django.db import transaction # Para sa atomic operations
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
@@ -14,14 +14,19 @@ from django.views import View # Import View for class-based API views
 from django.forms import inlineformset_factory # Para sa formsets
 
 # Import Models from other apps
+from apps.account.principal import principal_for
 from apps.individual.models import Individual
+from apps.individual.search import filter_individuals # Member search index, for IndividualSearchAPIView
 from apps.family.models import FamilyMember # Needed for GetFamilyMembersAPIView
 from apps.contribution_type.models import ContributionType
 
 # Import Models and Forms from the current payment app
 from .models import Payment, PaymentCoveredMember
-from .forms import PaymentForm, CoveredMemberForm # CoveredMemberForm is now a defined class as per previous fix
-from .utils import generate_next_or_number # For OR number generation
+from .forms import PaymentForm, CoveredMemberForm, GCashStatementForm # CoveredMemberForm is now a defined class as per previous fix
+from .gcash import StatementError, church_scope, read_statement, reconcile # Bulk GCash validation from a statement
+from .or_numbers import ORNumberReserved, reserve_or_number_for_request # For OR number reservation
+from apps.common.pagination import InvalidCursor, KeysetPaginationMixin, page_from_request # ?after=/?before= cursors instead of ?page=
+from apps.common.replica import ReplicaReadMixin # List reads from the read replica, when there is one
 
 # --- Custom Mixin for KADAMAY Role-Based Access Control ---
 class KadamayRoleRequiredMixin(UserPassesTestMixin):
@@ -32,17 +37,11 @@ class KadamayRoleRequiredMixin(UserPassesTestMixin):
     required_roles = [] # List of role names (strings) allowed to access the view
 
     def test_func(self):
-        user = self.request.user
-        if not user.is_authenticated:
+        # request.principal: roles resolved once per request (apps/account/principal.py)
+        principal = principal_for(self.request)
+        if not principal.is_authenticated:
             return False
-        if user.is_superuser: # Superusers always have access
-            return True
-
-        user_groups = user.groups.values_list('name', flat=True)
-        for role_name in self.required_roles:
-            if role_name in user_groups:
-                return True
-        return False
+        return principal.in_group(*self.required_roles) # Superusers always have access
 
     def handle_no_permission(self):
         messages.warning(
@@ -52,11 +51,12 @@ class KadamayRoleRequiredMixin(UserPassesTestMixin):
 
 
 # --- Payment List View ---
-class PaymentListView(LoginRequiredMixin, KadamayRoleRequiredMixin, ListView):
+class PaymentListView(LoginRequiredMixin, KadamayRoleRequiredMixin, ReplicaReadMixin, KeysetPaginationMixin, ListView):
     model = Payment
     template_name = 'payment/payment_list.html'
     context_object_name = 'payments'
     paginate_by = 10
+    keyset_ordering = ('-or_number', '-id')  # Newest OR number first; one direction, so cursors seek by row value
 
     required_roles = ['Admin', 'Cashier', 'In-Charge'] # Define roles for the mixin
 
@@ -65,17 +65,17 @@ class PaymentListView(LoginRequiredMixin, KadamayRoleRequiredMixin, ListView):
         
         # Optimize query for related data
         queryset = queryset.select_related(
-            'individual', 'contribution_type', 'collected_by', 'validated_by', 'cancelled_by'
+            'individual', 'contribution_type', 'collected_by', 'validated_by'
         ).prefetch_related(
             'covered_members__individual'
         )
 
         user = self.request.user
-        user_groups = user.groups.values_list('name', flat=True)
+        principal = principal_for(self.request)
 
-        if user.is_superuser or 'Admin' in user_groups or 'Cashier' in user_groups:
+        if principal.in_group('Admin', 'Cashier'):
             return queryset # Admin and Cashier see all payments
-        elif 'In-Charge' in user_groups:
+        elif principal.in_group('In-Charge'):
             # In-Charge sees payments they collected AND GCash payments pending validation
             return queryset.filter(
                 Q(collected_by=user) | # Payments they collected
@@ -86,7 +86,7 @@ class PaymentListView(LoginRequiredMixin, KadamayRoleRequiredMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['user_groups'] = self.request.user.groups.values_list('name', flat=True)
+        context['user_groups'] = principal_for(self.request).groups
         return context
 
 # --- Payment Detail View ---
@@ -134,8 +134,10 @@ class PaymentCreateView(LoginRequiredMixin, KadamayRoleRequiredMixin, CreateView
             )
         else:
             # For GET requests, instantiate empty forms
-            context['form'] = PaymentForm()
-            # The OR number is now handled in PaymentForm's __init__ for new instances.
+            # Pre-fill the OR number reserved for this cashier's session so two cashiers
+            # never get the same number (see apps/payment/or_numbers.py)
+            context['form'] = PaymentForm(
+                initial={'or_number': reserve_or_number_for_request(self.request)})
             
             context['covered_member_formset'] = self.PaymentCoveredMemberInlineFormSet(instance=self.object)
         return context
@@ -156,8 +158,16 @@ class PaymentCreateView(LoginRequiredMixin, KadamayRoleRequiredMixin, CreateView
         context = self.get_context_data()
         covered_member_formset = context['covered_member_formset']
 
+        # The OR number reserved for this session is the cashier's own (apps/payment/or_numbers.py)
+        form.instance._or_session_key = self.request.session.session_key
+
         with transaction.atomic(): # Ensure both payment and covered members are saved or none
-            self.object = form.save() # Save the main Payment instance first
+            try:
+                self.object = form.save() # Save the main Payment instance first
+            except ORNumberReserved as error:
+                # Typed in by hand, but another cashier's form is showing it
+                form.add_error('or_number', error)
+                return self.form_invalid(form)
 
             if covered_member_formset.is_valid():
                 covered_member_formset.instance = self.object # Link formset to the saved Payment
@@ -301,6 +311,48 @@ class PaymentValidateView(LoginRequiredMixin, KadamayRoleRequiredMixin, UpdateVi
             return redirect(self.get_success_url()) # Redirect back or to a detail page
 
 
+class GCashReconcileView(LoginRequiredMixin, KadamayRoleRequiredMixin, FormView):
+    """
+    Upload a GCash transaction export: every pending GCash payment whose reference number
+    and amount are in it is validated at once (apps/payment/gcash.py). The page lists the
+    statement rows that matched nothing or a different amount. In-Charge users only
+    reconcile the payments of their assigned churches.
+    """
+    form_class = GCashStatementForm
+    template_name = 'payment/gcash_reconcile.html'
+    required_roles = ['Admin', 'In-Charge'] # Same roles as PaymentValidateView
+    rows_shown = 500 # Per section of the result; `manage.py reconcile_gcash` lists them all
+
+    def form_valid(self, form):
+        try:
+            statement = read_statement(form.cleaned_data['statement'])
+        except StatementError as error:
+            form.add_error('statement', str(error))
+            return self.form_invalid(form)
+
+        preview = form.cleaned_data['preview']
+        result = reconcile(statement, self.request.user, apply=not preview,
+                           church_ids=church_scope(principal_for(self.request)))
+        if result.validated:
+            messages.success(
+                self.request, f"{result.validated} GCash payment(s) validated. Status set to PAID."
+            )
+        elif not preview:
+            messages.warning(self.request, "No pending GCash payment matched the statement.")
+        # (title, the first rows_shown entries, how many there are)
+        result_sections = [
+            (title, entries[:self.rows_shown], len(entries)) for title, entries in (
+                ("Amount Mismatch", result.mismatched),
+                ("Unmatched", result.unmatched),
+                ("Duplicate Rows", result.duplicates),
+                ("Invalid Rows", result.invalid),
+                ("Would Validate" if preview else "Validated", result.matched),
+            )
+        ]
+        return self.render_to_response(self.get_context_data(
+            form=form, result=result, preview=preview, result_sections=result_sections))
+
+
 class PaymentCancelView(LoginRequiredMixin, KadamayRoleRequiredMixin, UpdateView):
     model = Payment
     # We need a form field for 'cancellation_reason'
@@ -333,13 +385,31 @@ class PaymentCancelView(LoginRequiredMixin, KadamayRoleRequiredMixin, UpdateView
 # --- API Endpoints (Class-Based Views for AJAX/JavaScript interactions) ---
 
 class IndividualSearchAPIView(LoginRequiredMixin, View):
+    """
+    Member search for the payment forms, one keyset page at a time (apps/common/pagination.py).
+
+    ?q=<text>[&after=<cursor> | &before=<cursor>]
+    Response: {"results": [{"id", "full_name", "contact_number"}], "next", "previous",
+               "approximate_count", "count_is_capped"}; pass "next" back as ?after= for the next page.
+    """
+    keyset_ordering = ('surname', 'given_name', 'id')
+
     def get(self, request, *args, **kwargs):
         query = request.GET.get('q', '')
-        individuals = Individual.objects.filter(
-            Q(last_name__icontains=query) | Q(first_name__icontains=query) | # Search by name parts
-            Q(contact_number__icontains=query)
-        ).values('id', 'full_name', 'contact_number') # Ensure 'full_name' is a property/method in Individual model
-        return JsonResponse(list(individuals), safe=False)
+        # Uses the member search index (names, contact, address, family, church, ID)
+        individuals = filter_individuals(Individual.objects.all(), query)
+        try:
+            page = page_from_request(request, individuals, self.keyset_ordering)
+        except InvalidCursor as error:
+            return JsonResponse({'error': str(error)}, status=400)
+        return JsonResponse({
+            'results': [
+                {'id': individual.id, 'full_name': individual.full_name,
+                 'contact_number': individual.contact_number}
+                for individual in page
+            ],
+            **page.as_json(),
+        })
 
 class GetFamilyMembersAPIView(LoginRequiredMixin, View):
     def get(self, request, individual_id, *args, **kwargs):
@@ -372,7 +442,9 @@ class GetFamilyMembersAPIView(LoginRequiredMixin, View):
 
 class GetNextOrNumberAPIView(LoginRequiredMixin, View):
     def get(self, request, *args, **kwargs):
-        next_number = generate_next_or_number() # Use the utility function
+        # Reserves the number for this session instead of just peeking at the latest OR,
+        # so it cannot collide with another cashier's payment
+        next_number = reserve_or_number_for_request(request)
         return JsonResponse({'next_or_number': str(next_number)})
 
 # This function-based API view is kept as is, if you prefer it.
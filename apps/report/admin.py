@@ -3,9 +3,9 @@ from .models import ReportLog
 
 @admin.register(ReportLog)
 class ReportLogAdmin(admin.ModelAdmin):
-    list_display = ('report_type', 'generated_by', 'church', 'timestamp')
-    list_filter = ('report_type', 'church')
+    list_display = ('report_type', 'generated_by', 'church', 'timestamp', 'status', 'progress')
+    list_filter = ('status', 'report_type', 'church')
     search_fields = ('generated_by__username', 'church__name')
     date_hierarchy = 'timestamp'
     autocomplete_fields = ('generated_by', 'church')
-    readonly_fields = ('timestamp',)
\ No newline at end of file
+    readonly_fields = ('timestamp', 'claimed_by', 'heartbeat_at', 'started_at', 'finished_at')
@@ -0,0 +1,14 @@
+# apps/report/apps.py
+
+from django.apps import AppConfig
+
+
+class ReportConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.report'
+
+    def ready(self):
+        """
+        Import signals here so the dashboard rollups are kept up to date.
+        """
+        import apps.report.signals  # triggers signal registration
@@ -0,0 +1,148 @@
+# apps/report/dashboard_cache.py
+# Cache para sa computed DashboardView numbers, keyed by (selected church, role scope).
+#
+# Invalidation is version based: every church has a version counter in the cache and
+# there is one more counter for the "All Churches" view. The signal handlers in
+# apps/report/signals.py bump the counters of the affected church(es) (and always the
+# "all" counter) after the saving transaction commits. A cached entry whose version no
+# longer matches is stale.
+#
+# Stale-while-revalidate: when an entry is stale (or older than DASHBOARD_CACHE_TTL),
+# only the request that wins the rebuild lock recomputes it; every other request keeps
+# getting the stale copy meanwhile. For a cold key (nothing cached yet) the other
+# requests wait briefly for the lock holder instead of all computing the same numbers.
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+ALL_CHURCHES = 'all'
+
+# Counter names exposed by get_cache_stats()
+STAT_NAMES = ('hit', 'stale_hit', 'miss', 'wait', 'invalidation')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _cache():
+    return caches[_setting('DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def _church_key(church_id):
+    return ALL_CHURCHES if church_id is None else str(church_id)
+
+
+def _version_key(church_key):
+    return f'dashboard:version:{church_key}'
+
+
+def _entry_key(church_key, role_scope):
+    return f'dashboard:context:{church_key}:{role_scope}'
+
+
+def _lock_key(church_key, role_scope):
+    return f'dashboard:lock:{church_key}:{role_scope}'
+
+
+def _stat_key(name):
+    return f'dashboard:stats:{name}'
+
+
+def _incr(key):
+    cache = _cache()
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The key was evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+        return 1
+
+
+def _record(name):
+    _incr(_stat_key(name))
+
+
+def get_cache_stats():
+    """Returns the hit/miss counters (per cache, so shared by all workers on a shared backend)."""
+    cache = _cache()
+    stats = {name: cache.get(_stat_key(name), 0) for name in STAT_NAMES}
+    served = stats['hit'] + stats['stale_hit'] + stats['wait'] + stats['miss']
+    stats['hit_ratio'] = round((served - stats['miss']) / served, 4) if served else None
+    return stats
+
+
+def reset_cache_stats():
+    _cache().delete_many([_stat_key(name) for name in STAT_NAMES])
+
+
+def get_dashboard_context(church_id, role_scope, build):
+    """
+    Returns the cached dashboard numbers for (church_id, role_scope), calling
+    build() to compute them when needed. church_id=None means "All Churches".
+    """
+    cache = _cache()
+    church_key = _church_key(church_id)
+    entry_key = _entry_key(church_key, role_scope)
+
+    # Read the version *before* building so a change during the build leaves the entry stale
+    version = cache.get(_version_key(church_key), 0)
+    entry = cache.get(entry_key)
+
+    if (entry is not None and entry['version'] == version
+            and time.time() - entry['built_at'] < _setting('DASHBOARD_CACHE_TTL', 300)):
+        _record('hit')
+        return entry['context']
+
+    lock_key = _lock_key(church_key, role_scope)
+    if cache.add(lock_key, 1, timeout=_setting('DASHBOARD_CACHE_LOCK_TIMEOUT', 30)):
+        # This request rebuilds the entry
+        try:
+            _record('miss')
+            context = build()
+            cache.set(entry_key, {
+                'version': version,
+                'built_at': time.time(),
+                'context': context,
+            }, timeout=_setting('DASHBOARD_CACHE_STALE_TTL', 24 * 60 * 60))
+            return context
+        finally:
+            cache.delete(lock_key)
+
+    if entry is not None:
+        # Somebody else is already rebuilding: serve the stale copy
+        _record('stale_hit')
+        return entry['context']
+
+    # Cold key and somebody else is rebuilding it: wait for their result
+    deadline = time.time() + _setting('DASHBOARD_CACHE_LOCK_WAIT', 5)
+    while time.time() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(entry_key)
+        if entry is not None:
+            _record('wait')
+            return entry['context']
+
+    # The other request took too long (or died); compute without touching the cache
+    _record('miss')
+    return build()
+
+
+def invalidate_dashboard(*church_ids):
+    """
+    Marks the cached dashboards of the given churches (and the "All Churches" view)
+    as stale once the current transaction commits.
+    """
+    church_keys = {_church_key(church_id) for church_id in church_ids if church_id is not None}
+    church_keys.add(ALL_CHURCHES)
+
+    def bump_versions():
+        for church_key in church_keys:
+            _incr(_version_key(church_key))
+        _record('invalidation')
+
+    transaction.on_commit(bump_versions)
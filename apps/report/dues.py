@@ -0,0 +1,118 @@
+# apps/report/dues.py
+# Arrears sa dues: kinsa nga mga miyembro ang atrasado sa usa ka ContributionType nga
+# naay billing period (e.g. Monthly Dues, 50.00 per month).
+#
+# A member owes one period from the later of the type's billing_start and the date the
+# member was added, up to and including the current period. What they paid is the
+# precomputed DuesCoverage.amount_covered (sum of their allocations of that type,
+# apps/report/rollups.py) divided by amount_per_period:
+#
+#   periods behind = periods due - floor(amount covered / amount per period)
+#
+# Only active, living members are billed. The members of a church are read in one
+# query straight from the cursor into NumPy arrays, and the arithmetic, filtering and
+# ordering run vectorized over all of them at once; only the page being shown is
+# turned back into Individual rows.
+
+from decimal import Decimal
+
+import numpy as np
+from django.db import connection
+from django.db.models import DateField, DecimalField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from apps.contribution_type.models import ContributionType
+from apps.individual.models import Individual
+
+from .models import DuesCoverage
+
+CENT = Decimal('0.01')
+
+
+def month_index(value):
+    """Months since January 1970 (NumPy's datetime64[M]) of a date."""
+    return (value.year - 1970) * 12 + value.month - 1
+
+
+def billed_types():
+    return ContributionType.objects.exclude(billing_period='').filter(amount_per_period__gt=0)
+
+
+def member_arrays(contribution_type, church_id=None):
+    """(member ids, month index each was added, amount covered) of the billed members, as arrays."""
+    members = Individual.objects.filter(is_active_member=True, is_alive=True)
+    if church_id is not None:
+        members = members.filter(church_id=church_id)
+    covered = DuesCoverage.objects.filter(
+        contribution_type=contribution_type, individual=OuterRef('pk')).values('amount_covered')
+    # The (UTC) date is cast in SQL and its month taken in NumPy: extracting the month of
+    # an aware datetime in SQL runs a Python function per row on SQLite, 10x slower
+    query = members.annotate(
+        added=Cast('date_added', DateField()),
+        covered=Coalesce(Subquery(covered), Value(0), output_field=DecimalField()),
+    ).values_list('id', 'added', 'covered').order_by().query
+    with connection.cursor() as cursor:
+        cursor.execute(*query.sql_with_params())
+        rows = cursor.fetchall()
+    if not rows:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float64)
+    ids, added, amounts = zip(*rows)
+    return (
+        np.array(ids, dtype=np.int64),
+        np.array(added, dtype='datetime64[M]').astype(np.int64),
+        np.array(amounts, dtype=np.float64),
+    )
+
+
+def arrears(contribution_type, church_id=None, min_months=1, as_of=None):
+    """
+    Members of `church_id` (None = all churches) at least `min_months` behind on a billed
+    contribution type, most behind first. Returns a dict with the arrays 'member_ids',
+    'months_behind' and 'amount_due' plus the totals.
+    """
+    if not contribution_type.is_billed:
+        raise ValueError(f'{contribution_type} has no billing period or amount.')
+    as_of = as_of or timezone.localdate()
+    step = contribution_type.period_months
+    rate = float(contribution_type.amount_per_period)
+
+    ids, start, covered = member_arrays(contribution_type, church_id)
+    if contribution_type.billing_start:
+        start = np.maximum(start, month_index(contribution_type.billing_start))
+    elapsed = month_index(as_of) - start
+    due = np.where(elapsed >= 0, elapsed // step + 1, 0)
+    paid = np.floor(covered / rate + 1e-9).astype(np.int64)  # Tolerate float rounding of the sum
+    behind = np.maximum(due - paid, 0)
+    months_behind = behind * step
+
+    selected = months_behind >= min_months
+    ids, months_behind, behind = ids[selected], months_behind[selected], behind[selected]
+    order = np.lexsort((ids, -months_behind))
+    amount_due = behind[order] * rate
+    return {
+        'contribution_type': contribution_type,
+        'church_id': church_id,
+        'as_of': as_of,
+        'min_months': min_months,
+        'members_billed': len(selected),
+        'member_ids': ids[order],
+        'months_behind': months_behind[order],
+        'amount_due': amount_due,
+        'total_due': Decimal(str(round(float(amount_due.sum()), 2))).quantize(CENT),
+    }
+
+
+def arrears_rows(result, start=0, stop=None):
+    """The members in result[start:stop] as dicts, with their Individual loaded in one query."""
+    ids = result['member_ids'][start:stop].tolist()
+    members = Individual.objects.select_related('family', 'church').in_bulk(ids)
+    return [
+        {
+            'individual': members[pk],
+            'months_behind': int(months),
+            'amount_due': Decimal(str(round(float(amount), 2))).quantize(CENT),
+        }
+        for pk, months, amount in zip(ids, result['months_behind'][start:stop], result['amount_due'][start:stop])
+        if pk in members
+    ]
@@ -0,0 +1,198 @@
+# apps/report/exports.py
+# Export engine para sa payments, members, families ug contributions per type.
+#
+# Rows are read with values_list() + iterator(chunk_size=EXPORT_CHUNK_SIZE), so
+# neither model instances nor the whole result are ever held in memory:
+#   - CSV is produced row by row as a generator for StreamingHttpResponse; the first
+#     bytes reach the browser before the query has finished.
+#   - XLSX goes through an openpyxl write-only workbook into a temporary file, which
+#     is then streamed back. openpyxl cannot emit a workbook before it is complete,
+#     but write-only mode keeps memory flat while the rows are added.
+# Every export writes a ReportLog row. The same functions write the files of queued
+# report jobs (apps/report/jobs.py), with a progress callback.
+
+import csv
+import tempfile
+
+from django.conf import settings
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from apps.family.models import Family
+from apps.individual.models import Individual
+from apps.payment.models import Payment
+
+from .models import ReportLog
+from .rollups import COUNTED_PAYMENT_STATUSES
+
+FORMATS = ('csv', 'xlsx')
+
+# Cells starting with these are treated as formulas by spreadsheet programs
+_FORMULA_PREFIXES = ('=', '+', '-', '@')
+
+
+def chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+class Export:
+    """One exportable list: its ReportLog type, column headers and rows."""
+
+    def __init__(self, name, report_type, headers, rows):
+        self.name = name
+        self.report_type = report_type
+        self.headers = headers
+        self._rows = rows
+
+    def queryset(self, church_id=None):
+        return self._rows(church_id)
+
+    def rows(self, church_id=None, progress=None):
+        """
+        Yields tuples, reading chunk_size() rows from the database at a time.
+        `progress(rows_done)` is called after every chunk.
+        """
+        size = chunk_size()
+        done = 0
+        for row in self._rows(church_id).iterator(chunk_size=size):
+            yield row
+            done += 1
+            if progress is not None and done % size == 0:
+                progress(done)
+        if progress is not None:
+            progress(done)
+
+
+def _payment_rows(church_id):
+    queryset = Payment.objects.all()
+    if church_id:
+        queryset = queryset.filter(individual__church_id=church_id)
+    # Ordered by primary key: the index order, no sort over the whole table
+    return queryset.order_by('pk').values_list(
+        'or_number', 'date_paid', 'individual__membership_id', 'individual__surname',
+        'individual__given_name', 'individual__church__name', 'contribution_type__name',
+        'amount', 'payment_method', 'gcash_reference_number', 'is_validated', 'status',
+        'collected_by__username',
+    )
+
+
+def _member_rows(church_id):
+    queryset = Individual.objects.all()
+    if church_id:
+        queryset = queryset.filter(church_id=church_id)
+    return queryset.order_by('pk').values_list(
+        'membership_id', 'surname', 'given_name', 'middle_name', 'suffix_name', 'sex',
+        'birth_date', 'civil_status', 'contact_number', 'address', 'relationship',
+        'membership_status', 'is_alive', 'family__family_name', 'church__name',
+    )
+
+
+def _deceased_rows(church_id):
+    return _member_rows(church_id).filter(is_alive=False)
+
+
+def _inactive_rows(church_id):
+    return _member_rows(church_id).filter(membership_status='INACTIVE')
+
+
+def _family_rows(church_id):
+    queryset = Family.objects.all()
+    if church_id:
+        queryset = queryset.filter(church_id=church_id)
+    # member_count is the counter column kept by apps/family/counters.py, not a COUNT per row
+    return queryset.order_by('pk').values_list(
+        'family_name', 'church__name', 'head_of_family__membership_id', 'head_of_family__surname',
+        'head_of_family__given_name', 'contact_number', 'address', 'member_count',
+    )
+
+
+def _contribution_rows(church_id):
+    queryset = Payment.objects.filter(status__in=COUNTED_PAYMENT_STATUSES)
+    if church_id:
+        queryset = queryset.filter(individual__church_id=church_id)
+    return queryset.annotate(month=TruncMonth('date_paid')).values_list(
+        'contribution_type__name', 'month',
+    ).annotate(payments=Count('id'), total=Sum('amount')).order_by('contribution_type__name', 'month')
+
+
+MEMBER_HEADERS = ['Membership ID', 'Surname', 'Given Name', 'Middle Name', 'Suffix', 'Sex', 'Birth Date',
+                  'Civil Status', 'Contact Number', 'Address', 'Relationship', 'Membership Status',
+                  'Alive', 'Family', 'Church']
+
+EXPORTS = {
+    export.name: export for export in [
+        Export('payments', 'payment',
+               ['OR Number', 'Date Paid', 'Membership ID', 'Surname', 'Given Name', 'Church',
+                'Contribution Type', 'Amount', 'Method', 'G-Cash Reference', 'Validated', 'Status',
+                'Collected By'],
+               _payment_rows),
+        Export('members', 'member_list', MEMBER_HEADERS, _member_rows),
+        Export('deceased', 'deceased', MEMBER_HEADERS, _deceased_rows),
+        Export('inactive', 'inactive', MEMBER_HEADERS, _inactive_rows),
+        Export('families', 'family',
+               ['Family', 'Church', 'Head Membership ID', 'Head Surname', 'Head Given Name',
+                'Contact Number', 'Address', 'Members'],
+               _family_rows),
+        Export('contributions', 'contribution',
+               ['Contribution Type', 'Month', 'Payments', 'Total Amount'],
+               _contribution_rows),
+    ]
+}
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class _Echo:
+    """csv.writer target that hands the formatted line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_chunks(export, church_id=None, rows_per_chunk=500, progress=None):
+    """Yields the CSV text in pieces of `rows_per_chunk` rows (with a BOM for Excel)."""
+    writer = csv.writer(_Echo())
+    buffer = ['\ufeff', writer.writerow(export.headers)]
+    for row in export.rows(church_id, progress):
+        buffer.append(writer.writerow([_cell(value) for value in row]))
+        if len(buffer) >= rows_per_chunk:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def xlsx_file(export, church_id=None, output=None, progress=None):
+    """
+    Writes the export as .xlsx to `output` (a binary file; default a temporary file)
+    and returns it, rewound.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(export.name.title())
+    sheet.append(export.headers)
+    for row in export.rows(church_id, progress):
+        sheet.append([_cell(value) for value in row])
+    if output is None:
+        output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def filename(export, file_format, church=None):
+    church_part = f'-church-{church.id}' if church else ''
+    return f'{export.name}{church_part}-{timezone.localdate():%Y%m%d}.{file_format}'
+
+
+def log_export(export, user, church=None, file_format='csv'):
+    return ReportLog.objects.create(generated_by=user, report_type=export.report_type, church=church,
+                                    parameters={'format': file_format})
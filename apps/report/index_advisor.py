@@ -0,0 +1,215 @@
+# apps/report/index_advisor.py
+# Index advisor: tan-awon ang query plans sa mga queries nga gipadagan sa mga views,
+# ug isugyot ang mga index nga kulang.
+#
+# The queries come from CaptureQueriesContext around real requests (see the
+# advise_indexes command), so they are exactly what the ORM sends, literals included.
+# Each distinct query shape is explained once (EXPLAIN QUERY PLAN on SQLite, EXPLAIN on
+# PostgreSQL) and flagged when the plan
+#
+#   - scans a whole table (SQLite "SCAN t", PostgreSQL "Seq Scan on t") that has at
+#     least `min_rows` rows; small tables are cheaper to scan than to index, or
+#   - sorts in a temporary B-tree (SQLite "USE TEMP B-TREE FOR ORDER BY/GROUP BY",
+#     PostgreSQL "Sort").
+#
+# The proposal for a flagged table follows the usual composite index recipe: the
+# columns the query compares with = or IN first, then the first range-compared or
+# ORDER BY column. Proposals an existing index already covers (as a leading prefix)
+# are dropped. They are proposals: read the query before adding the index.
+
+import re
+from dataclasses import dataclass, field
+
+from django.apps import apps
+from django.db import connection
+
+# Django's SQL: "table"."column" or alias."column" (T3, U0 ... for joins and subqueries)
+COLUMN = r'(?:"(?P<table>\w+)"|(?P<alias>[TUVW]\d+))\."(?P<column>\w+)"'
+# Compared with a value; "a"."x" = "b"."y" (a join condition) is not a filter
+EQUALITY = re.compile(COLUMN + r'\s*(?:=(?!\s*(?:"|[TUVW]\d+\.))|IN\s*\(|IS\s+NULL)')
+RANGE = re.compile(COLUMN + r'\s*(?:[<>]=?|BETWEEN|LIKE)\s')
+ALIAS = re.compile(r'"(\w+)"\s+(?:AS\s+)?([TUVW]\d+)\b')
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+SQLITE_SCAN = re.compile(r'^SCAN (\w+)(?: AS (\w+))?(?: USING (?:COVERING )?INDEX \w+)?$')
+SQLITE_TEMP_SORT = re.compile(r'^USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT|RIGHT PART OF ORDER BY)')
+POSTGRES_SEQ_SCAN = re.compile(r'Seq Scan on (\w+)(?: (\w+))?')
+
+
+@dataclass
+class Finding:
+    kind: str     # 'full scan' or 'temp sort'
+    table: str
+    detail: str
+
+
+@dataclass
+class Proposal:
+    table: str
+    columns: tuple
+    views: set = field(default_factory=set)
+    queries: int = 0
+
+    @property
+    def model(self):
+        return _models_by_table().get(self.table)
+
+    def as_code(self):
+        """The models.Index(...) line to put in the model's Meta.indexes."""
+        model = self.model
+        names = [_field_name(model, column) for column in self.columns] if model else list(self.columns)
+        prefix = model._meta.model_name if model else self.table
+        name = '_'.join([prefix[:10]] + names)[:26] + '_idx'  # Index names are limited to 30 characters
+        return f"models.Index(fields={names!r}, name='{name}')"
+
+
+def _models_by_table():
+    return {model._meta.db_table: model for model in apps.get_models()}
+
+
+def _field_name(model, column):
+    for model_field in model._meta.concrete_fields:
+        if model_field.column == column:
+            return model_field.name
+    return column
+
+
+def shape(sql):
+    """The query without its literals, so the same query with other values counts once."""
+    return LITERALS.sub('?', sql)
+
+
+def is_select(sql):
+    return sql.lstrip().upper().startswith('SELECT')
+
+
+def explain(sql):
+    """The plan lines of a query on the default database."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+        cursor.execute('EXPLAIN ' + sql)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def table_rows(table, _cache={}):
+    if table not in _cache:
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+            _cache[table] = cursor.fetchone()[0]
+    return _cache[table]
+
+
+def findings(sql, plan, min_rows=1000):
+    """The full scans of big tables and the temporary sorts in a plan."""
+    aliases = dict((alias, table) for table, alias in ALIAS.findall(sql))
+    tables = set(_models_by_table())
+    found = []
+    for line in plan:
+        text = line.strip().lstrip('->').strip()
+        scan = SQLITE_SCAN.match(text) if connection.vendor == 'sqlite' else POSTGRES_SEQ_SCAN.search(text)
+        if scan:
+            # A SQLite "SCAN t USING INDEX i" reads an index in order, which is what an
+            # ORDER BY ... LIMIT wants; only plain table scans are flagged
+            if connection.vendor == 'sqlite' and 'USING' in text:
+                continue
+            table = aliases.get(scan.group(1), scan.group(1))
+            if table in tables and table_rows(table) >= min_rows:
+                found.append(Finding('full scan', table, text))
+            continue
+        if SQLITE_TEMP_SORT.match(text) or (connection.vendor == 'postgresql' and text.startswith('Sort ')):
+            table = _order_by_table(sql, aliases)
+            if table in tables and table_rows(table) >= min_rows:
+                found.append(Finding('temp sort', table, text))
+    return found
+
+
+def _columns(pattern, sql, aliases):
+    for match in pattern.finditer(sql):
+        table = match.group('table') or aliases.get(match.group('alias'))
+        if table:
+            yield table, match.group('column')
+
+
+def _order_by_columns(sql, aliases):
+    """The columns of the query's last (outermost) ORDER BY."""
+    position = sql.rfind('ORDER BY')
+    if position < 0:
+        return []
+    clause = re.split(r'\s+LIMIT\s|\s+OFFSET\s|\)', sql[position + len('ORDER BY'):])[0]
+    return list(_columns(re.compile(COLUMN), clause, aliases))
+
+
+def _order_by_table(sql, aliases):
+    columns = _order_by_columns(sql, aliases)
+    return columns[0][0] if columns else None
+
+
+def propose(sql, finding):
+    """The index that would serve the query on the finding's table, or None."""
+    aliases = dict((alias, table) for table, alias in ALIAS.findall(sql))
+    model = _models_by_table().get(finding.table)
+    primary_key = model._meta.pk.column if model else 'id'
+    columns = []
+    for table, column in _columns(EQUALITY, sql, aliases):
+        # pk = / pk IN (...) is already served by the primary key
+        if table == finding.table and column != primary_key and column not in columns:
+            columns.append(column)
+    order_by = [column for table, column in _order_by_columns(sql, aliases) if table == finding.table]
+    ranges = [column for table, column in _columns(RANGE, sql, aliases) if table == finding.table]
+    if finding.kind == 'temp sort' and order_by:
+        tail = order_by
+    else:
+        tail = ranges[:1] or order_by[:1]
+    for column in tail:
+        if column not in columns:
+            columns.append(column)
+    if not columns:
+        return None
+    if _covered(finding.table, columns):
+        return None
+    return tuple(columns)
+
+
+def existing_indexes(table):
+    """Column tuples of the indexes on a table, from the database itself."""
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return [tuple(info['columns']) for info in constraints.values() if info.get('index') or info.get('unique')
+            or info.get('primary_key')]
+
+
+def _covered(table, columns):
+    """Whether an existing index starts with these columns."""
+    for index in existing_indexes(table):
+        if tuple(index[:len(columns)]) == tuple(columns):
+            return True
+    return False
+
+
+def analyze(captured, min_rows=1000):
+    """
+    captured: [(view name, sql)]. Returns (findings per view {view: [(sql, Finding)]},
+    proposals sorted by how many query shapes they serve).
+    """
+    explained = {}
+    per_view, proposals = {}, {}
+    for view, sql in captured:
+        if not is_select(sql):
+            continue
+        key = shape(sql)
+        if key not in explained:
+            try:
+                explained[key] = findings(sql, explain(sql), min_rows)
+            except Exception:  # Not explainable as captured (e.g. a quoting quirk); skip it
+                explained[key] = []
+        for finding in explained[key]:
+            per_view.setdefault(view, []).append((sql, finding))
+            columns = propose(sql, finding)
+            if columns:
+                proposal = proposals.setdefault((finding.table, columns), Proposal(finding.table, columns))
+                proposal.views.add(view)
+                proposal.queries += 1
+    ranked = sorted(proposals.values(), key=lambda proposal: (-len(proposal.views), -proposal.queries))
+    return per_view, ranked
@@ -0,0 +1,185 @@
+# apps/report/jobs.py
+# Background report jobs: ang ReportLog row mao na ang job. Walay external broker,
+# ang database ra ang queue.
+#
+#   enqueue()       creates a QUEUED ReportLog
+#   claim_jobs()    used by the worker: picks QUEUED rows under a row lock
+#                   (SELECT ... FOR UPDATE SKIP LOCKED where the database has it) and
+#                   flips them to RUNNING with a conditional UPDATE, so two workers
+#                   never run the same job, SQLite included
+#   run_job()       runs in a worker process: writes the file under
+#                   MEDIA_ROOT/reports/, updating progress and the heartbeat per chunk;
+#                   the rows are read from the read replica when there is one
+#                   (apps/common/replica.py), the job row itself from the primary
+#   requeue_stale() puts RUNNING jobs back in the queue when their worker stopped
+#                   heartbeating (killed, machine restarted)
+#
+# PDF member reports (apps/report/pdf.py) go through the same queue; when the PDF of
+# unchanged data already exists, enqueue() returns a finished job pointing at it.
+#
+# Run the worker with `python manage.py run_report_worker`.
+
+import logging
+import os
+import socket
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+
+from apps.common.replica import read_from_replica
+
+from .exports import EXPORTS, FORMATS, csv_chunks, filename, xlsx_file
+from .models import ReportLog
+from .pdf import PDF_REPORTS, cached_pdf, render_member_report
+
+logger = logging.getLogger('kadamay.report_jobs')
+
+# ReportLog.report_type -> the export that produces it
+EXPORTS_BY_REPORT_TYPE = {export.report_type: export for export in EXPORTS.values()}
+
+REPORTS_DIR = 'reports'
+
+JOB_FORMATS = FORMATS + ('pdf',)
+
+
+class ReportJobError(Exception):
+    pass
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def enqueue(user, report_type, church=None, file_format='csv'):
+    if report_type not in EXPORTS_BY_REPORT_TYPE:
+        raise ReportJobError(f'Reports of type {report_type!r} cannot be generated yet.')
+    if file_format not in JOB_FORMATS:
+        raise ReportJobError(f'Unknown format {file_format!r}.')
+    if file_format == 'pdf':
+        if report_type not in PDF_REPORTS:
+            raise ReportJobError('PDF is only available for member lists.')
+        if church is None:
+            raise ReportJobError('PDF member lists are made per church; choose a church.')
+        name, rows = cached_pdf(report_type, church.id)
+        if name is not None:
+            now = timezone.now()
+            return ReportLog.objects.create(
+                generated_by=user, report_type=report_type, church=church,
+                status=ReportLog.STATUS_DONE, parameters={'format': file_format, 'cached': True},
+                progress=100, rows_total=len(rows), output_file=name, started_at=now, finished_at=now)
+    return ReportLog.objects.create(
+        generated_by=user, report_type=report_type, church=church,
+        status=ReportLog.STATUS_QUEUED, parameters={'format': file_format})
+
+
+def concurrent_jobs_supported():
+    """
+    False on SQLite outside WAL mode: there a reader (a job iterating its rows) blocks
+    every writer, so jobs running side by side lock each other out.
+    """
+    if connection.vendor != 'sqlite':
+        return True
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        return cursor.fetchone()[0].lower() == 'wal'
+
+
+def claim_jobs(limit, worker):
+    """Marks up to `limit` queued jobs as RUNNING for `worker`; returns their ids."""
+    if limit <= 0:
+        return []
+    claimed = []
+    with transaction.atomic():
+        candidates = list(
+            ReportLog.objects.select_for_update(skip_locked=True)
+            .filter(status=ReportLog.STATUS_QUEUED).order_by('id').values_list('id', flat=True)[:limit]
+        )
+        now = timezone.now()
+        for job_id in candidates:
+            updated = ReportLog.objects.filter(pk=job_id, status=ReportLog.STATUS_QUEUED).update(
+                status=ReportLog.STATUS_RUNNING, claimed_by=worker, started_at=now, heartbeat_at=now,
+                progress=0, error='')
+            if updated:
+                claimed.append(job_id)
+    return claimed
+
+
+def requeue_stale():
+    """Puts RUNNING jobs without a recent heartbeat back in the queue; returns how many."""
+    cutoff = timezone.now() - timedelta(seconds=_setting('REPORT_JOB_STALE_SECONDS', 600))
+    return ReportLog.objects.filter(status=ReportLog.STATUS_RUNNING, heartbeat_at__lt=cutoff).update(
+        status=ReportLog.STATUS_QUEUED, claimed_by='', progress=0)
+
+
+def _owned(job_id, worker):
+    # Every write of a worker is conditional on still owning the job, in case it was requeued
+    return ReportLog.objects.filter(pk=job_id, claimed_by=worker, status=ReportLog.STATUS_RUNNING)
+
+
+def fail_job(job_id, worker, message):
+    _owned(job_id, worker).update(status=ReportLog.STATUS_FAILED, error=message, finished_at=timezone.now())
+
+
+def _progress(owned, total):
+    def progress(done):
+        try:
+            owned.update(progress=min(99, done * 100 // total) if total else 99, heartbeat_at=timezone.now())
+        except OperationalError:
+            pass  # Database busy (SQLite); the next chunk reports again
+    return progress
+
+
+def _write_export(job, export, file_format, owned):
+    total = export.queryset(job.church_id).count()
+    owned.update(rows_total=total, heartbeat_at=timezone.now())
+    progress = _progress(owned, total)
+
+    name = f'{REPORTS_DIR}/{job.pk}-{filename(export, file_format, job.church)}'
+    path = Path(settings.MEDIA_ROOT) / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + '.part')
+    if file_format == 'xlsx':
+        with open(partial, 'wb') as output:
+            xlsx_file(export, job.church_id, output=output, progress=progress)
+    else:
+        with open(partial, 'w', encoding='utf-8', newline='') as output:
+            for chunk in csv_chunks(export, job.church_id, progress=progress):
+                output.write(chunk)
+    os.replace(partial, path)
+    return name
+
+
+def _write_pdf(job, owned):
+    if job.church_id is None:
+        raise ReportJobError('PDF member lists are made per church.')
+    progress = _progress(owned, 100)
+    name, _ = render_member_report(job.report_type, job.church, job.generated_by,
+                                   progress=lambda done, chunks: progress(done * 100 // chunks))
+    return name
+
+
+def run_job(job_id, worker):
+    """Generates one claimed job's file. Never raises: failures are stored on the job."""
+    job = ReportLog.objects.select_related('church', 'generated_by').get(pk=job_id)
+    owned = _owned(job_id, worker)
+    try:
+        file_format = job.parameters.get('format', 'csv')
+        export = EXPORTS_BY_REPORT_TYPE.get(job.report_type)
+        with read_from_replica():
+            if file_format == 'pdf' and job.report_type in PDF_REPORTS:
+                name = _write_pdf(job, owned)
+            elif export is not None and file_format in FORMATS:
+                name = _write_export(job, export, file_format, owned)
+            else:
+                raise ReportJobError(f'Reports of type {job.report_type!r} cannot be generated as {file_format}.')
+        owned.update(status=ReportLog.STATUS_DONE, progress=100, output_file=name, finished_at=timezone.now())
+    except Exception as error:
+        logger.exception('Report job %s failed', job_id)
+        fail_job(job_id, worker, str(error) or error.__class__.__name__)
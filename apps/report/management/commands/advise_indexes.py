@@ -0,0 +1,64 @@
+# apps/report/management/commands/advise_indexes.py
+
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from apps.report import index_advisor
+
+from .benchmark_views import BENCHMARK_USERNAME, Command as BenchmarkViewsCommand
+
+
+class Command(BenchmarkViewsCommand):
+    help = ('Requests every GET page (the same URLs as benchmark_views), explains each distinct query the '
+            'views ran, flags full table scans and temporary B-tree sorts, and proposes composite indexes '
+            '(apps/report/index_advisor.py). Run it on a large dataset (generate_dataset).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filter', help='Only views whose name matches this regular expression.')
+        parser.add_argument('--min-rows', type=int, default=1000,
+                            help='Ignore full scans of tables smaller than this (default: 1000).')
+        parser.add_argument('--verbose-plans', action='store_true',
+                            help='Print the flagged queries with their plan lines.')
+
+    def handle(self, *args, **options):
+        user, _ = get_user_model().objects.get_or_create(
+            username=BENCHMARK_USERNAME, defaults={'is_superuser': True, 'is_staff': True})
+        client = Client(HTTP_HOST='localhost', raise_request_exception=False)
+        client.force_login(user)
+
+        captured = []
+        # Pages that fail are reported by their status; their tracebacks are not the point here
+        request_logger = logging.getLogger('django.request')
+        previous_level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            for name, url in self._urls(options['filter']):
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url)
+                captured.extend((name, query['sql']) for query in queries.captured_queries)
+                self.stdout.write(f'  {name:<40} {response.status_code}  {len(queries)} queries')
+        finally:
+            request_logger.setLevel(previous_level)
+
+        per_view, proposals = index_advisor.analyze(captured, options['min_rows'])
+
+        self.stdout.write(f'\n{connection.vendor}: {len(per_view)} view(s) with flagged queries')
+        for view, flagged in sorted(per_view.items()):
+            kinds = sorted({f'{finding.kind} of {finding.table}' for _, finding in flagged})
+            self.stdout.write(f'  {view:<40} ' + '; '.join(kinds))
+            if options['verbose_plans']:
+                for sql, finding in flagged:
+                    self.stdout.write(f'      {finding.detail}\n      {sql[:400]}')
+
+        if not proposals:
+            self.stdout.write(self.style.SUCCESS('\nNo index to propose.'))
+            return
+        self.stdout.write('\nProposed indexes (most views served first):')
+        for proposal in proposals:
+            label = proposal.model._meta.label if proposal.model else proposal.table
+            self.stdout.write(f'  {label}: {proposal.as_code()}')
+            self.stdout.write(f'      {proposal.queries} queries in ' + ', '.join(sorted(proposal.views)))
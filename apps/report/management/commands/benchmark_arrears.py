@@ -0,0 +1,52 @@
+# apps/report/management/commands/benchmark_arrears.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from apps.individual.models import Individual
+from apps.report import dues
+
+
+class Command(BaseCommand):
+    help = ('Times the dues arrears calculator (apps/report/dues.py) for the largest church and for all '
+            'churches: reading the member arrays and the vectorized arithmetic, separately and together.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--contribution-type', type=int, default=None,
+                            help='Default: the first contribution type with a billing period.')
+        parser.add_argument('--months', type=int, default=3, help='Minimum months behind (default: 3).')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement; the best is shown.')
+
+    def handle(self, *args, **options):
+        types = dues.billed_types()
+        contribution_type = (types.filter(pk=options['contribution_type']).first()
+                             if options['contribution_type'] else types.first())
+        if contribution_type is None:
+            raise CommandError('No contribution type with a billing period; run generate_dataset first.')
+        largest = Individual.objects.filter(church__isnull=False).values('church_id').annotate(
+            members=Count('id')).order_by('-members').first()
+
+        self.stdout.write(f'{contribution_type} ({contribution_type.get_billing_period_display()}, '
+                          f'{contribution_type.amount_per_period} per period), behind >= {options["months"]} month(s)')
+        for label, church_id in ((f'church {largest["church_id"]}', largest['church_id']), ('all churches', None)):
+            arrays, seconds = self._best(options['repeat'], lambda: dues.member_arrays(contribution_type, church_id))
+            self._line(f'{label}: read {len(arrays[0])} members', seconds)
+            result, seconds = self._best(options['repeat'], lambda: dues.arrears(
+                contribution_type, church_id, options['months']))
+            self._line(f'{label}: arrears, {result["member_ids"].size} behind, {result["total_due"]} due', seconds)
+            _, seconds = self._best(options['repeat'], lambda: dues.arrears_rows(result, 0, 50))
+            self._line(f'{label}: first page of 50 members', seconds)
+
+    def _best(self, repeat, function):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = function()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
+
+    def _line(self, label, seconds):
+        self.stdout.write(f'  {label:<60} {seconds * 1000:10.1f} ms')
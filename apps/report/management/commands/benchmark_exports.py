@@ -0,0 +1,62 @@
+# apps/report/management/commands/benchmark_exports.py
+
+import resource
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries
+
+from apps.report.exports import EXPORTS, FORMATS, csv_chunks, xlsx_file
+
+
+class Command(BaseCommand):
+    help = ('Runs an export (apps/report/exports.py) without HTTP and reports rows, time, bytes '
+            'and peak Python memory, compared with building the same export as one list. '
+            'Generate data first, e.g. `generate_dataset --members 200000 --payments-per-member 5`.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', nargs='?', default='payments', help=f'One of: {", ".join(EXPORTS)}.')
+        parser.add_argument('--format', default='csv', choices=FORMATS)
+        parser.add_argument('--church', type=int, help='Only this church id.')
+        parser.add_argument('--naive', action='store_true',
+                            help='Also time the old approach: list(queryset) of model rows, then write.')
+
+    def handle(self, *args, **options):
+        export = EXPORTS.get(options['kind'])
+        if export is None:
+            raise CommandError(f'Unknown export {options["kind"]!r}.')
+
+        self._run('streaming', lambda: self._streaming(export, options['format'], options['church']))
+        if options['naive']:
+            self._run('whole list', lambda: self._naive(export, options['church']))
+        self.stdout.write(f'Process max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024} MB')
+
+    def _run(self, label, function):
+        reset_queries()
+        tracemalloc.start()
+        started = time.perf_counter()
+        rows, size = function()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.stdout.write(f'{label:<12} {rows:>9} rows  {size / 1024 / 1024:8.1f} MB output  '
+                          f'{elapsed:7.2f} s  peak Python memory {peak / 1024 / 1024:7.1f} MB')
+
+    def _streaming(self, export, file_format, church_id):
+        if file_format == 'xlsx':
+            output = xlsx_file(export, church_id)
+            output.seek(0, 2)
+            size = output.tell()
+            output.close()
+            return self._count_rows(export, church_id), size
+        size = sum(len(chunk.encode()) for chunk in csv_chunks(export, church_id))
+        return self._count_rows(export, church_id), size
+
+    def _naive(self, export, church_id):
+        rows = list(export.queryset(church_id))
+        text = '\n'.join(','.join(str(value) for value in row) for row in rows)
+        return len(rows), len(text.encode())
+
+    def _count_rows(self, export, church_id):
+        return export.queryset(church_id).count()
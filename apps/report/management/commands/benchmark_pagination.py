@@ -0,0 +1,77 @@
+# apps/report/management/commands/benchmark_pagination.py
+
+import time
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common.pagination import approximate_count, encode_cursor, keyset_page, parse_ordering
+from apps.individual.models import Individual
+from apps.payment.models import Payment
+
+LISTS = {
+    'payments': (Payment.objects.all, ('-or_number', '-id')),
+    'individuals': (Individual.objects.all, ('surname', 'given_name', 'id')),
+}
+
+
+class Command(BaseCommand):
+    help = ('Compares Paginator pages (COUNT + OFFSET) with keyset pages (apps/common/pagination.py) '
+            'of the payment and member lists at increasing depth. Run generate_dataset first.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--depths', default='1,100,1000,5000',
+                            help='Comma separated page numbers (default: 1,100,1000,5000).')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement; the best is shown.')
+
+    def handle(self, *args, **options):
+        page_size = options['page_size']
+        depths = [int(depth) for depth in options['depths'].split(',')]
+        for name, (queryset, ordering) in LISTS.items():
+            fields = parse_ordering(ordering)
+            order_by = [('-' if descending else '') + field for field, descending in fields]
+            total = queryset().count()
+            if not total:
+                raise CommandError(f'No {name}; run generate_dataset first.')
+            self.stdout.write(f'{name} ({total} rows, {page_size} per page)')
+
+            _, seconds = self._best(options['repeat'], lambda: queryset().count())
+            self._line('exact COUNT(*)', seconds)
+            cache.clear()
+            started = time.perf_counter()
+            approximate_count(queryset())
+            self._line('approximate count, cold', time.perf_counter() - started)
+            _, seconds = self._best(options['repeat'], lambda: approximate_count(queryset()))
+            self._line('approximate count, cached', seconds)
+
+            for depth in depths:
+                start = (depth - 1) * page_size
+                if start >= total:
+                    continue
+                # A new Paginator per run, as per request: its COUNT(*) is part of the cost
+                _, seconds = self._best(options['repeat'], lambda: list(
+                    Paginator(queryset().order_by(*order_by), page_size).page(depth).object_list))
+                self._line(f'page {depth}: COUNT + OFFSET {start}', seconds)
+
+                # The cursor a reader would hold after paging down to this depth
+                cursor = None
+                if start:
+                    previous = queryset().order_by(*order_by).values(*[field for field, _ in fields])[start - 1]
+                    cursor = encode_cursor(previous[field] for field, _ in fields)
+                _, seconds = self._best(options['repeat'], lambda: keyset_page(
+                    queryset(), ordering, after=cursor, page_size=page_size))
+                self._line(f'page {depth}: keyset', seconds)
+
+    def _best(self, repeat, function):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = function()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
+
+    def _line(self, label, seconds):
+        self.stdout.write(f'  {label:<40} {seconds * 1000:10.2f} ms')
@@ -0,0 +1,70 @@
+# apps/report/management/commands/benchmark_pdf.py
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import get_template
+from django.utils import timezone
+
+from apps.individual.models import Individual
+from apps.report import pdf
+
+
+class Command(BaseCommand):
+    help = ('Times the stages of a PDF member list of --members rows (any church): the query, the '
+            'data-version hash, template rendering (compiled once vs loaded per chunk) and, when '
+            'WeasyPrint is installed, the PDF itself in one piece vs in chunks over a process pool.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=5000)
+        parser.add_argument('--chunk-size', type=int, default=None, help='Default: PDF_ROWS_PER_CHUNK.')
+        parser.add_argument('--processes', type=int, default=None, help='Default: PDF_RENDER_PROCESSES.')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size'] or pdf._setting('PDF_ROWS_PER_CHUNK', 300)
+        processes = options['processes'] or pdf._setting('PDF_RENDER_PROCESSES', 2)
+
+        rows, seconds = self._time(lambda: list(
+            Individual.objects.order_by('surname', 'given_name', 'id').values(*pdf.MEMBER_FIELDS)[:options['members']]))
+        if not rows:
+            raise CommandError('No members; run generate_dataset first.')
+        self._line(f'query {len(rows)} members', seconds)
+        _, seconds = self._time(lambda: pdf.data_version('member_list', 0, rows))
+        self._line('data-version hash (the cache lookup)', seconds)
+
+        context = {'church_name': 'Benchmark', 'title': 'Member List Report',
+                   'generated_at': timezone.localtime(), 'generated_by': 'benchmark'}
+        chunks = [dict(context, members=rows[start:start + chunk_size], total_members=len(rows),
+                       first_chunk=start == 0, last_chunk=start + chunk_size >= len(rows))
+                  for start in range(0, len(rows), chunk_size)]
+
+        template = pdf._compiled_template()
+        _, seconds = self._time(lambda: [template.render(chunk) for chunk in chunks])
+        self._line(f'HTML, {len(chunks)} chunks, compiled template', seconds)
+        _, seconds = self._time(lambda: [get_template(pdf.TEMPLATE_NAME).render(chunk) for chunk in chunks])
+        self._line(f'HTML, {len(chunks)} chunks, template loaded per chunk', seconds)
+
+        try:
+            import pypdf  # noqa: F401
+            import weasyprint  # noqa: F401
+        except (ImportError, OSError) as error:
+            self.stdout.write(self.style.WARNING(f'PDF stages skipped, WeasyPrint/pypdf unavailable: {error}'))
+            return
+
+        whole = dict(context, members=rows, total_members=len(rows), first_chunk=True, last_chunk=True)
+        document, seconds = self._time(lambda: pdf._render_chunk(whole))
+        self._line(f'PDF in one piece, one process ({len(document) // 1024} KB)', seconds)
+        with ProcessPoolExecutor(max_workers=processes, initializer=pdf._init_process) as pool:
+            pool.submit(pdf._compiled_template).result()  # Start the processes outside the timing
+            document, seconds = self._time(
+                lambda: pdf.render_pdf(rows, context, rows_per_chunk=chunk_size, pool=pool))
+        self._line(f'PDF in {len(chunks)} chunks, {processes} processes ({len(document) // 1024} KB)', seconds)
+
+    def _time(self, function):
+        started = time.perf_counter()
+        result = function()
+        return result, time.perf_counter() - started
+
+    def _line(self, label, seconds):
+        self.stdout.write(f'  {label:<55} {seconds * 1000:10.1f} ms')
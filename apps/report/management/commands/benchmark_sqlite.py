@@ -0,0 +1,246 @@
+# apps/report/management/commands/benchmark_sqlite.py
+
+import itertools
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+from apps.common.sqlite_tuning import pragmas
+from apps.contribution_type.models import ContributionType
+from apps.individual.models import Individual
+
+BENCHMARK_USERNAME = 'benchmark-admin'
+PROFILES = {
+    # Django's SQLite defaults: rollback journal, synchronous=FULL, BEGIN (deferred)
+    'default': {'SQLITE_TUNING': '0'},
+    # apps/common/sqlite_tuning.py
+    'tuned': {'SQLITE_TUNING': '1'},
+}
+SCRATCH_TABLE = 'benchmark_sqlite_scratch'
+
+
+def _transaction_worker(arguments):
+    """
+    Read-then-write transactions, like a payment save that checks before it writes, on
+    a plain sqlite3 connection with the profile's settings. Returns (committed, locked).
+    """
+    database, profile, deadline = arguments
+    raw = sqlite3.connect(database, isolation_level=None, timeout=5)  # Django's default timeout
+    if profile == 'tuned':
+        for name, value in pragmas():
+            raw.execute(f'PRAGMA {name} = {value}')
+    committed = locked = 0
+    while time.perf_counter() < deadline:
+        try:
+            raw.execute('BEGIN IMMEDIATE' if profile == 'tuned' else 'BEGIN')
+            raw.execute("SELECT COUNT(*) FROM payment_payment WHERE status = 'PENDING'").fetchone()
+            raw.execute(f'INSERT INTO {SCRATCH_TABLE} (value) VALUES (?)', [profile])
+            raw.execute('COMMIT')
+            committed += 1
+        except sqlite3.OperationalError:
+            locked += 1
+            if raw.in_transaction:
+                raw.execute('ROLLBACK')
+    raw.close()
+    return committed, locked
+
+
+class _Load:
+    """Reader and writer threads sending requests to the server until `deadline`."""
+
+    def __init__(self, base_url, cookie, csrf_token, read_paths, write_path, payment_data, deadline):
+        self.base_url = base_url
+        self.cookie = cookie
+        self.csrf_token = csrf_token
+        self.read_paths = read_paths
+        self.write_path = write_path
+        self.payment_data = payment_data
+        self.deadline = deadline
+        self.lock = threading.Lock()
+        self.timings = {'read': [], 'write': []}
+        self.errors = {'read': {}, 'write': {}}
+
+    def _request(self, kind, path, data=None):
+        headers = {'Cookie': self.cookie}
+        if data is not None:
+            headers['X-CSRFToken'] = self.csrf_token
+            data = urllib.parse.urlencode(data).encode()
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers)
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                response.read()
+            # A saved payment redirects to the list; an invalid form is shown again
+            error = 'form errors' if data is not None and response.url.endswith(self.write_path) else None
+        except urllib.error.HTTPError as failure:
+            body = failure.read().decode(errors='replace')
+            error = 'database is locked' if 'database is locked' in body else f'HTTP {failure.code}'
+        except OSError as failure:
+            error = type(failure).__name__
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            if error:
+                self.errors[kind][error] = self.errors[kind].get(error, 0) + 1
+            else:
+                self.timings[kind].append(elapsed)
+
+    def reader(self):
+        number = 0
+        while time.perf_counter() < self.deadline:
+            self._request('read', self.read_paths[number % len(self.read_paths)])
+            number += 1
+
+    def writer(self):
+        while time.perf_counter() < self.deadline:
+            self._request('write', self.write_path, self.payment_data())
+
+
+class Command(BaseCommand):
+    help = ('Read/write throughput of the SQLite database under gunicorn, with Django\'s SQLite defaults and '
+            'with the SQLite performance profile (apps/common/sqlite_tuning.py). Readers load the payment and member '
+            'lists, the dashboard and the chat feed while writers save cash payments through the payment form, like '
+            'cashiers. A second run has --workers processes make read-then-write transactions directly, the '
+            'pattern that fails with "database is locked". Use a scratch copy of a generate_dataset database: it '
+            'gets the payments and is left in WAL mode.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes (default: 4).')
+        parser.add_argument('--readers', type=int, default=8, help='Concurrent reading clients (default: 8).')
+        parser.add_argument('--writers', type=int, default=4, help='Concurrent writing clients (default: 4).')
+        parser.add_argument('--seconds', type=float, default=20, help='Duration of each run (default: 20).')
+        parser.add_argument('--port', type=int, default=8765, help='Port gunicorn listens on (default: 8765).')
+        parser.add_argument('--profiles', default='default,tuned',
+                            help='Comma separated profiles to run, in order (default: default,tuned).')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('The default database is not SQLite.')
+        profiles = options['profiles'].split(',')
+        unknown = [profile for profile in profiles if profile not in PROFILES]
+        if unknown:
+            raise CommandError(f'Unknown profile(s): {", ".join(unknown)}; use {", ".join(PROFILES)}.')
+        members = list(Individual.objects.filter(church__isnull=False).values_list('id', 'church_id')[:1000])
+        contribution_type = ContributionType.objects.order_by('id').first()
+        if not members or contribution_type is None:
+            raise CommandError('No members or contribution types; run generate_dataset first.')
+
+        user, _ = get_user_model().objects.get_or_create(
+            username=BENCHMARK_USERNAME, defaults={'is_superuser': True, 'is_staff': True})
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        csrf_token = get_random_string(32)
+        cookie = f"sessionid={client.cookies['sessionid'].value}; csrftoken={csrf_token}"
+        read_paths = [reverse('payment:payment_list'), reverse('individual:individual_list'),
+                      reverse('report:dashboard'), reverse('chat:get_messages', args=[members[0][1]])]
+        write_path = reverse('payment:payment_create')
+        # Not numeric, so the OR number counter is left alone (apps/payment/or_numbers.py)
+        run = time.strftime('%Y%m%d%H%M%S')
+        or_numbers = itertools.count(1)
+
+        def payment_data():
+            member_id, _ = random.choice(members)
+            return {
+                'individual': member_id, 'amount': '100.00', 'date_paid': time.strftime('%Y-%m-%d'),
+                'or_number': f'SQLITE-{run}-{next(or_numbers)}', 'payment_method': 'CASH', 'gcash_reference_number': '',
+                'contribution_type': contribution_type.id,
+                'covered_members-TOTAL_FORMS': '1', 'covered_members-INITIAL_FORMS': '0',
+                'covered_members-MIN_NUM_FORMS': '0', 'covered_members-MAX_NUM_FORMS': '1000',
+                'covered_members-0-individual': member_id, 'covered_members-0-amount_covered': '100.00',
+            }
+        database = str(settings.DATABASES['default']['NAME'])
+        connection.close()
+
+        self.stdout.write(f"{options['workers']} gunicorn workers, {options['readers']} readers, "
+                          f"{options['writers']} writers, {options['seconds']:g} s per profile")
+        for profile in profiles:
+            if profile == 'default':
+                # WAL is stored in the database file; go back to the rollback journal first
+                with sqlite3.connect(database) as raw:
+                    raw.execute('PRAGMA journal_mode = DELETE')
+            load = self._run(profile, options, cookie, csrf_token, read_paths, write_path, payment_data)
+            self._report(profile, load, options['seconds'])
+            self._transactions(profile, database, options)
+
+    def _run(self, profile, options, cookie, csrf_token, read_paths, write_path, payment_data):
+        environment = dict(os.environ, **PROFILES[profile])
+        log = tempfile.TemporaryFile()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', 'kadamay.wsgi:application',
+             '--workers', str(options['workers']), '--bind', f"127.0.0.1:{options['port']}",
+             '--timeout', '120', '--log-level', 'warning'],
+            cwd=settings.BASE_DIR, env=environment, stdout=log, stderr=log)
+        base_url = f"http://127.0.0.1:{options['port']}"
+        try:
+            self._wait_until_up(server, base_url + read_paths[0], cookie)
+            load = _Load(base_url, cookie, csrf_token, read_paths, write_path, payment_data,
+                         deadline=time.perf_counter() + options['seconds'])
+            threads = [threading.Thread(target=load.reader) for _ in range(options['readers'])]
+            threads += [threading.Thread(target=load.writer) for _ in range(options['writers'])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return load
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+            log.close()
+
+    def _wait_until_up(self, server, url, cookie):
+        for _ in range(120):
+            if server.poll() is not None:
+                raise CommandError(f'gunicorn exited with code {server.returncode}.')
+            try:
+                with urllib.request.urlopen(urllib.request.Request(url, headers={'Cookie': cookie}), timeout=30):
+                    return
+            except OSError:
+                time.sleep(0.5)
+        raise CommandError('gunicorn did not answer within 60 seconds.')
+
+    def _transactions(self, profile, database, options):
+        with sqlite3.connect(database) as raw:
+            raw.execute(f'CREATE TABLE IF NOT EXISTS {SCRATCH_TABLE} (id INTEGER PRIMARY KEY, value TEXT)')
+        deadline = time.perf_counter() + options['seconds']
+        try:
+            with multiprocessing.Pool(options['workers']) as pool:
+                results = pool.map(_transaction_worker, [(database, profile, deadline)] * options['workers'])
+        finally:
+            with sqlite3.connect(database) as raw:
+                raw.execute(f'DROP TABLE {SCRATCH_TABLE}')
+        committed = sum(result[0] for result in results)
+        locked = sum(result[1] for result in results)
+        self.stdout.write(f'  {"transactions":<12} {committed / options["seconds"]:8.1f}/s  '
+                          f'{locked} failed with "database is locked"')
+
+    def _report(self, profile, load, seconds):
+        self.stdout.write(f'{profile}:')
+        for kind in ('read', 'write'):
+            timings = sorted(load.timings[kind])
+            errors = load.errors[kind]
+            line = f'  {kind + "s":<12} {len(timings) / seconds:8.1f}/s'
+            if timings:
+                p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+                line += f'  p50 {statistics.median(timings) * 1000:8.1f} ms  p95 {p95 * 1000:8.1f} ms'
+            failed = sum(errors.values())
+            line += f'  {failed} failed'
+            if errors:
+                line += ' (' + ', '.join(f'{count} {error}' for error, count in sorted(errors.items())) + ')'
+            self.stdout.write(line)
@@ -0,0 +1,202 @@
+# apps/report/management/commands/benchmark_views.py
+
+import json
+import re
+import statistics
+import time
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import timezone
+
+BENCHMARK_USERNAME = 'benchmark-admin'
+
+# Never driven: they log the client out, hold the connection open, or are not app pages
+SKIPPED_VIEWS = {'account:logout', 'chat:stream', 'chat:poll', 'account:password_reset_confirm'}
+SKIPPED_NAMESPACES = {'admin', 'django_browser_reload'}
+
+# URL kwargs that are not `pk`, and the model whose first row fills them in
+KWARG_MODELS = {
+    'church_id': 'church.Church',
+    'family_id': 'family.Family',
+    'individual_id': 'individual.Individual',
+    'user_id': 'auth.User',
+}
+
+# Views that need a query string to do real work
+QUERY_STRINGS = {
+    'individual:individual_list': 'search=santos',
+    'family:family_list': 'search=santos',
+    'individual:individual_search_api': 'query=juan',
+    'payment:api_search_individuals': 'query=juan',
+}
+
+# Counts recorded next to the results, so baselines from different datasets are not mixed up
+COUNTED_MODELS = ['church.Church', 'family.Family', 'individual.Individual', 'payment.Payment',
+                  'payment.PaymentCoveredMember', 'chat.ChatMessage', 'issues.IssueReport']
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def _walk(patterns, prefix='', namespace=None):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            nested = ':'.join(filter(None, [namespace, pattern.namespace])) or None
+            yield from _walk(pattern.url_patterns, prefix + str(pattern.pattern), nested)
+        elif isinstance(pattern, URLPattern):
+            yield prefix + str(pattern.pattern), namespace, pattern
+
+
+class Command(BaseCommand):
+    help = ('Requests every GET page in kadamay/urls.py through the test client (as a superuser) and '
+            'records latency percentiles and query counts to a JSON file; --compare diffs against an '
+            'earlier run. Generate data first with `generate_dataset`.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=10, help='Timed requests per URL (default: 10).')
+        parser.add_argument('--warmup', type=int, default=1, help='Untimed requests per URL first (default: 1).')
+        parser.add_argument('--output', help='Write the results to this JSON file (the new baseline).')
+        parser.add_argument('--compare', help='Earlier results JSON file to diff against.')
+        parser.add_argument('--filter', help='Only views whose name matches this regular expression.')
+        parser.add_argument('--threshold', type=float, default=20.0,
+                            help='Percent p95 slowdown reported as a regression (default: 20).')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Exit with an error if --compare finds a regression.')
+
+    def handle(self, *args, **options):
+        if options['repeat'] <= 0:
+            raise CommandError('--repeat must be a positive number.')
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as error:
+                raise CommandError(f'Cannot read {options["compare"]}: {error}')
+
+        user, _ = get_user_model().objects.get_or_create(
+            username=BENCHMARK_USERNAME, defaults={'is_superuser': True, 'is_staff': True})
+        client = Client(HTTP_HOST='localhost', raise_request_exception=False)
+        client.force_login(user)
+
+        results = {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'counts': {label: apps.get_model(label).objects.count() for label in COUNTED_MODELS},
+            'views': {},
+        }
+        self.stdout.write('Dataset: ' + ', '.join(f'{label.split(".")[1]}={count}'
+                                                  for label, count in results['counts'].items()))
+
+        for name, url in self._urls(options['filter']):
+            results['views'][name] = self._measure(client, url, options)
+            result = results['views'][name]
+            self.stdout.write(
+                f'  {name:<40} {result["status"]}  p50 {result["p50_ms"]:8.2f} ms  p95 {result["p95_ms"]:8.2f} ms  '
+                f'{result["queries"]:4d} queries  {result["bytes"] // 1024:6d} KB')
+
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump(results, output_file, indent=2, sort_keys=True)
+            self.stdout.write(f'Results written to {options["output"]}')
+
+        if baseline is not None:
+            regressions = self._compare(baseline, results, options['threshold'], options['filter'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f'{regressions} view(s) regressed against {options["compare"]}.')
+
+    def _urls(self, name_filter):
+        """(view name, URL) for every pattern whose arguments can be filled in."""
+        for route, namespace, pattern in _walk(get_resolver().url_patterns):
+            name = ':'.join(filter(None, [namespace, pattern.name]))
+            if not name or name in SKIPPED_VIEWS or (namespace or '').split(':')[0] in SKIPPED_NAMESPACES:
+                continue
+            if name_filter and not re.search(name_filter, name):
+                continue
+            kwargs = {}
+            for kwarg in pattern.pattern.regex.groupindex:
+                value = self._sample_value(pattern, kwarg)
+                if value is None:
+                    self.stdout.write(f'  {name:<40} skipped (no value for <{kwarg}>)')
+                    break
+                kwargs[kwarg] = value
+            else:
+                url = '/' + re.sub(r'<(?:\w+:)?(\w+)>', lambda match: str(kwargs[match.group(1)]), route)
+                if '^' in url or '(?P' in url:
+                    continue  # Regex routes (static/media serving)
+                query = QUERY_STRINGS.get(name)
+                yield name, f'{url}?{query}' if query else url
+
+    def _sample_value(self, pattern, kwarg):
+        if kwarg == 'pk':
+            model = getattr(getattr(pattern.callback, 'view_class', None), 'model', None)
+        else:
+            label = KWARG_MODELS.get(kwarg)
+            model = apps.get_model(label) if label else None
+        if model is None:
+            return None
+        return model.objects.order_by('pk').values_list('pk', flat=True).first()
+
+    def _measure(self, client, url, options):
+        for _ in range(options['warmup']):
+            client.get(url)
+        timings, queries = [], []
+        for _ in range(options['repeat']):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+        timings.sort()
+        return {
+            'url': url,
+            'status': response.status_code,
+            'p50_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(_percentile(timings, 0.95), 3),
+            'p99_ms': round(_percentile(timings, 0.99), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'queries': max(queries),
+            'bytes': 0 if response.streaming else len(response.content),
+        }
+
+    def _compare(self, baseline, results, threshold, name_filter=None):
+        """Prints the differences; returns how many views regressed."""
+        self.stdout.write(f'\nCompared with the run of {baseline.get("created_at", "?")}:')
+        if baseline.get('counts') != results['counts']:
+            self.stdout.write(self.style.WARNING('  (the datasets differ, so timings are only roughly comparable)'))
+        regressions = 0
+        old_views = baseline.get('views', {})
+        for name, new in results['views'].items():
+            old = old_views.get(name)
+            if old is None:
+                self.stdout.write(f'  {name:<40} new')
+                continue
+            change = (new['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100 if old['p95_ms'] else 0
+            query_delta = new['queries'] - old['queries']
+            problems = []
+            if query_delta > 0:
+                problems.append(f'+{query_delta} queries')
+            # Ignore sub-millisecond jitter on fast views
+            if change > threshold and new['p95_ms'] - old['p95_ms'] > 1:
+                problems.append(f'p95 {change:+.0f}%')
+            if new['status'] != old['status']:
+                problems.append(f'status {old["status"]} -> {new["status"]}')
+            line = (f'  {name:<40} p95 {old["p95_ms"]:8.2f} -> {new["p95_ms"]:8.2f} ms ({change:+5.0f}%)  '
+                    f'queries {old["queries"]} -> {new["queries"]}')
+            if problems:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(f'{line}  REGRESSION: {", ".join(problems)}'))
+            else:
+                self.stdout.write(line)
+        for name in sorted(set(old_views) - set(results['views'])):
+            if name_filter and not re.search(name_filter, name):
+                continue
+            self.stdout.write(f'  {name:<40} missing from this run')
+        return regressions
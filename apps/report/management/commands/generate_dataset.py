@@ -0,0 +1,44 @@
+# apps/report/management/commands/generate_dataset.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.report.synthetic import DatasetGenerator
+
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+
+class Command(BaseCommand):
+    help = ('Fills the database with synthetic churches, families, members, payments, chat messages '
+            'and issues for load testing (see apps/report/synthetic.py). Use a scratch database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), help='Preset number of members: 10k, 100k or 1m.')
+        parser.add_argument('--members', type=int, help='Exact number of members (instead of --scale).')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable data (default: 0).')
+        parser.add_argument('--months', type=int, default=12,
+                            help='Payments are spread over this many past months (default: 12).')
+        parser.add_argument('--payments-per-member', type=float, default=0.5,
+                            help='Payments generated per member (default: 0.5).')
+        parser.add_argument('--messages-per-member', type=float, default=0.1,
+                            help='Chat messages generated per member (default: 0.1).')
+
+    def handle(self, *args, **options):
+        members = options['members'] or SCALES.get(options['scale'])
+        if not members or members <= 0:
+            raise CommandError('Give --scale (10k, 100k, 1m) or a positive --members.')
+
+        self.stdout.write(f'Generating {members} members (seed {options["seed"]})...')
+        started = time.perf_counter()
+        counts = DatasetGenerator(
+            members,
+            seed=options['seed'],
+            months=options['months'],
+            payments_per_member=options['payments_per_member'],
+            messages_per_member=options['messages_per_member'],
+            log=self.stdout.write,
+        ).run()
+        for name, count in counts.items():
+            self.stdout.write(f'  {name}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'Done in {time.perf_counter() - started:.1f}s.'))
@@ -0,0 +1,79 @@
+# apps/report/management/commands/migrate_sqlite_to_postgres.py
+
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.common.sqlite_to_postgres import MigrationError, migrate_sqlite_to_postgres
+
+
+class Command(BaseCommand):
+    help = ('Copies every table of a SQLite database into the PostgreSQL database (DATABASE_URL) with COPY, '
+            'resets the id sequences and verifies row counts and checksums (see apps/common/sqlite_to_postgres.py). '
+            'The copied tables in PostgreSQL are emptied first.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default=str(settings.BASE_DIR / 'db.sqlite3'),
+                            help='The SQLite file to copy (default: db.sqlite3 in the project).')
+        parser.add_argument('--database', default='default',
+                            help='The PostgreSQL database alias to copy into (default: "default").')
+        parser.add_argument('--chunk-size', type=int, default=10000,
+                            help='Rows read from SQLite at a time (default: 10000).')
+        parser.add_argument('--exclude', action='append', default=[],
+                            help='An app label or app_label.ModelName not to copy, e.g. sessions. Repeatable.')
+        parser.add_argument('--skip-migrate', action='store_true',
+                            help='Do not run `migrate` on the target first.')
+        parser.add_argument('--skip-verify', action='store_true',
+                            help='Do not compare row counts and checksums afterwards.')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='Do not ask before emptying the target tables.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] <= 0:
+            raise CommandError('--chunk-size must be a positive number.')
+        using = options['database']
+        if connections[using].vendor != 'postgresql':
+            raise CommandError(f'The "{using}" database is {connections[using].vendor}; set DATABASE_URL to the '
+                               f'PostgreSQL database to copy into.')
+
+        if options['interactive']:
+            answer = input(f'This replaces the contents of the "{using}" database with {options["source"]}. '
+                           f'Type "yes" to continue: ')
+            if answer != 'yes':
+                raise CommandError('Cancelled.')
+
+        if not options['skip_migrate']:
+            self.stdout.write(f'Migrating "{using}"...')
+            call_command('migrate', database=using, interactive=False, verbosity=0)
+
+        self.stdout.write(f'Copying {options["source"]}...')
+        started = time.perf_counter()
+        try:
+            results = migrate_sqlite_to_postgres(
+                options['source'],
+                using=using,
+                chunk_size=options['chunk_size'],
+                exclude=options['exclude'],
+                verify=not options['skip_verify'],
+                progress=lambda message: self.stdout.write(f'  {message}'),
+            )
+        except MigrationError as error:
+            raise CommandError(str(error))
+        seconds = time.perf_counter() - started
+
+        rows = sum(result.rows for result in results)
+        self.stdout.write(f'{rows} rows in {len(results)} tables, {seconds:.1f} s '
+                          f'({rows / seconds if seconds else 0:,.0f} rows/s, verification included).')
+        if options['skip_verify']:
+            return
+        mismatches = [result for result in results if not result.verified]
+        for result in mismatches:
+            self.stderr.write(self.style.ERROR(
+                f'  {result.table}: {result.source_count} rows in SQLite, {result.target_count} in PostgreSQL'
+                + ('' if result.source_count != result.target_count else ', checksums differ')))
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} table(s) do not match the SQLite database.')
+        self.stdout.write(self.style.SUCCESS('All tables match the SQLite database.'))
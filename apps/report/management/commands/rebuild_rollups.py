@@ -0,0 +1,33 @@
+# apps/report/management/commands/rebuild_rollups.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.report.rollups import check_rollups, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the dashboard rollup tables from scratch and checks them against the live aggregates.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check-only', action='store_true',
+            help='Do not rebuild; only compare the current rollups against the live aggregates.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of rollup rows to insert per bulk_create batch (default: 1000).')
+
+    def handle(self, *args, **options):
+        if not options['check_only']:
+            self.stdout.write('Rebuilding dashboard rollups...')
+            written = rebuild_rollups(batch_size=options['batch_size'])
+            for name, count in written.items():
+                self.stdout.write(f'  {name}: {count} row(s)')
+
+        self.stdout.write('Checking rollups against live aggregates...')
+        mismatches = check_rollups()
+        for name, key, stored, live in mismatches:
+            self.stderr.write(self.style.ERROR(f'  {name} {key}: rollup={stored} live={live}'))
+
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} rollup row(s) do not match the live aggregates.')
+        self.stdout.write(self.style.SUCCESS('All dashboard rollups match the live aggregates.'))
@@ -0,0 +1,82 @@
+# apps/report/management/commands/run_report_worker.py
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+
+from apps.report.jobs import (claim_jobs, concurrent_jobs_supported, fail_job, requeue_stale, run_job,
+                              worker_name)
+
+
+def _init_process():
+    # Forked processes already have Django set up; spawned ones do not
+    import django
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = ('Runs queued report jobs (ReportLog rows with status QUEUED) in a pool of processes, '
+            'writing the files under MEDIA_ROOT/reports/. Several workers may run at once, on '
+            'one machine or several sharing the database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int,
+                            default=getattr(settings, 'REPORT_WORKER_PROCESSES', 2),
+                            help='Jobs run at the same time (default: REPORT_WORKER_PROCESSES).')
+        parser.add_argument('--poll', type=float,
+                            default=getattr(settings, 'REPORT_WORKER_POLL_SECONDS', 5),
+                            help='Seconds between looks at the queue when idle.')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when the queue is empty instead of waiting for more jobs.')
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        if processes <= 0:
+            raise CommandError('--processes must be a positive number.')
+        if processes > 1 and not concurrent_jobs_supported():
+            self.stderr.write('SQLite is not in WAL mode: running one job at a time.')
+            processes = 1
+        worker = worker_name()
+        self.stdout.write(f'Report worker {worker} with {processes} process(es).')
+
+        running = {}
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_process) as pool:
+            try:
+                while True:
+                    try:
+                        requeued = requeue_stale()
+                        claimed = claim_jobs(processes - len(running), worker)
+                    except OperationalError as error:
+                        # Database busy (SQLite while a job reads); try again on the next round
+                        self.stderr.write(f'Queue not checked: {error}')
+                        requeued, claimed = 0, []
+                    if requeued:
+                        self.stdout.write(f'Requeued {requeued} stale job(s).')
+                    for job_id in claimed:
+                        # Processes are forked on submit: never hand them an open connection
+                        connections.close_all()
+                        running[pool.submit(run_job, job_id, worker)] = job_id
+                        self.stdout.write(f'Job {job_id} started.')
+
+                    if not running:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll'])
+                        continue
+                    done, _ = wait(running, timeout=options['poll'], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job_id = running.pop(future)
+                        error = future.exception()
+                        if error is not None:
+                            fail_job(job_id, worker, f'The worker process crashed: {error!r}')
+                            self.stderr.write(f'Job {job_id} crashed its process: {error!r}')
+                            if isinstance(error, BrokenProcessPool):
+                                raise CommandError('The process pool is broken; restart the worker.')
+                        else:
+                            self.stdout.write(f'Job {job_id} finished.')
+            except KeyboardInterrupt:
+                self.stdout.write('Stopping; running jobs are requeued once their heartbeat goes stale.')
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.23 on 2026-10-18 07:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('family', '0003_remove_family_description_family_head_of_family_and_more'),
+        ('church', '0001_initial'),
+        ('contribution_type', '0001_initial'),
+        ('individual', '0001_initial'),
+        ('report', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FamilyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('member_count', models.IntegerField(default=0)),
+                ('church', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='family_rollups', to='church.church')),
+                ('family', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rollup', to='family.family')),
+            ],
+            options={
+                'verbose_name': 'Family Rollup',
+                'verbose_name_plural': 'Family Rollups',
+            },
+        ),
+        migrations.CreateModel(
+            name='ContributorRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('payment_count', models.IntegerField(default=0)),
+                ('church', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='contributor_rollups', to='church.church')),
+                ('individual', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='contributor_rollup', to='individual.individual')),
+            ],
+            options={
+                'verbose_name': 'Contributor Rollup',
+                'verbose_name_plural': 'Contributor Rollups',
+            },
+        ),
+        migrations.CreateModel(
+            name='MembershipRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('membership_status', models.CharField(max_length=150)),
+                ('member_count', models.IntegerField(default=0)),
+                ('church', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='membership_rollups', to='church.church')),
+            ],
+            options={
+                'verbose_name': 'Membership Rollup',
+                'verbose_name_plural': 'Membership Rollups',
+                'unique_together': {('church', 'membership_status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ContributionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('payment_count', models.IntegerField(default=0)),
+                ('church', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='contribution_rollups', to='church.church')),
+                ('contribution_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='contribution_rollups', to='contribution_type.contributiontype')),
+            ],
+            options={
+                'verbose_name': 'Contribution Rollup',
+                'verbose_name_plural': 'Contribution Rollups',
+                'unique_together': {('church', 'month', 'contribution_type')},
+            },
+        ),
+    ]
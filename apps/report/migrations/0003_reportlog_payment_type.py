@@ -0,0 +1,18 @@
+# Generated by Django 4.2.23 on 2026-10-18 08:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report', '0002_familyrollup_contributorrollup_membershiprollup_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportlog',
+            name='report_type',
+            field=models.CharField(choices=[('member_list', 'Member List'), ('payment', 'Payment Report'), ('contribution', 'Contribution Report'), ('family', 'Family Report'), ('deceased', 'Deceased Members'), ('inactive', 'Inactive Members'), ('custom', 'Custom Report')], max_length=20),
+        ),
+    ]
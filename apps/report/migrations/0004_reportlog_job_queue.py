@@ -0,0 +1,67 @@
+# Generated by Django 4.2.23 on 2026-10-18 08:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report', '0003_reportlog_payment_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportlog',
+            name='claimed_by',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='reportlog',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='reportlog',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reportlog',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reportlog',
+            name='output_file',
+            field=models.FileField(blank=True, max_length=255, upload_to='reports/'),
+        ),
+        migrations.AddField(
+            model_name='reportlog',
+            name='parameters',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='reportlog',
+            name='progress',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Percent done (0-100).'),
+        ),
+        migrations.AddField(
+            model_name='reportlog',
+            name='rows_total',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reportlog',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reportlog',
+            name='status',
+            field=models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='DONE', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='reportlog',
+            index=models.Index(fields=['status', 'id'], name='report_log_status_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.23 on 2026-10-18 09:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Sum
+
+COUNTED_PAYMENT_STATUSES = ('PAID', 'PENDING')
+
+
+def fill_dues_coverage(apps, schema_editor):
+    DuesCoverage = apps.get_model('report', 'DuesCoverage')
+    PaymentCoveredMember = apps.get_model('payment', 'PaymentCoveredMember')
+    rows = PaymentCoveredMember.objects.filter(
+        payment__status__in=COUNTED_PAYMENT_STATUSES, payment__contribution_type__isnull=False,
+    ).values('individual_id', 'payment__contribution_type_id').annotate(total=Sum('amount_covered')).order_by()
+    DuesCoverage.objects.bulk_create([
+        DuesCoverage(individual_id=row['individual_id'], contribution_type_id=row['payment__contribution_type_id'],
+                     amount_covered=row['total'])
+        for row in rows if row['total']
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contribution_type', '0002_dues_billing'),
+        ('individual', '0004_individualsearchdocument_updated_at_index'),
+        ('report', '0004_reportlog_job_queue'),
+        ('payment', '0003_ledgerentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuesCoverage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount_covered', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('contribution_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dues_coverage', to='contribution_type.contributiontype')),
+                ('individual', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dues_coverage', to='individual.individual')),
+            ],
+            options={
+                'verbose_name': 'Dues Coverage',
+                'verbose_name_plural': 'Dues Coverage',
+                'unique_together': {('contribution_type', 'individual')},
+            },
+        ),
+        migrations.RunPython(fill_dues_coverage, migrations.RunPython.noop),
+    ]
@@ -9,6 +9,7 @@ User = get_user_model()
 class ReportLog(models.Model):
     REPORT_TYPE_CHOICES = [
         ('member_list', 'Member List'),
+        ('payment', 'Payment Report'),
         ('contribution', 'Contribution Report'),
         ('family', 'Family Report'),
         ('deceased', 'Deceased Members'),
@@ -16,6 +17,20 @@ class ReportLog(models.Model):
         ('custom', 'Custom Report')
     ]
 
+    # A ReportLog is also a background job (apps/report/jobs.py): queued by a user,
+    # claimed and run by `python manage.py run_report_worker`, which writes the file
+    # under MEDIA_ROOT/reports/. Direct exports are logged straight as DONE.
+    STATUS_QUEUED = 'QUEUED'
+    STATUS_RUNNING = 'RUNNING'
+    STATUS_DONE = 'DONE'
+    STATUS_FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
     generated_by = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name='generated_report')
     report_type = models.CharField(max_length=20, choices=REPORT_TYPE_CHOICES)
@@ -23,9 +38,137 @@ class ReportLog(models.Model):
     church = models.ForeignKey(
         Church, on_delete=models.CASCADE, related_name='report', null=True, blank=True)
 
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_DONE)
+    # e.g. {"format": "xlsx"}
+    parameters = models.JSONField(default=dict, blank=True)
+    progress = models.PositiveSmallIntegerField(default=0, help_text='Percent done (0-100).')
+    rows_total = models.PositiveIntegerField(null=True, blank=True)
+    output_file = models.FileField(upload_to='reports/', max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    # Worker that claimed the job ("hostname:pid") and when; a RUNNING job whose worker
+    # stopped heartbeating is put back in the queue
+    claimed_by = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         verbose_name = 'Report Log'
         verbose_name_plural = 'Report Logs'
+        indexes = [
+            # The worker's "next queued job" lookup
+            models.Index(fields=['status', 'id'], name='report_log_status_idx'),
+        ]
 
     def __str__(self):
         return f"{self.report_type} report by {self.generated_by.username} on {self.timestamp.strftime('%Y-%m-%d')}"
+
+
+# --- Dashboard Rollup Tables ---
+# Kining mga tables kay summary lang sa Payment/Individual/Family data para dili
+# na mag-aggregate ang DashboardView sa tibuok tables kada page load.
+# They are kept current by the signal handlers in apps/report/signals.py and can
+# always be rebuilt from scratch with `python manage.py rebuild_rollups`.
+
+class ContributionRollup(models.Model):
+    """
+    Total of counted (non-cancelled) payments per church, per month and per
+    contribution type. The church is the payer's church (Payment.individual.church).
+    """
+    church = models.ForeignKey(
+        Church, on_delete=models.CASCADE, null=True, blank=True, related_name='contribution_rollups')
+    # Always the first day of the month (same value TruncMonth('date_paid') returns)
+    month = models.DateField()
+    contribution_type = models.ForeignKey(
+        'contribution_type.ContributionType', on_delete=models.CASCADE,
+        null=True, blank=True, related_name='contribution_rollups')
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payment_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Contribution Rollup'
+        verbose_name_plural = 'Contribution Rollups'
+        unique_together = ('church', 'month', 'contribution_type')
+
+    def __str__(self):
+        return f"{self.church or 'No Church'} {self.month:%Y-%m} - {self.total_amount}"
+
+
+class ContributorRollup(models.Model):
+    """
+    Total of counted payments made by one individual (as payer).
+    Used for the "Top Contributors" table and the active members count.
+    """
+    individual = models.OneToOneField(
+        'individual.Individual', on_delete=models.CASCADE, related_name='contributor_rollup')
+    church = models.ForeignKey(
+        Church, on_delete=models.CASCADE, null=True, blank=True, related_name='contributor_rollups')
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payment_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Contributor Rollup'
+        verbose_name_plural = 'Contributor Rollups'
+
+    def __str__(self):
+        return f"{self.individual} - {self.total_amount}"
+
+
+class MembershipRollup(models.Model):
+    """
+    Number of individuals per church and per membership status.
+    """
+    church = models.ForeignKey(
+        Church, on_delete=models.CASCADE, null=True, blank=True, related_name='membership_rollups')
+    # Raw membership_status value, or 'UNKNOWN' if the individual has none
+    membership_status = models.CharField(max_length=150)
+    member_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Membership Rollup'
+        verbose_name_plural = 'Membership Rollups'
+        unique_together = ('church', 'membership_status')
+
+    def __str__(self):
+        return f"{self.church or 'No Church'} {self.membership_status}: {self.member_count}"
+
+
+class FamilyRollup(models.Model):
+    """
+    One row per Family with its current member count.
+    The number of rows per church is the dashboard's "Total Families".
+    """
+    family = models.OneToOneField(
+        'family.Family', on_delete=models.CASCADE, related_name='rollup')
+    church = models.ForeignKey(
+        Church, on_delete=models.CASCADE, null=True, blank=True, related_name='family_rollups')
+    member_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Family Rollup'
+        verbose_name_plural = 'Family Rollups'
+
+    def __str__(self):
+        return f"{self.family} - {self.member_count} member(s)"
+
+
+class DuesCoverage(models.Model):
+    """
+    One row per (member, contribution type) with the total amount allocated to the
+    member (PaymentCoveredMember) by counted payments of that type. Divided by the
+    type's amount_per_period it gives the number of periods the member has paid for.
+    Kept up to date by apps/report/signals.py; rebuilt by `manage.py rebuild_rollups`.
+    """
+    individual = models.ForeignKey(
+        'individual.Individual', on_delete=models.CASCADE, related_name='dues_coverage')
+    contribution_type = models.ForeignKey(
+        'contribution_type.ContributionType', on_delete=models.CASCADE, related_name='dues_coverage')
+    amount_covered = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Dues Coverage'
+        verbose_name_plural = 'Dues Coverage'
+        unique_together = ('contribution_type', 'individual')
+
+    def __str__(self):
+        return f"{self.individual_id} - {self.contribution_type_id}: {self.amount_covered}"
@@ -0,0 +1,173 @@
+# apps/report/pdf.py
+# PDF rendering para sa member list reports (templates/report/pdf/member_list.html).
+#
+# A report is split into chunks of PDF_ROWS_PER_CHUNK members. Each chunk is rendered
+# from the template and converted to PDF by WeasyPrint in a pool of worker processes,
+# then the chunk PDFs are joined with pypdf. Layout cost grows faster than linearly
+# with document length in WeasyPrint, so small chunks in parallel beat one big page.
+#
+# Every pool process compiles the template once (in its initializer) and keeps the
+# compiled Template, instead of loading and parsing it per chunk.
+#
+# Finished PDFs are kept under MEDIA_ROOT/reports/pdf/, named after a hash of the
+# member rows, the report type, the church and the template source. Reprinting a
+# church whose members did not change finds the file and returns at once; any edit
+# to a member (or the template) changes the hash and produces a new file.
+#
+# Rendering is slow by nature: it runs in the report worker (apps/report/jobs.py),
+# never in a web request. WeasyPrint and pypdf are only imported where they are used.
+
+import hashlib
+import io
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.template.loader import get_template
+from django.utils import timezone
+
+from apps.individual.models import Individual
+
+TEMPLATE_NAME = 'report/pdf/member_list.html'
+PDF_DIR = 'reports/pdf'
+
+# ReportLog.report_type -> (title, member filter)
+PDF_REPORTS = {
+    'member_list': ('Member List Report', {}),
+    'deceased': ('Deceased Members Report', {'is_alive': False}),
+    'inactive': ('Inactive Members Report', {'membership_status': 'INACTIVE'}),
+}
+
+MEMBER_FIELDS = ('id', 'membership_id', 'surname', 'given_name', 'middle_name', 'suffix_name',
+                 'family__family_name', 'relationship', 'birth_date', 'membership_status', 'is_alive')
+
+_template = None
+_pool = None
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _compiled_template():
+    global _template
+    if _template is None:
+        _template = get_template(TEMPLATE_NAME)
+    return _template
+
+
+def _template_source():
+    return _compiled_template().template.source
+
+
+def _init_process():
+    # Forked processes already have Django set up; spawned ones do not
+    import django
+    django.setup()
+    _compiled_template()
+
+
+def _render_chunk(context):
+    """HTML and then PDF bytes for one chunk. Runs in a pool process."""
+    from weasyprint import HTML
+
+    html = _compiled_template().render(context)
+    return HTML(string=html, base_url=str(settings.BASE_DIR)).write_pdf()
+
+
+def _merge(documents):
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for document in documents:
+        writer.append(io.BytesIO(document))
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # The pool processes never touch the database; do not hand them open connections
+        connections.close_all()
+        _pool = ProcessPoolExecutor(max_workers=_setting('PDF_RENDER_PROCESSES', 2),
+                                    initializer=_init_process)
+    return _pool
+
+
+def member_rows(report_type, church_id):
+    title, filters = PDF_REPORTS[report_type]
+    return list(
+        Individual.objects.filter(church_id=church_id, **filters)
+        .order_by('surname', 'given_name', 'id').values(*MEMBER_FIELDS)
+    )
+
+
+def data_version(report_type, church_id, rows):
+    """Hash of everything that ends up in the PDF except the generated-at/by line."""
+    digest = hashlib.sha256()
+    digest.update(f'{report_type}:{church_id}:'.encode())
+    digest.update(_template_source().encode())
+    for row in rows:
+        digest.update(repr(tuple(row[field] for field in MEMBER_FIELDS)).encode())
+    return digest.hexdigest()[:32]
+
+
+def pdf_name(report_type, church_id, version):
+    return f'{PDF_DIR}/{report_type}-church-{church_id}-{version}.pdf'
+
+
+def cached_pdf(report_type, church_id, rows=None):
+    """(name relative to MEDIA_ROOT, rows) of the already rendered PDF; name is None if there is none."""
+    if rows is None:
+        rows = member_rows(report_type, church_id)
+    name = pdf_name(report_type, church_id, data_version(report_type, church_id, rows))
+    return (name if (Path(settings.MEDIA_ROOT) / name).exists() else None), rows
+
+
+def render_pdf(rows, context, rows_per_chunk=None, pool=None, progress=None):
+    """
+    PDF bytes of the template over `rows` (member dicts), rendered chunk by chunk in
+    `pool` (default: this process's shared pool). `context` is shared by all chunks.
+    """
+    rows_per_chunk = rows_per_chunk or _setting('PDF_ROWS_PER_CHUNK', 300)
+    starts = range(0, max(len(rows), 1), rows_per_chunk)
+    contexts = [
+        dict(context, members=rows[start:start + rows_per_chunk], total_members=len(rows),
+             first_chunk=start == 0, last_chunk=start + rows_per_chunk >= len(rows))
+        for start in starts
+    ]
+    documents = []
+    for document in (pool or _get_pool()).map(_render_chunk, contexts):
+        documents.append(document)
+        if progress is not None:
+            progress(len(documents), len(contexts))
+    return _merge(documents)
+
+
+def render_member_report(report_type, church, generated_by, progress=None):
+    """
+    Renders (or finds) the PDF of a member report for one church. Returns its name
+    relative to MEDIA_ROOT and whether it came from the cache.
+    """
+    name, rows = cached_pdf(report_type, church.id)
+    if name is not None:
+        return name, True
+
+    name = pdf_name(report_type, church.id, data_version(report_type, church.id, rows))
+    title, _ = PDF_REPORTS[report_type]
+    document = render_pdf(rows, {
+        'church_name': church.name,
+        'title': title,
+        'generated_at': timezone.localtime(),
+        'generated_by': generated_by.get_full_name() or generated_by.username,
+    }, progress=progress)
+
+    path = Path(settings.MEDIA_ROOT) / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + '.part')
+    partial.write_bytes(document)
+    partial.replace(path)
+    return name, False
@@ -0,0 +1,466 @@
+# apps/report/rollups.py
+# Helper functions para sa dashboard rollup tables (see apps/report/models.py).
+# Ang signal handlers (apps/report/signals.py) ug ang rebuild_rollups command
+# mogamit ani.
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+
+from apps.family.models import Family
+from apps.individual.models import Individual
+from apps.payment.models import Payment, PaymentCoveredMember
+
+from .dashboard_cache import invalidate_dashboard
+from .models import ContributionRollup, ContributorRollup, DuesCoverage, FamilyRollup, MembershipRollup
+
+# Payments with these statuses are counted in all dashboard totals (everything except CANCELLED)
+COUNTED_PAYMENT_STATUSES = ('PAID', 'PENDING')
+
+# Membership status used when an Individual has none set
+UNKNOWN_STATUS = 'UNKNOWN'
+
+
+def month_start(value):
+    """Returns the first day of the month of the given date (or None)."""
+    return value.replace(day=1) if value else None
+
+
+def membership_key(status):
+    return status or UNKNOWN_STATUS
+
+
+def _bump(model, lookup, defaults=None, **deltas):
+    """
+    Adds the given deltas to the rollup row matching `lookup` using F() expressions,
+    so concurrent writers never overwrite each other's totals.
+    A missing row is only created for positive changes; decrements on a missing row are
+    ignored (the row was already cascaded away, e.g. while deleting an Individual).
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    pk = model.objects.filter(**lookup).values_list('pk', flat=True).first()
+    if pk is None:
+        if all(delta < 0 for delta in deltas.values()):
+            return
+        # Another writer may create the row after our lookup: get_or_create() inserts in a
+        # savepoint and reads that row when the unique constraint refuses ours, so the
+        # payment being saved is not rolled back
+        pk = model.objects.get_or_create(**lookup, defaults=defaults or {})[0].pk
+
+    model.objects.filter(pk=pk).update(
+        **{field: F(field) + delta for field, delta in deltas.items()})
+
+
+# --- Payment ---
+
+def payment_snapshot(payment):
+    """
+    Returns the part of a Payment that the rollups depend on, or None if the payment
+    is not counted (e.g. CANCELLED).
+    """
+    if payment is None or payment.status not in COUNTED_PAYMENT_STATUSES:
+        return None
+    return {
+        'individual_id': payment.individual_id,
+        'church_id': payment.individual.church_id if payment.individual_id else None,
+        'month': month_start(payment.date_paid),
+        'contribution_type_id': payment.contribution_type_id,
+        'amount': Decimal(payment.amount or 0),
+    }
+
+
+def stored_payment_snapshot(pk):
+    """Same as payment_snapshot() but reads the row currently saved in the database."""
+    row = Payment.objects.filter(pk=pk).values(
+        'individual_id', 'individual__church_id', 'date_paid',
+        'contribution_type_id', 'amount', 'status',
+    ).first()
+    if row is None or row['status'] not in COUNTED_PAYMENT_STATUSES:
+        return None
+    return {
+        'individual_id': row['individual_id'],
+        'church_id': row['individual__church_id'],
+        'month': month_start(row['date_paid']),
+        'contribution_type_id': row['contribution_type_id'],
+        'amount': Decimal(row['amount'] or 0),
+    }
+
+
+def _apply_payment(snapshot, sign):
+    if snapshot is None:
+        return
+    _bump(
+        ContributionRollup,
+        {
+            'church_id': snapshot['church_id'],
+            'month': snapshot['month'],
+            'contribution_type_id': snapshot['contribution_type_id'],
+        },
+        total_amount=sign * snapshot['amount'],
+        payment_count=sign,
+    )
+    _bump(
+        ContributorRollup,
+        {'individual_id': snapshot['individual_id']},
+        defaults={'church_id': snapshot['church_id']},
+        total_amount=sign * snapshot['amount'],
+        payment_count=sign,
+    )
+
+
+def apply_payment_change(old, new):
+    """Moves a payment's contribution from its old snapshot to its new one."""
+    if old == new:
+        return
+    _apply_payment(old, -1)
+    _apply_payment(new, 1)
+
+
+# --- Individual ---
+
+def individual_snapshot(individual):
+    if individual is None:
+        return None
+    return {
+        'church_id': individual.church_id,
+        'membership_status': membership_key(individual.membership_status),
+        'family_id': individual.family_id,
+    }
+
+
+def stored_individual_snapshot(pk):
+    row = Individual.objects.filter(pk=pk).values(
+        'church_id', 'membership_status', 'family_id').first()
+    if row is None:
+        return None
+    row['membership_status'] = membership_key(row['membership_status'])
+    return row
+
+
+def _move_individual_contributions(individual_id, old_church_id, new_church_id):
+    """
+    When an Individual moves to another church, all of their counted payments move
+    with them (payments are grouped by the payer's church).
+    """
+    per_key = Payment.objects.filter(
+        individual_id=individual_id, status__in=COUNTED_PAYMENT_STATUSES
+    ).annotate(
+        month=TruncMonth('date_paid')
+    ).values('month', 'contribution_type_id').annotate(
+        total=Coalesce(Sum('amount'), Decimal(0)),
+        count=Count('id'),
+    ).order_by()
+    for row in per_key:
+        for church_id, sign in ((old_church_id, -1), (new_church_id, 1)):
+            _bump(
+                ContributionRollup,
+                {
+                    'church_id': church_id,
+                    'month': row['month'],
+                    'contribution_type_id': row['contribution_type_id'],
+                },
+                total_amount=sign * row['total'],
+                payment_count=sign * row['count'],
+            )
+    ContributorRollup.objects.filter(individual_id=individual_id).update(church_id=new_church_id)
+
+
+def apply_individual_change(individual_id, old, new):
+    """Applies an Individual create (old=None), update, or delete (new=None)."""
+    if old == new:
+        return
+
+    for snapshot, sign in ((old, -1), (new, 1)):
+        if snapshot is None:
+            continue
+        _bump(
+            MembershipRollup,
+            {'church_id': snapshot['church_id'], 'membership_status': snapshot['membership_status']},
+            member_count=sign,
+        )
+        if snapshot['family_id']:
+            # Only touch existing FamilyRollup rows; they are created by the Family signals
+            FamilyRollup.objects.filter(family_id=snapshot['family_id']).update(
+                member_count=F('member_count') + sign)
+
+    if old and new and old['church_id'] != new['church_id']:
+        _move_individual_contributions(individual_id, old['church_id'], new['church_id'])
+
+
+# --- Family ---
+
+def apply_family_saved(family, created):
+    if created:
+        FamilyRollup.objects.create(
+            family=family,
+            church_id=family.church_id,
+            member_count=Individual.objects.filter(family=family).count(),
+        )
+    else:
+        updated = FamilyRollup.objects.filter(family=family).update(church_id=family.church_id)
+        if not updated:
+            apply_family_saved(family, created=True)
+
+
+# --- Dues coverage ---
+
+def dues_key(snapshot):
+    """What a payment's allocations count towards: its contribution type, or None if not counted."""
+    return snapshot['contribution_type_id'] if snapshot else None
+
+
+def _live_dues_coverage(allocations):
+    return allocations.filter(
+        payment__status__in=COUNTED_PAYMENT_STATUSES, payment__contribution_type__isnull=False,
+    ).values('individual_id', 'payment__contribution_type_id').annotate(
+        total=Coalesce(Sum('amount_covered'), Decimal(0)),
+    ).order_by()
+
+
+def refresh_dues_coverage(individual_ids):
+    """Recomputes the DuesCoverage rows of the given members from their allocations."""
+    individual_ids = sorted({pk for pk in individual_ids if pk})
+    if not individual_ids:
+        return
+    with transaction.atomic():
+        # Lock the members so two transactions never rewrite the same rows at once
+        list(Individual.objects.select_for_update().filter(pk__in=individual_ids).values_list('pk', flat=True))
+        DuesCoverage.objects.filter(individual_id__in=individual_ids).delete()
+        DuesCoverage.objects.bulk_create([
+            DuesCoverage(individual_id=row['individual_id'],
+                         contribution_type_id=row['payment__contribution_type_id'], amount_covered=row['total'])
+            for row in _live_dues_coverage(PaymentCoveredMember.objects.filter(individual_id__in=individual_ids))
+            if row['total']
+        ])
+
+
+# --- Church / ContributionType ---
+# Deleting a Church sets Individual.church / Family.church to NULL and deleting a
+# ContributionType sets Payment.contribution_type to NULL, both without save signals,
+# while their rollup rows are removed by on_delete=CASCADE. The rows are read before
+# the delete and added back under the NULL key, so nothing else has to be recomputed.
+
+def _merge_rows(model, key_fields, rows, batch_size=1000, **target):
+    """
+    Adds each row ({field: value}) to the row of `model` that has the same key_fields and
+    the `target` values (e.g. church_id=None). Existing rows get F() deltas like _bump();
+    the missing ones are created in bulk instead of one get_or_create() per row.
+    """
+    existing = {
+        tuple(values[:-1]): values[-1]
+        for values in model.objects.filter(**target).values_list(*key_fields, 'pk')
+    }
+    missing = []
+    for row in rows:
+        row = {**row, **target}
+        pk = existing.get(tuple(row[field] for field in key_fields))
+        if pk is None:
+            missing.append(model(**row))
+            continue
+        model.objects.filter(pk=pk).update(**{
+            field: F(field) + delta
+            for field, delta in row.items() if field not in key_fields and field not in target
+        })
+    model.objects.bulk_create(missing, batch_size=batch_size)
+
+
+def church_rollup_rows(church_id):
+    """Returns the rollup rows of a Church that is about to be deleted."""
+    return {
+        'contributions': list(ContributionRollup.objects.filter(church_id=church_id).values(
+            'month', 'contribution_type_id', 'total_amount', 'payment_count')),
+        'memberships': list(MembershipRollup.objects.filter(church_id=church_id).values(
+            'membership_status', 'member_count')),
+        'contributors': list(ContributorRollup.objects.filter(church_id=church_id).values(
+            'individual_id', 'total_amount', 'payment_count')),
+        'families': list(FamilyRollup.objects.filter(church_id=church_id).values(
+            'family_id', 'member_count')),
+    }
+
+
+def apply_church_deleted(rows, batch_size=1000):
+    """Moves the rollup rows of a deleted Church (see church_rollup_rows()) to "No Church"."""
+    _merge_rows(ContributionRollup, ('month', 'contribution_type_id'), rows['contributions'],
+                batch_size=batch_size, church_id=None)
+    _merge_rows(MembershipRollup, ('membership_status',), rows['memberships'],
+                batch_size=batch_size, church_id=None)
+    # One row per member/family, and the cascade removed them all: nothing to merge with
+    ContributorRollup.objects.bulk_create(
+        [ContributorRollup(church_id=None, **row) for row in rows['contributors']], batch_size=batch_size)
+    FamilyRollup.objects.bulk_create(
+        [FamilyRollup(church_id=None, **row) for row in rows['families']], batch_size=batch_size)
+
+
+def contribution_type_rollup_rows(contribution_type_id):
+    """Returns the ContributionRollup rows of a ContributionType that is about to be deleted."""
+    return list(ContributionRollup.objects.filter(contribution_type_id=contribution_type_id).values(
+        'church_id', 'month', 'total_amount', 'payment_count'))
+
+
+def apply_contribution_type_deleted(rows, batch_size=1000):
+    """
+    Moves the totals of a deleted ContributionType to the rows without a type.
+    Its DuesCoverage rows are simply gone: payments without a type cover no dues.
+    """
+    _merge_rows(ContributionRollup, ('church_id', 'month'), rows,
+                batch_size=batch_size, contribution_type_id=None)
+    invalidate_dashboard(*{row['church_id'] for row in rows})
+
+
+# --- Rebuild / Check ---
+
+def compute_live_rollups():
+    """
+    Computes every rollup straight from the Payment/Individual/Family tables.
+    Returns a dict of {rollup name: {key tuple: values tuple}}.
+    """
+    counted_payments = Payment.objects.filter(status__in=COUNTED_PAYMENT_STATUSES)
+
+    contributions = {}
+    for row in counted_payments.annotate(
+        month=TruncMonth('date_paid')
+    ).values('individual__church_id', 'month', 'contribution_type_id').annotate(
+        total=Coalesce(Sum('amount'), Decimal(0)),
+        count=Count('id'),
+    ).order_by():
+        key = (row['individual__church_id'], row['month'], row['contribution_type_id'])
+        contributions[key] = (row['total'], row['count'])
+
+    contributors = {}
+    for row in counted_payments.values('individual_id', 'individual__church_id').annotate(
+        total=Coalesce(Sum('amount'), Decimal(0)),
+        count=Count('id'),
+    ).order_by():
+        contributors[(row['individual_id'],)] = (
+            row['individual__church_id'], row['total'], row['count'])
+
+    memberships = defaultdict(int)
+    for row in Individual.objects.values('church_id', 'membership_status').annotate(
+        count=Count('id')
+    ).order_by():
+        memberships[(row['church_id'], membership_key(row['membership_status']))] += row['count']
+
+    families = {}
+    for row in Family.objects.values('id', 'church_id').annotate(
+        count=Count('members')
+    ).order_by():
+        families[(row['id'],)] = (row['church_id'], row['count'])
+
+    dues_coverage = {
+        (row['individual_id'], row['payment__contribution_type_id']): (row['total'],)
+        for row in _live_dues_coverage(PaymentCoveredMember.objects.all())
+        if row['total']
+    }
+
+    return {
+        'contributions': contributions,
+        'contributors': contributors,
+        'memberships': {key: (count,) for key, count in memberships.items() if count},
+        'families': families,
+        'dues_coverage': dues_coverage,
+    }
+
+
+def compute_stored_rollups():
+    """Reads the rollup tables into the same shape as compute_live_rollups()."""
+    contributions = defaultdict(lambda: [Decimal(0), 0])
+    for row in ContributionRollup.objects.values_list(
+            'church_id', 'month', 'contribution_type_id', 'total_amount', 'payment_count'):
+        totals = contributions[row[:3]]
+        totals[0] += row[3]
+        totals[1] += row[4]
+
+    memberships = defaultdict(int)
+    for church_id, status, count in MembershipRollup.objects.values_list(
+            'church_id', 'membership_status', 'member_count'):
+        memberships[(church_id, status)] += count
+
+    return {
+        'contributions': {key: tuple(values) for key, values in contributions.items() if values[1]},
+        'contributors': {
+            (individual_id,): (church_id, total, count)
+            for individual_id, church_id, total, count in ContributorRollup.objects.filter(
+                payment_count__gt=0).values_list('individual_id', 'church_id', 'total_amount', 'payment_count')
+        },
+        'memberships': {key: (count,) for key, count in memberships.items() if count},
+        'families': {
+            (family_id,): (church_id, count)
+            for family_id, church_id, count in FamilyRollup.objects.values_list(
+                'family_id', 'church_id', 'member_count')
+        },
+        'dues_coverage': {
+            (individual_id, contribution_type_id): (amount,)
+            for individual_id, contribution_type_id, amount in DuesCoverage.objects.exclude(
+                amount_covered=0).values_list('individual_id', 'contribution_type_id', 'amount_covered')
+        },
+    }
+
+
+def check_rollups():
+    """
+    Compares the rollup tables against the live aggregates.
+    Returns a list of (rollup name, key, stored values, live values) for every mismatch.
+    """
+    live = compute_live_rollups()
+    stored = compute_stored_rollups()
+
+    mismatches = []
+    for name, live_rows in live.items():
+        stored_rows = stored[name]
+        for key in sorted(set(live_rows) | set(stored_rows), key=str):
+            if live_rows.get(key) != stored_rows.get(key):
+                mismatches.append((name, key, stored_rows.get(key), live_rows.get(key)))
+    return mismatches
+
+
+@transaction.atomic
+def rebuild_rollups(batch_size=1000):
+    """
+    Throws away every rollup row and recreates them from the live tables.
+    Returns the number of rows written per rollup.
+    """
+    live = compute_live_rollups()
+
+    ContributionRollup.objects.all().delete()
+    ContributorRollup.objects.all().delete()
+    MembershipRollup.objects.all().delete()
+    FamilyRollup.objects.all().delete()
+    DuesCoverage.objects.all().delete()
+
+    ContributionRollup.objects.bulk_create([
+        ContributionRollup(
+            church_id=church_id, month=month, contribution_type_id=contribution_type_id,
+            total_amount=total, payment_count=count,
+        )
+        for (church_id, month, contribution_type_id), (total, count) in live['contributions'].items()
+    ], batch_size=batch_size)
+    ContributorRollup.objects.bulk_create([
+        ContributorRollup(
+            individual_id=individual_id, church_id=church_id,
+            total_amount=total, payment_count=count,
+        )
+        for (individual_id,), (church_id, total, count) in live['contributors'].items()
+    ], batch_size=batch_size)
+    MembershipRollup.objects.bulk_create([
+        MembershipRollup(church_id=church_id, membership_status=status, member_count=count)
+        for (church_id, status), (count,) in live['memberships'].items()
+    ], batch_size=batch_size)
+    FamilyRollup.objects.bulk_create([
+        FamilyRollup(family_id=family_id, church_id=church_id, member_count=count)
+        for (family_id,), (church_id, count) in live['families'].items()
+    ], batch_size=batch_size)
+    DuesCoverage.objects.bulk_create([
+        DuesCoverage(individual_id=individual_id, contribution_type_id=contribution_type_id, amount_covered=amount)
+        for (individual_id, contribution_type_id), (amount,) in live['dues_coverage'].items()
+    ], batch_size=batch_size)
+
+    # Every cached dashboard was computed from the old rollups
+    invalidate_dashboard()
+
+    return {name: len(rows) for name, rows in live.items()}
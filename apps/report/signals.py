@@ -0,0 +1,223 @@
+# apps/report/signals.py
+# Signal handlers nga mo-update sa dashboard rollup tables (apps/report/rollups.py)
+# every time a Payment, PaymentCoveredMember, Individual or Family is saved or deleted,
+# and that mark the cached dashboards (apps/report/dashboard_cache.py) of the affected
+# churches as stale.
+# NOTE: QuerySet.update()/bulk_create() do not send signals. After bulk changes,
+# run `python manage.py rebuild_rollups` to bring the rollups back in sync.
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.church.models import Church
+from apps.contribution_type.models import ContributionType
+from apps.family.models import Family
+from apps.individual.models import Individual
+from apps.payment.models import Payment, PaymentCoveredMember
+
+from . import rollups
+from .dashboard_cache import invalidate_dashboard
+
+
+# --- Payment ---
+
+@receiver(pre_save, sender=Payment)
+def remember_payment_before_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._rollup_previous = rollups.stored_payment_snapshot(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=Payment)
+def update_rollups_on_payment_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    with transaction.atomic():
+        rollups.apply_payment_change(
+            getattr(instance, '_rollup_previous', None),
+            rollups.payment_snapshot(instance),
+        )
+
+
+@receiver(pre_delete, sender=Payment)
+def remember_payment_before_delete(sender, instance, **kwargs):
+    instance._rollup_previous = rollups.stored_payment_snapshot(instance.pk)
+
+
+@receiver(post_delete, sender=Payment)
+def update_rollups_on_payment_delete(sender, instance, **kwargs):
+    rollups.apply_payment_change(getattr(instance, '_rollup_previous', None), None)
+
+
+# --- Individual ---
+
+@receiver(pre_save, sender=Individual)
+def remember_individual_before_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._rollup_previous = rollups.stored_individual_snapshot(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=Individual)
+def update_rollups_on_individual_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    with transaction.atomic():
+        rollups.apply_individual_change(
+            instance.pk,
+            getattr(instance, '_rollup_previous', None),
+            rollups.individual_snapshot(instance),
+        )
+
+
+@receiver(pre_delete, sender=Individual)
+def remember_individual_before_delete(sender, instance, **kwargs):
+    instance._rollup_previous = rollups.stored_individual_snapshot(instance.pk)
+
+
+@receiver(post_delete, sender=Individual)
+def update_rollups_on_individual_delete(sender, instance, **kwargs):
+    rollups.apply_individual_change(instance.pk, getattr(instance, '_rollup_previous', None), None)
+
+
+# --- Family ---
+
+@receiver(post_save, sender=Family)
+def update_rollups_on_family_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    rollups.apply_family_saved(instance, created)
+    # FamilyRollup rows are removed together with their Family (on_delete=CASCADE)
+
+
+# --- Dues coverage (DuesCoverage) ---
+# Coverage is the sum of a member's allocations per contribution type, so it changes
+# when an allocation changes, or when its payment changes type or stops being counted.
+
+@receiver(post_save, sender=Payment)
+def refresh_dues_coverage_on_payment_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = rollups.dues_key(getattr(instance, '_rollup_previous', None))
+    if previous != rollups.dues_key(rollups.payment_snapshot(instance)):
+        rollups.refresh_dues_coverage(
+            PaymentCoveredMember.objects.filter(payment=instance).values_list('individual_id', flat=True))
+
+
+@receiver(pre_save, sender=PaymentCoveredMember)
+def remember_covered_member_before_save(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        instance._previous_individual_id = None
+        return
+    instance._previous_individual_id = PaymentCoveredMember.objects.filter(
+        pk=instance.pk).values_list('individual_id', flat=True).first()
+
+
+@receiver(post_save, sender=PaymentCoveredMember)
+def refresh_dues_coverage_on_covered_member_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    rollups.refresh_dues_coverage([instance.individual_id, getattr(instance, '_previous_individual_id', None)])
+
+
+@receiver(post_delete, sender=PaymentCoveredMember)
+def refresh_dues_coverage_on_covered_member_delete(sender, instance, **kwargs):
+    rollups.refresh_dues_coverage([instance.individual_id])
+
+
+# --- Church / ContributionType ---
+# Deleting these sets Individual.church / Family.church / Payment.contribution_type to
+# NULL without sending any save signals and cascades their rollup rows away, so the rows
+# are read before the delete and moved to the NULL key afterwards (see rollups.py).
+
+@receiver(pre_delete, sender=Church)
+def remember_church_rollups_before_delete(sender, instance, **kwargs):
+    instance._rollup_rows = rollups.church_rollup_rows(instance.pk)
+
+
+@receiver(post_delete, sender=Church)
+def update_rollups_on_church_delete(sender, instance, **kwargs):
+    rollups.apply_church_deleted(instance._rollup_rows)
+
+
+@receiver(pre_delete, sender=ContributionType)
+def remember_contribution_type_rollups_before_delete(sender, instance, **kwargs):
+    instance._rollup_rows = rollups.contribution_type_rollup_rows(instance.pk)
+
+
+@receiver(post_delete, sender=ContributionType)
+def update_rollups_on_contribution_type_delete(sender, instance, **kwargs):
+    rollups.apply_contribution_type_deleted(instance._rollup_rows)
+
+
+# --- Dashboard Cache Invalidation ---
+# The pre_save/pre_delete handlers above leave the previous rollup snapshot on the
+# instance (`_rollup_previous`), which tells us the church an object is moving away from.
+
+def _snapshot_church(instance):
+    previous = getattr(instance, '_rollup_previous', None)
+    return previous['church_id'] if previous else None
+
+
+@receiver(post_save, sender=Payment)
+def invalidate_dashboard_on_payment_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_dashboard(_snapshot_church(instance), instance.individual.church_id)
+
+
+@receiver(post_delete, sender=Payment)
+def invalidate_dashboard_on_payment_delete(sender, instance, **kwargs):
+    invalidate_dashboard(_snapshot_church(instance))
+
+
+@receiver(post_save, sender=PaymentCoveredMember)
+@receiver(post_delete, sender=PaymentCoveredMember)
+def invalidate_dashboard_on_covered_member_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    payer_church_id = Payment.objects.filter(
+        pk=instance.payment_id).values_list('individual__church_id', flat=True).first()
+    invalidate_dashboard(payer_church_id)
+
+
+@receiver(post_save, sender=Individual)
+def invalidate_dashboard_on_individual_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_dashboard(_snapshot_church(instance), instance.church_id)
+
+
+@receiver(post_delete, sender=Individual)
+def invalidate_dashboard_on_individual_delete(sender, instance, **kwargs):
+    invalidate_dashboard(_snapshot_church(instance), instance.church_id)
+
+
+@receiver(pre_save, sender=Family)
+def remember_family_church_before_save(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        instance._previous_church_id = None
+        return
+    instance._previous_church_id = Family.objects.filter(
+        pk=instance.pk).values_list('church_id', flat=True).first()
+
+
+@receiver(post_save, sender=Family)
+def invalidate_dashboard_on_family_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_dashboard(getattr(instance, '_previous_church_id', None), instance.church_id)
+
+
+@receiver(post_delete, sender=Family)
+def invalidate_dashboard_on_family_delete(sender, instance, **kwargs):
+    invalidate_dashboard(instance.church_id)
+
+
+@receiver(post_save, sender=Church)
+@receiver(post_delete, sender=Church)
+def invalidate_dashboard_on_church_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_dashboard(instance.pk)
@@ -0,0 +1,264 @@
+# apps/report/synthetic.py
+# Synthetic dataset para sa local load testing: districts, churches, families with
+# FamilyMember rows, individuals, payments with PaymentCoveredMember splits, chat
+# messages and issue reports, at a chosen number of members (10k, 100k, 1M...).
+#
+# Everything is written with bulk_create in chunks of families, so memory stays flat
+# at any scale. bulk_create sends no signals: at the end the dashboard rollups, the
+# Family/Church member counters, the payment ledger and the member search index are
+# rebuilt, the same as after a bulk import. Membership IDs and OR numbers come from
+# their real allocators, so the data never collides with rows created through the app
+# later. Use a scratch database.
+
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.chat.models import ChatMessage
+from apps.church.models import Church, District
+from apps.contribution_type.models import ContributionType
+from apps.family.counters import reconcile_counters
+from apps.family.models import Family, FamilyMember
+from apps.individual.membership_ids import assign_membership_ids
+from apps.individual.models import Individual
+from apps.individual.search import rebuild_search_index
+from apps.issues.models import IssueReport
+from apps.payment.ledger import rebuild_ledger
+from apps.payment.models import Payment, PaymentCoveredMember
+from apps.payment.or_numbers import allocate_block
+
+from .rollups import rebuild_rollups
+
+GIVEN_NAMES = ['Juan', 'Maria', 'Jose', 'Ana', 'Pedro', 'Rosa', 'Carlos', 'Elena', 'Miguel', 'Luz',
+               'Ramon', 'Teresa', 'Antonio', 'Carmen', 'Francisco', 'Josefina', 'Manuel', 'Gloria']
+SURNAMES = ['Dela Cruz', 'Santos', 'Reyes', 'Garcia', 'Mendoza', 'Bautista', 'Villanueva', 'Ramos',
+            'Aquino', 'Castillo', 'Fernandez', 'Gonzales', 'Navarro', 'Torres', 'Lopez', 'Flores']
+TOWNS = ['Cebu City', 'Mandaue', 'Lapu-Lapu', 'Talisay', 'Danao', 'Toledo', 'Carcar', 'Naga']
+CONTRIBUTION_TYPES = [('Monthly Dues', Decimal('50.00')), ('Death Assistance', Decimal('100.00')),
+                      ('Special Offering', Decimal('200.00'))]
+MEMBER_RELATIONSHIPS = ['SPOUSE', 'CHILD', 'CHILD', 'CHILD', 'PARENT', 'SIBLING', 'OTHER']
+
+SYNTHETIC_USER_PREFIX = 'synthetic-'
+
+
+def _members_per_family(rng):
+    # 1..7 members, about 4 on average
+    return min(7, max(1, round(rng.gauss(4, 1.5))))
+
+
+class DatasetGenerator:
+    """
+    Generates `members` individuals (and everything around them). The ratios are
+    per member: payments_per_member=0.5 means one payment for every two members.
+    """
+
+    def __init__(self, members, seed=0, months=12, payments_per_member=0.5,
+                 messages_per_member=0.1, issues_per_member=0.001, chunk_families=2000,
+                 log=None):
+        self.members = members
+        self.rng = random.Random(seed)
+        self.months = months
+        self.payments_per_member = payments_per_member
+        self.messages_per_member = messages_per_member
+        self.issues_per_member = issues_per_member
+        self.chunk_families = chunk_families
+        self.log = log or (lambda message: None)
+        self.counts = {}
+
+    def _count(self, name, number):
+        self.counts[name] = self.counts.get(name, 0) + number
+
+    def run(self):
+        self._setup()
+        created = 0
+        while created < self.members:
+            created += self._family_chunk(self.members - created)
+            self.log(f'  {created}/{self.members} members')
+        self._chat_and_issues()
+
+        self.log('Rebuilding dashboard rollups, member counters, the payment ledger and the member search index...')
+        rebuild_rollups()
+        reconcile_counters()
+        rebuild_ledger()
+        rebuild_search_index()
+        return self.counts
+
+    # --- Reference data ---
+
+    def _setup(self):
+        church_count = min(500, max(10, self.members // 1000))
+        district_count = max(3, church_count // 10)
+        next_number = (District.objects.aggregate(highest=Max('id'))['highest'] or 0) + 1
+        districts = District.objects.bulk_create([
+            District(name=f'Synthetic District {number}')
+            for number in range(next_number, next_number + district_count)
+        ])
+        self._count('districts', len(districts))
+
+        districts = list(District.objects.filter(name__startswith='Synthetic District '))
+        next_number = (Church.objects.aggregate(highest=Max('id'))['highest'] or 0) + 1
+        Church.objects.bulk_create([
+            Church(name=f'Synthetic Church {number}', address=self.rng.choice(TOWNS),
+                   district=districts[number % len(districts)])
+            for number in range(next_number, next_number + church_count)
+        ])
+        self._count('churches', church_count)
+        self.church_ids = list(Church.objects.filter(
+            name__startswith='Synthetic Church ').values_list('id', flat=True))
+
+        User = get_user_model()
+        for number in range(1, 6):
+            User.objects.get_or_create(username=f'{SYNTHETIC_USER_PREFIX}{number}', defaults={'is_staff': True})
+        self.user_ids = list(User.objects.filter(
+            username__startswith=SYNTHETIC_USER_PREFIX).values_list('id', flat=True))
+
+        self.contribution_types = []
+        for name, amount in CONTRIBUTION_TYPES:
+            billing = {'billing_period': ContributionType.BILLING_MONTHLY, 'amount_per_period': amount} \
+                if name == 'Monthly Dues' else {}
+            contribution_type, _ = ContributionType.objects.get_or_create(name=name, defaults=billing)
+            self.contribution_types.append((contribution_type.id, amount))
+
+        self.next_family_number = (Family.objects.aggregate(highest=Max('id'))['highest'] or 0) + 1
+        self.today = timezone.localdate()
+
+    # --- Families, members and payments, one chunk of families at a time ---
+
+    @transaction.atomic
+    def _family_chunk(self, remaining):
+        rng = self.rng
+        families, sizes = [], []
+        while len(families) < self.chunk_families and sum(sizes) < remaining:
+            size = min(_members_per_family(rng), remaining - sum(sizes))
+            surname = rng.choice(SURNAMES)
+            families.append(Family(
+                family_name=f'{surname} Family #{self.next_family_number}',
+                address=f'{rng.randint(1, 999)} Purok {rng.randint(1, 9)}, {rng.choice(TOWNS)}',
+                church_id=rng.choice(self.church_ids),
+                contact_number=f'09{rng.randint(100000000, 999999999)}',
+            ))
+            sizes.append(size)
+            self.next_family_number += 1
+        Family.objects.bulk_create(families)
+        if families[0].pk is None:
+            names = [family.family_name for family in families]
+            ids = dict(Family.objects.filter(family_name__in=names).values_list('family_name', 'id'))
+            for family in families:
+                family.pk = family.id = ids[family.family_name]
+
+        individuals = []
+        for family, size in zip(families, sizes):
+            surname = family.family_name.split(' Family #')[0]
+            for position in range(size):
+                individuals.append(Individual(
+                    given_name=rng.choice(GIVEN_NAMES),
+                    middle_name=rng.choice(SURNAMES),
+                    surname=surname,
+                    sex=rng.choice(['MALE', 'FEMALE']),
+                    birth_date=self.today - timedelta(days=rng.randint(365, 90 * 365)),
+                    contact_number=f'09{rng.randint(100000000, 999999999)}',
+                    address=family.address,
+                    relationship='HEAD' if position == 0 else rng.choice(MEMBER_RELATIONSHIPS),
+                    membership_status=rng.choices(['ACTIVE', 'INACTIVE', 'PENDING'], [90, 7, 3])[0],
+                    is_alive=rng.random() > 0.02,
+                    family_id=family.pk,
+                    church_id=family.church_id,
+                ))
+        assign_membership_ids(individuals)
+        Individual.objects.bulk_create(individuals)
+        if individuals[0].pk is None:
+            ids = dict(Individual.objects.filter(
+                membership_id__in=[individual.membership_id for individual in individuals]
+            ).values_list('membership_id', 'id'))
+            for individual in individuals:
+                individual.pk = individual.id = ids[individual.membership_id]
+
+        households = []
+        start = 0
+        for family, size in zip(families, sizes):
+            members = individuals[start:start + size]
+            family.head_of_family_id = members[0].pk
+            households.append((family, members))
+            start += size
+        Family.objects.bulk_update(families, ['head_of_family'])
+        FamilyMember.objects.bulk_create([
+            FamilyMember(family_id=family.pk, individual_id=member.pk, relationship=member.relationship,
+                         added_by_id=rng.choice(self.user_ids))
+            for family, members in households for member in members
+        ])
+
+        self._count('families', len(families))
+        self._count('individuals', len(individuals))
+        self._count('family_members', len(individuals))
+        self._payments(households, round(len(individuals) * self.payments_per_member))
+        return len(individuals)
+
+    def _payments(self, households, count):
+        if count <= 0:
+            return
+        rng = self.rng
+        or_numbers = allocate_block(count=count)
+        payments, splits = [], []
+        for or_number in or_numbers:
+            family, members = rng.choice(households)
+            contribution_type_id, amount_each = rng.choice(self.contribution_types)
+            covered = rng.sample(members, rng.randint(1, len(members)))
+            method = rng.choices(['CASH', 'GCASH'], [80, 20])[0]
+            payments.append(Payment(
+                individual_id=members[0].pk,
+                amount=amount_each * len(covered),
+                date_paid=self.today - timedelta(days=rng.randint(0, self.months * 30)),
+                contribution_type_id=contribution_type_id,
+                or_number=str(or_number),
+                payment_method=method,
+                gcash_reference_number=f'{rng.randint(10 ** 12, 10 ** 13 - 1)}' if method == 'GCASH' else None,
+                is_validated=method == 'GCASH' and rng.random() < 0.7,
+                status='CANCELLED' if rng.random() < 0.02 else 'PAID',
+                collected_by_id=rng.choice(self.user_ids),
+            ))
+            splits.append((covered, amount_each))
+        Payment.objects.bulk_create(payments)
+        if payments[0].pk is None:
+            ids = dict(Payment.objects.filter(
+                or_number__in=[payment.or_number for payment in payments]).values_list('or_number', 'id'))
+            for payment in payments:
+                payment.pk = payment.id = ids[payment.or_number]
+
+        covered_rows = [
+            PaymentCoveredMember(payment_id=payment.pk, individual_id=member.pk, amount_covered=amount_each,
+                                 created_by_id=payment.collected_by_id)
+            for payment, (covered, amount_each) in zip(payments, splits)
+            for member in covered
+        ]
+        PaymentCoveredMember.objects.bulk_create(covered_rows, batch_size=5000)
+        self._count('payments', len(payments))
+        self._count('payment_covered_members', len(covered_rows))
+
+    # --- Chat and issues ---
+
+    def _chat_and_issues(self):
+        rng = self.rng
+        message_count = round(self.members * self.messages_per_member)
+        batch_size = 10000
+        for start in range(0, message_count, batch_size):
+            ChatMessage.objects.bulk_create([
+                ChatMessage(church_id=rng.choice(self.church_ids), sender_id=rng.choice(self.user_ids),
+                            message=f'Synthetic message {number}: {rng.choice(GIVEN_NAMES)} {rng.choice(TOWNS)}')
+                for number in range(start, min(start + batch_size, message_count))
+            ])
+        self._count('chat_messages', message_count)
+
+        issue_count = max(1, round(self.members * self.issues_per_member))
+        IssueReport.objects.bulk_create([
+            IssueReport(reporter_id=rng.choice(self.user_ids), title=f'Synthetic issue {number}',
+                        description='Generated for load testing.',
+                        priority=rng.choice(['Low', 'Medium', 'High']),
+                        status=rng.choice(['Open', 'In Progress', 'Closed']))
+            for number in range(issue_count)
+        ])
+        self._count('issues', issue_count)
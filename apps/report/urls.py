@@ -1,12 +1,24 @@
 # apps/report/urls.py
 from django.urls import path
-from .views import DashboardView # Make sure DashboardView is imported correctly
+from .views import (DashboardView, DashboardCacheStatsView, DuesArrearsAPIView, DuesArrearsView, ExportView,
+                    ReportJobDownloadView, ReportJobListView, ReportJobStatusView) # Make sure DashboardView is imported correctly
 
 app_name = 'report'
 
 urlpatterns = [
     # Change this line
     path('dashboard/', DashboardView.as_view(), name='dashboard'), # Now it explicitly matches 'dashboard/'
+    # Hit/miss counters of the dashboard cache (superusers only)
+    path('dashboard/cache-stats/', DashboardCacheStatsView.as_view(), name='dashboard_cache_stats'),
+    # CSV/XLSX exports (apps/report/exports.py), e.g. export/payments/?format=xlsx&church=3
+    path('export/<str:kind>/', ExportView.as_view(), name='export'),
+    # Background report jobs (apps/report/jobs.py, run by `manage.py run_report_worker`)
+    path('jobs/', ReportJobListView.as_view(), name='jobs'),
+    path('jobs/<int:pk>/status/', ReportJobStatusView.as_view(), name='job_status'),
+    path('jobs/<int:pk>/download/', ReportJobDownloadView.as_view(), name='job_download'),
+    # Members behind on their dues (apps/report/dues.py), e.g. arrears/?contribution_type=1&church=3&months=3
+    path('arrears/', DuesArrearsView.as_view(), name='dues_arrears'),
+    path('arrears/api/', DuesArrearsAPIView.as_view(), name='dues_arrears_api'),
     # If you also want 'report/' to work, you could add:
     # path('', DashboardView.as_view(), name='report_home'), # Example for an alternative
 ]
\ No newline at end of file
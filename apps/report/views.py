@@ -1,13 +1,32 @@
 # apps/report/views.py
 
 import json
+import os
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.views import View
 from django.views.generic import TemplateView
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.contrib import messages
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
 from apps.payment.models import Payment
 from apps.individual.models import Individual
 from apps.church.models import Church
 from apps.family.models import Family
 from apps.account.models import Profile, UserChurch
+from .models import ContributionRollup, ContributorRollup, FamilyRollup, MembershipRollup, ReportLog
+from .rollups import COUNTED_PAYMENT_STATUSES, UNKNOWN_STATUS
+from .dashboard_cache import get_cache_stats, get_dashboard_context
+from apps.common.instrumentation import note
+from apps.common.replica import ReplicaReadMixin
+from apps.account.principal import principal_for
+from apps.family.summary import family_summaries
+from .exports import EXPORTS, FORMATS, csv_chunks, filename, log_export, xlsx_file
+from .jobs import EXPORTS_BY_REPORT_TYPE, JOB_FORMATS, ReportJobError, enqueue
+from .dues import arrears, arrears_rows, billed_types
 
 # Import Value and CharField here
 from django.db.models import Sum, Count, F, Q, Value
@@ -21,18 +40,15 @@ from datetime import date, timedelta, datetime
 from dateutil.relativedelta import relativedelta
 
 
-class DashboardView(LoginRequiredMixin, TemplateView):
+class DashboardView(LoginRequiredMixin, ReplicaReadMixin, TemplateView):
     template_name = 'report/dashboard.html'
+    # Checked by apps/common/instrumentation.py. A cold dashboard cache costs ~20
+    # queries; a warm one about 5.
+    query_budget = 25
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # --- DEBUG PRINTS START ---
-        print(f"\n--- DEBUG: DashboardView Context Data Start ---")
-        print(
-            f"Logged in user: {self.request.user.username}, is_superuser: {self.request.user.is_superuser}")
-        # --- DEBUG PRINTS END ---
-
         # --- Dashboard Title ---
         context['title'] = "KADAMAY Dashboard"
 
@@ -43,11 +59,6 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         selected_church = None
         user_church_filter = None  # Filter based on user's assigned church
 
-        # --- DEBUG PRINTS START ---
-        print(
-            f"URL 'church' parameter (selected_church_id): {selected_church_id}")
-        # --- DEBUG PRINTS END ---
-
         # Determine user's assigned church if any
         if self.request.user.is_authenticated:
             try:
@@ -55,153 +66,117 @@ class DashboardView(LoginRequiredMixin, TemplateView):
                     user=self.request.user).first()
                 if user_church_assignment:
                     user_church_filter = user_church_assignment.church
-                    # --- DEBUG PRINTS START ---
-                    print(
-                        f"User '{self.request.user.username}' is assigned to church: {user_church_filter.name} (ID: {user_church_filter.id})")
-                    # --- DEBUG PRINTS END ---
-                else:
-                    # --- DEBUG PRINTS START ---
-                    print(
-                        f"User '{self.request.user.username}' has NO assigned church.")
-                    # --- DEBUG PRINTS END ---
             except UserChurch.DoesNotExist:
                 user_church_filter = None
-                # --- DEBUG PRINTS START ---
-                print("UserChurch DoesNotExist (shouldn't happen with .first())")
-                # --- DEBUG PRINTS END ---
 
         # Apply filter based on URL parameter or user's assigned church
         if selected_church_id:
             try:
                 temp_selected_church = Church.objects.get(
                     id=selected_church_id)
-                # --- DEBUG PRINTS START ---
-                print(
-                    f"Attempting to get church from URL ID: {selected_church_id} -> Found: {temp_selected_church.name}")
-                # --- DEBUG PRINTS END ---
             except Church.DoesNotExist:
                 temp_selected_church = None  # Fallback if ID is invalid
-                # --- DEBUG PRINTS START ---
-                print(
-                    f"Church with ID {selected_church_id} from URL does not exist. Temp selected church is None.")
-                # --- DEBUG PRINTS END ---
 
             # If user is restricted to a church, ensure selected_church matches it
             if user_church_filter and temp_selected_church and temp_selected_church != user_church_filter:
                 # Override if user tries to select other church
                 selected_church = user_church_filter
-                # --- DEBUG PRINTS START ---
-                print(
-                    f"URL church ID {selected_church_id} overridden by user's assigned church: {user_church_filter.name}")
-                # --- DEBUG PRINTS END ---
             else:
                 selected_church = temp_selected_church
-                # --- DEBUG PRINTS START ---
-                if selected_church:
-                    print(
-                        f"Selected church from URL (or matched user church): {selected_church.name}")
-                # --- DEBUG PRINTS END ---
         elif user_church_filter:
             # Default to user's church if not specified
             selected_church = user_church_filter
-            # --- DEBUG PRINTS START ---
-            print(
-                f"Defaulting to user's assigned church: {selected_church.name} (ID: {selected_church.id})")
-            # --- DEBUG PRINTS END ---
         else:
             # No URL parameter, and user has no assigned church, show ALL (or handle as per your requirement)
             selected_church = None
-            # --- DEBUG PRINTS START ---
-            print(
-                "No specific church selected in URL, and user has no assigned church. Showing ALL data.")
-            # --- DEBUG PRINTS END ---
 
         context['selected_church'] = selected_church.id if selected_church else None
-        # --- DEBUG PRINTS START ---
-        print(
-            f"Final active filter church (object): {selected_church} (ID: {context['selected_church']})")
-        # --- DEBUG PRINTS END ---
-
-        # --- Base Querysets based on selected_church or user's assigned church ---
-        # Filter for non-cancelled payments by default for all metrics
-        # Payments must be 'paid' or 'pending'
-        payments_queryset = Payment.objects.filter(
-            status__in=['paid', 'pending'])
 
-        individuals_queryset = Individual.objects.all()
-        families_queryset = Family.objects.all()
+        # --- Role Scope (part of the dashboard cache key) ---
+        # Only the "Total Churches" card depends on who is looking at the dashboard,
+        # so every user with the same church and role scope shares one cached copy.
+        if selected_church:
+            role_scope = 'church'
+        elif user_church_filter:
+            role_scope = 'assigned'
+        elif self.request.user.is_superuser:
+            role_scope = 'superuser'
+        else:
+            role_scope = 'user'
 
-        # --- DEBUG PRINTS START ---
-        print(
-            f"Initial Individuals Queryset count: {individuals_queryset.count()}")
-        print(f"Initial Families Queryset count: {families_queryset.count()}")
-        # --- DEBUG PRINTS END ---
+        context.update(get_dashboard_context(
+            selected_church.id if selected_church else None,
+            role_scope,
+            lambda: self.get_dashboard_metrics(selected_church, user_church_filter),
+        ))
 
+        # --- Recent Payments ---
+        # Not cached: lazy queryset that only hits the database if the template loops over it
+        payments_queryset = Payment.objects.filter(
+            status__in=COUNTED_PAYMENT_STATUSES)
         if selected_church:
-            # --- DEBUG PRINTS START ---
-            print(f"Applying filter for church: {selected_church.name}")
-            # --- DEBUG PRINTS END ---
             payments_queryset = payments_queryset.filter(
                 individual__church=selected_church)
-            individuals_queryset = individuals_queryset.filter(
-                church=selected_church)
-            families_queryset = families_queryset.filter(
-                church=selected_church)
-        else:
-            # --- DEBUG PRINTS START ---
-            print("No church filter applied to base querysets (showing all data).")
-            # --- DEBUG PRINTS END ---
-
-        # Optimize with select_related and prefetch_related for efficient fetching
-        payments_queryset = payments_queryset.select_related(
+        context['recent_payments'] = payments_queryset.select_related(
             'individual__church',
             'contribution_type',
             'collected_by'
-        ).prefetch_related(
-            'covered_members'
-        )
-        individuals_queryset = individuals_queryset.select_related(
-            'family', 'church')
-        families_queryset = families_queryset.select_related('church')
-
-        # --- DEBUG PRINTS START ---
-        print(
-            f"Individuals Queryset count (after church filter): {individuals_queryset.count()}")
-        print(
-            f"Families Queryset count (after church filter): {families_queryset.count()}")
-        print(
-            f"Payments Queryset count (after church filter and status): {payments_queryset.count()}")
-        # --- DEBUG PRINTS END ---
+        ).order_by('-date_paid')[:10]
+
+        # Debug details for the instrumentation log line (apps/common/instrumentation.py)
+        note(self.request,
+             church_param=selected_church_id,
+             user_church=user_church_filter.id if user_church_filter else None,
+             selected_church=context['selected_church'],
+             role_scope=role_scope)
+        return context
+
+    def get_dashboard_metrics(self, selected_church, user_church_filter):
+        """
+        Computes all the dashboard numbers for one church (or all churches) from the
+        rollup tables. The result is cached by apps/report/dashboard_cache.py, so it
+        must only contain picklable values (no lazy querysets).
+        """
+        context = {}
+
+        # --- Rollup Querysets based on selected_church or user's assigned church ---
+        # All the aggregate numbers below are read from the dashboard rollup tables
+        # (see apps/report/rollups.py) instead of scanning the full Payment/Individual/Family
+        # tables on every page load. Run `python manage.py rebuild_rollups` if they drift.
+        contribution_rollups = ContributionRollup.objects.all()
+        contributor_rollups = ContributorRollup.objects.filter(payment_count__gt=0)
+        membership_rollups = MembershipRollup.objects.all()
+        family_rollups = FamilyRollup.objects.all()
 
-        # --- Dashboard Metrics ---
+        if selected_church:
+            contribution_rollups = contribution_rollups.filter(
+                church=selected_church)
+            contributor_rollups = contributor_rollups.filter(
+                church=selected_church)
+            membership_rollups = membership_rollups.filter(
+                church=selected_church)
+            family_rollups = family_rollups.filter(church=selected_church)
 
-        context['total_contributions'] = payments_queryset.aggregate(
-            total=Coalesce(Sum('amount'), Decimal(0))
-        )['total']
-        # --- DEBUG PRINTS START ---
-        print(
-            f"Context['total_contributions']: {context['total_contributions']}")
-        # --- DEBUG PRINTS END ---
+        # --- Dashboard Metrics ---
 
+        contribution_totals = contribution_rollups.aggregate(
+            total=Coalesce(Sum('total_amount'), Decimal(0)),
+            count=Coalesce(Sum('payment_count'), 0),
+        )
+        context['total_contributions'] = contribution_totals['total']
         # Count of non-cancelled payments
-        context['total_payments'] = payments_queryset.count()
-        # --- DEBUG PRINTS START ---
-        print(f"Context['total_payments']: {context['total_payments']}")
-        # --- DEBUG PRINTS END ---
+        context['total_payments'] = contribution_totals['count']
+
+        membership_counts = list(membership_rollups.values('membership_status').annotate(
+            count=Coalesce(Sum('member_count'), 0)
+        ).order_by('membership_status'))
 
-        context['total_individuals'] = individuals_queryset.count()
+        context['total_individuals'] = sum(
+            item['count'] for item in membership_counts)
         # Alias for clarity in template
         context['total_members'] = context['total_individuals']
-        # --- DEBUG PRINTS START ---
-        print(
-            f"Context['total_individuals'] (sent to template): {context['total_individuals']}")
-        # --- DEBUG PRINTS END ---
 
-        context['total_families'] = families_queryset.count()
-        # --- DEBUG PRINTS START ---
-        print(
-            f"Context['total_families'] (sent to template): {context['total_families']}")
-        # --- DEBUG PRINTS END ---
+        context['total_families'] = family_rollups.count()
 
         # Total Registered Churches (show only the user's church or all if admin/no church assigned)
         if selected_church:
@@ -214,68 +189,34 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         # Default for users without assigned church and no filter (not superuser), should ideally show all or 0 if no permissions
         else:
             context['total_churches'] = Church.objects.count()
-        # --- DEBUG PRINTS START ---
-        print(
-            f"Context['total_churches'] (sent to template): {context['total_churches']}")
-        # --- DEBUG PRINTS END ---
 
         # Active members are individuals who have made at least one non-cancelled payment
-        context['active_members_count'] = payments_queryset.values(
-            'individual').distinct().count()
-        # --- DEBUG PRINTS START ---
-        print(
-            f"Context['active_members_count']: {context['active_members_count']}")
-        # --- DEBUG PRINTS END ---
-
-        # --- Recent Payments ---
-        context['recent_payments'] = payments_queryset.order_by(
-            '-date_paid')[:10]
-        # --- DEBUG PRINTS START ---
-        print(
-            f"Context['recent_payments'] count: {context['recent_payments'].count()}")
-        # --- DEBUG PRINTS END ---
+        context['active_members_count'] = contributor_rollups.count()
 
         # --- Top Churches by Contributions ---
         if not selected_church:  # Only show this table if viewing ALL churches
-            context['top_churches_by_contributions'] = payments_queryset.values('individual__church__name').annotate(
-                total_amount=Coalesce(Sum('amount'), Decimal(0))
-            ).order_by('-total_amount')[:5]
+            context['top_churches_by_contributions'] = list(contribution_rollups.values('church__name').annotate(
+                total_amount=Coalesce(Sum('total_amount'), Decimal(0))
+            ).order_by('-total_amount')[:5])
         else:
             # Don't show if filtered to one church
             context['top_churches_by_contributions'] = []
-        # --- DEBUG PRINTS START ---
-        print(
-            f"Context['top_churches_by_contributions'] count: {len(context['top_churches_by_contributions'])}")
-        # --- DEBUG PRINTS END ---
 
         # --- Top Contribution Types ---
-        context['top_contribution_types'] = payments_queryset.values('contribution_type__name').annotate(
-            total_amount=Coalesce(Sum('amount'), Decimal(0))
-        ).order_by('-total_amount')[:5]
-        # --- DEBUG PRINTS START ---
-        print(
-            f"Context['top_contribution_types'] count: {len(context['top_contribution_types'])}")
-        # --- DEBUG PRINTS END ---
+        context['top_contribution_types'] = list(contribution_rollups.values('contribution_type__name').annotate(
+            total_amount=Coalesce(Sum('total_amount'), Decimal(0))
+        ).order_by('-total_amount')[:5])
 
         # --- Membership Status Distribution (For your JSON.parse) ---
         # Define all possible statuses to ensure consistent labels in chart, even if count is 0
         # Updated to reflect only choices in Individual model for `membership_status`
         all_possible_statuses = ['Active', 'Inactive', 'Pending']
 
-        # Aggregate counts, ensuring 'None' or empty statuses are grouped as 'Unknown/Not Set'
-        membership_status_raw_data = individuals_queryset.annotate(
-            # Coalesce handles None values, replacing them with 'UNKNOWN'
-            actual_status=Coalesce(F('membership_status'), Value(
-                'UNKNOWN', output_field=CharField()))
-        ).values('actual_status').annotate(
-            count=Count('id')
-        ).order_by('actual_status')
-
         membership_status_chart_data = {
             # Added 'UNKNOWN' here too
-            status: 0 for status in all_possible_statuses + ['UNKNOWN']}
-        for item in membership_status_raw_data:
-            status_name = item['actual_status']
+            status: 0 for status in all_possible_statuses + [UNKNOWN_STATUS]}
+        for item in membership_counts:
+            status_name = item['membership_status']
             # Convert status name from DB (e.g., 'ACTIVE') to display (e.g., 'Active')
             if status_name == 'ACTIVE':
                 status_name = 'Active'
@@ -283,37 +224,26 @@ class DashboardView(LoginRequiredMixin, TemplateView):
                 status_name = 'Inactive'
             elif status_name == 'PENDING':
                 status_name = 'Pending'
-            # else: status_name remains 'UNKNOWN'
+            else:
+                status_name = UNKNOWN_STATUS
 
-            membership_status_chart_data[status_name] = item['count']
+            membership_status_chart_data[status_name] += item['count']
 
-        try:
-            context['membership_status_distribution_json'] = json.dumps(
-                membership_status_chart_data)
-            # --- DEBUG PRINTS START ---
-            print(
-                f"Membership Status JSON (first 100 chars): {context['membership_status_distribution_json'][:100]}...")
-            # --- DEBUG PRINTS END ---
-        except Exception as e:
-            # --- DEBUG PRINTS START ---
-            print(
-                f"ERROR: Could not serialize membership status data to JSON: {e}")
-            # --- DEBUG PRINTS END ---
-            context['membership_status_distribution_json'] = json.dumps({})
-
-        # --- Monthly Contributions Trend (Last 6 months using TruncMonth) ---
+        context['membership_status_distribution_json'] = json.dumps(
+            membership_status_chart_data)
+
+        # --- Monthly Contributions Trend (Last 6 months) ---
         today = date.today()
         # Calculate the start date for the last 6 months (e.g., if today is Jun 24, 2025, it starts from Jan 1, 2025)
         # Using relativedelta for more accurate month calculations
         # This gets the 1st day of 6 months ago
         start_date_for_chart = today.replace(day=1) - relativedelta(months=5)
 
-        monthly_contributions_raw = payments_queryset.filter(
-            date_paid__gte=start_date_for_chart
-        ).annotate(
-            month=TruncMonth('date_paid')
+        # ContributionRollup.month is already the first day of the month (same as TruncMonth)
+        monthly_contributions_raw = contribution_rollups.filter(
+            month__gte=start_date_for_chart
         ).values('month').annotate(
-            total_amount=Coalesce(Sum('amount'), Decimal(0))
+            total_amount=Coalesce(Sum('total_amount'), Decimal(0))
         ).order_by('month')
 
         # Create a dictionary for quick lookup of aggregated amounts
@@ -345,95 +275,322 @@ class DashboardView(LoginRequiredMixin, TemplateView):
             contributions_over_time_labels)
         context['contributions_over_time_data_json'] = json.dumps(
             contributions_over_time_data)
-        # --- DEBUG PRINTS START ---
-        print(
-            f"Contributions Over Time Labels JSON (first 100 chars): {context['contributions_over_time_labels_json'][:100]}...")
-        print(
-            f"Contributions Over Time Data JSON (first 100 chars): {context['contributions_over_time_data_json'][:100]}...")
-        # --- DEBUG PRINTS END ---
 
         # --- Top 5 Families with Most Members ---
-        context['top_families_by_members'] = families_queryset.annotate(
-            # Assuming 'members' is related_name from Family to Individual
-            member_count=Coalesce(Count('members', distinct=True), 0)
-        ).order_by('-member_count')[:5].select_related('church')
-        # --- DEBUG PRINTS START ---
-        print(
-            f"Top Families by Members Queryset count (after annotation): {context['top_families_by_members'].count()}")
-        for family_entry in context['top_families_by_members']:
-            print(
-                f"  Family: {family_entry.family_name}, Members: {family_entry.member_count}")
-        # --- DEBUG PRINTS END ---
+        top_families = []
+        for family_rollup in family_rollups.select_related(
+                'family__church').order_by('-member_count')[:5]:
+            family = family_rollup.family
+            family.member_count = family_rollup.member_count
+            top_families.append(family)
+        # Their payment totals (apps/family/summary.py), for all five at once
+        summaries = family_summaries([family.id for family in top_families])
+        for family in top_families:
+            family.summary = summaries[family.id]
+        context['top_families_by_members'] = top_families
 
         # --- Top 5 Individual Contributors ---
-        # Note: payments_queryset already filters for non-cancelled payments
-        context['top_individual_contributors'] = payments_queryset.values(
-            'individual__id',
-            'individual__given_name',
-            'individual__surname',
-            'individual__middle_name',
-            'individual__suffix_name',
-            # 'individual__profile_picture', # Uncomment if Individual model has this field
-            'individual__family__family_name',
-            'individual__church__name',
-        ).annotate(
-            total_contribution=Coalesce(Sum('amount'), Decimal(0))
-        ).order_by('-total_contribution')[:5]
-
-        # Add full_name attribute for easier display in template
-        for contributor in context['top_individual_contributors']:
-            full_name_parts = [
-                contributor.get('individual__given_name', ''),
-                contributor.get('individual__middle_name', ''),
-                contributor.get('individual__surname', ''),
-                contributor.get('individual__suffix_name', '')
-            ]
-            contributor['full_name'] = ' '.join(filter(None, full_name_parts))
-            # contributor['profile_picture'] = contributor.get('individual__profile_picture') # Uncomment if Individual has profile_picture
-            contributor['family'] = {'family_name': contributor.get(
-                'individual__family__family_name')}
-            contributor['church'] = {
-                'name': contributor.get('individual__church__name')}
-        # --- DEBUG PRINTS START ---
-        print(
-            f"Top Individual Contributors count: {len(context['top_individual_contributors'])}")
-        # --- DEBUG PRINTS END ---
+        # Note: contributor rollups only include non-cancelled payments
+        top_contributors = []
+        for contributor_rollup in contributor_rollups.select_related(
+                'individual__family', 'church').order_by('-total_amount')[:5]:
+            individual = contributor_rollup.individual
+            top_contributors.append({
+                'individual__id': individual.id,
+                'individual__given_name': individual.given_name,
+                'individual__surname': individual.surname,
+                'individual__middle_name': individual.middle_name,
+                'individual__suffix_name': individual.suffix_name,
+                'individual__family__family_name': individual.family.family_name if individual.family else None,
+                'individual__church__name': contributor_rollup.church.name if contributor_rollup.church else None,
+                'total_contribution': contributor_rollup.total_amount,
+                # Add full_name attribute for easier display in template
+                'full_name': individual.full_name,
+                'family': {'family_name': individual.family.family_name if individual.family else None},
+                'church': {'name': contributor_rollup.church.name if contributor_rollup.church else None},
+            })
+        context['top_individual_contributors'] = top_contributors
 
         # --- Church-wise Summary Table ---
         if not selected_church:
-            context['church_summaries'] = Church.objects.annotate(
-                total_families=Coalesce(Count('families', distinct=True), 0),
-                total_members=Coalesce(Count('individuals', distinct=True), 0),
-                # Filter for 'paid' or 'pending' payments for consistency
-                total_contributions=Coalesce(
-                    Sum('individuals__payments_as_payer__amount', # <--- CORRECTED LINE
-                        filter=Q(individuals__payments_as_payer__status__in=['paid', 'pending'])), Decimal(0)) # <--- CORRECTED LINE
-            ).order_by('name')
-            # --- DEBUG PRINTS START ---
-            print(
-                f"Church Summaries (all churches) count: {context['church_summaries'].count()}")
-            for church_sum in context['church_summaries']:
-                print(
-                    f"  Church: {church_sum.name}, Families: {church_sum.total_families}, Members: {church_sum.total_members}")
-            # --- DEBUG PRINTS END ---
+            families_per_church = dict(
+                family_rollups.values('church').annotate(
+                    count=Count('id')).values_list('church', 'count').order_by())
+            members_per_church = dict(
+                membership_rollups.values('church').annotate(
+                    count=Sum('member_count')).values_list('church', 'count').order_by())
+            contributions_per_church = dict(
+                contribution_rollups.values('church').annotate(
+                    total=Sum('total_amount')).values_list('church', 'total').order_by())
+
+            church_summaries = []
+            for church in Church.objects.order_by('name'):
+                church.total_families = families_per_church.get(church.id, 0)
+                church.total_members = members_per_church.get(church.id, 0)
+                church.total_contributions = contributions_per_church.get(
+                    church.id, Decimal(0))
+                church_summaries.append(church)
+            context['church_summaries'] = church_summaries
         else:
             # If a specific church is selected, create a summary just for that church
-            # We already have filtered querysets, just aggregate their counts/sums
+            # We already have the church's totals from the rollups above
             church_summary_data = {
                 'name': selected_church.name,
                 # 'logo': selected_church.logo.url if selected_church.logo else None, # Uncomment if Church model has a logo field
-                'total_families': families_queryset.count(),
-                'total_members': individuals_queryset.count(),
-                'total_contributions': payments_queryset.aggregate(total=Coalesce(Sum('amount'), Decimal(0)))['total'],
+                'total_families': context['total_families'],
+                'total_members': context['total_members'],
+                'total_contributions': context['total_contributions'],
             }
             # Pass as a list for template loop
             context['church_summaries'] = [church_summary_data]
-            # --- DEBUG PRINTS START ---
-            print(
-                f"Church Summaries (selected church) count: {len(context['church_summaries'])}")
-            print(f"  Selected Church Summary: {church_summary_data}")
-            # --- DEBUG PRINTS END ---
-
-        # --- DEBUG PRINTS END ---
-        print(f"--- DEBUG: DashboardView Context Data End ---")
-        return context
\ No newline at end of file
+
+        return context
+
+
+class DashboardCacheStatsView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    JSON endpoint showing the dashboard cache hit/miss counters (superusers only).
+    """
+
+    def test_func(self):
+        return self.request.user.is_superuser
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(get_cache_stats())
+
+
+REPORT_ROLES = ('Admin', 'Cashier', 'In-Charge')
+
+
+def _report_church(principal, church_id):
+    """
+    The church a report/export is limited to (None = all churches). Admins and
+    cashiers may pick any church; everyone else only one of their assigned churches.
+    """
+    church = get_object_or_404(Church, pk=church_id) if church_id else None
+    if principal.in_group('Admin', 'Cashier'):
+        return church
+    if church is None and len(principal.church_ids) == 1:
+        church = Church.objects.get(pk=next(iter(principal.church_ids)))
+    if church is None or church.id not in principal.church_ids:
+        raise PermissionDenied('You may only export your assigned church.')
+    return church
+
+
+def _report_churches(principal):
+    """The churches a user may pick in a report form."""
+    churches = Church.objects.order_by('name')
+    if not principal.in_group('Admin', 'Cashier'):
+        churches = churches.filter(id__in=principal.church_ids)
+    return churches
+
+
+class ExportView(LoginRequiredMixin, UserPassesTestMixin, ReplicaReadMixin, View):
+    """
+    Streams an export (apps/report/exports.py) as CSV or XLSX:
+        /report/export/<payments|members|families|contributions>/?format=csv&church=<id>
+    Admins and cashiers may export any church; In-Charge users only the church(es)
+    they are assigned to.
+    """
+
+    def test_func(self):
+        return principal_for(self.request).in_group(*REPORT_ROLES)
+
+    def get(self, request, kind):
+        export = EXPORTS.get(kind)
+        file_format = request.GET.get('format', 'csv')
+        if export is None or file_format not in FORMATS:
+            raise Http404('Unknown export.')
+        church = _report_church(principal_for(request), request.GET.get('church'))
+
+        log_export(export, request.user, church, file_format)
+        church_id = church.id if church else None
+        name = filename(export, file_format, church)
+        if file_format == 'xlsx':
+            return FileResponse(
+                xlsx_file(export, church_id), as_attachment=True, filename=name,
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        response = StreamingHttpResponse(csv_chunks(export, church_id), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{name}"'
+        return response
+
+
+def _job_json(job):
+    return {
+        'id': job.id,
+        'report_type': job.report_type,
+        'report_name': job.get_report_type_display(),
+        'church': job.church.name if job.church_id else None,
+        'format': job.parameters.get('format', 'csv'),
+        'status': job.status,
+        'progress': job.progress,
+        'rows_total': job.rows_total,
+        'error': job.error,
+        'queued_at': job.timestamp.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'download_url': reverse('report:job_download', args=[job.id]) if job.output_file else None,
+    }
+
+
+class ReportJobAccessMixin(LoginRequiredMixin, UserPassesTestMixin):
+    """
+    Report logs (queued jobs and direct exports) are visible to the user who made
+    them, and to admins.
+    """
+
+    def test_func(self):
+        return principal_for(self.request).in_group(*REPORT_ROLES)
+
+    def get_jobs(self):
+        jobs = ReportLog.objects.select_related('church')
+        if not principal_for(self.request).is_admin:
+            jobs = jobs.filter(generated_by=self.request.user)
+        return jobs
+
+
+class ReportJobListView(ReportJobAccessMixin, TemplateView):
+    """
+    Queue a report to be generated in the background (apps/report/jobs.py) and
+    follow the user's recent reports. POST queues a job.
+    """
+    template_name = 'report/report_jobs.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update({
+            'title': 'Reports',
+            'jobs': self.get_jobs().order_by('-id')[:50],
+            'report_types': [(value, label) for value, label in ReportLog.REPORT_TYPE_CHOICES
+                             if value in EXPORTS_BY_REPORT_TYPE],
+            'formats': JOB_FORMATS,
+            'churches': _report_churches(principal_for(self.request)),
+        })
+        return context
+
+    def post(self, request, *args, **kwargs):
+        church = _report_church(principal_for(request), request.POST.get('church'))
+        try:
+            job = enqueue(request.user, request.POST.get('report_type'), church,
+                          request.POST.get('format', 'csv'))
+        except ReportJobError as error:
+            messages.error(request, str(error))
+        else:
+            if job.status == ReportLog.STATUS_DONE:
+                messages.success(request, f'{job.get_report_type_display()} is unchanged since it was last printed; ready to download.')
+            else:
+                messages.success(request, f'{job.get_report_type_display()} queued. It will be ready to download here.')
+        return redirect('report:jobs')
+
+
+class ReportJobStatusView(ReportJobAccessMixin, View):
+    """JSON status of one job, for polling."""
+
+    def get(self, request, pk):
+        return JsonResponse(_job_json(get_object_or_404(self.get_jobs(), pk=pk)))
+
+
+class ReportJobDownloadView(ReportJobAccessMixin, View):
+
+    def get(self, request, pk):
+        job = get_object_or_404(self.get_jobs(), pk=pk, status=ReportLog.STATUS_DONE)
+        if not job.output_file:
+            raise Http404('This report has no file.')
+        try:
+            output = job.output_file.open('rb')
+        except FileNotFoundError:
+            raise Http404('The report file is no longer available.')
+        return FileResponse(output, as_attachment=True, filename=os.path.basename(job.output_file.name))
+
+
+# --- Dues arrears (apps/report/dues.py) ---
+
+def _arrears_parameters(request):
+    """(contribution type, church, minimum months behind) of an arrears report or API request."""
+    types = billed_types()
+    type_id = request.GET.get('contribution_type')
+    contribution_type = get_object_or_404(types, pk=type_id) if type_id else types.first()
+    church = _report_church(principal_for(request), request.GET.get('church'))
+    try:
+        min_months = max(1, int(request.GET.get('months', 1)))
+    except ValueError:
+        min_months = 1
+    return contribution_type, church, min_months
+
+
+class DuesArrearsAccessMixin(LoginRequiredMixin, UserPassesTestMixin):
+
+    def test_func(self):
+        return principal_for(self.request).in_group(*REPORT_ROLES)
+
+
+class DuesArrearsView(DuesArrearsAccessMixin, ReplicaReadMixin, TemplateView):
+    """
+    Members behind on a billed contribution type:
+        /report/arrears/?contribution_type=<id>&church=<id>&months=<N>&page=<n>
+    """
+    template_name = 'report/dues_arrears.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        contribution_type, church, min_months = _arrears_parameters(self.request)
+        context.update({
+            'title': 'Dues Arrears',
+            'contribution_types': billed_types(),
+            'churches': _report_churches(principal_for(self.request)),
+            'selected_type': contribution_type,
+            'selected_church': church,
+            'min_months': min_months,
+        })
+        if contribution_type is not None:
+            result = arrears(contribution_type, church.id if church else None, min_months)
+            page = Paginator(result['member_ids'], getattr(settings, 'ARREARS_PAGE_SIZE', 50)).get_page(
+                self.request.GET.get('page'))
+            context.update({
+                'result': result,
+                'page_obj': page,
+                'rows': arrears_rows(result, page.start_index() - 1, page.end_index()) if result['member_ids'].size else [],
+            })
+        return context
+
+
+class DuesArrearsAPIView(DuesArrearsAccessMixin, ReplicaReadMixin, View):
+    """
+    JSON version of DuesArrearsView; `offset` and `limit` (at most ARREARS_API_MAX_LIMIT)
+    select the slice of members returned, most behind first.
+    """
+
+    def get(self, request, *args, **kwargs):
+        contribution_type, church, min_months = _arrears_parameters(request)
+        if contribution_type is None:
+            return JsonResponse({'error': 'No contribution type has a billing period.'}, status=404)
+        try:
+            offset = max(0, int(request.GET.get('offset', 0)))
+            limit = int(request.GET.get('limit', 100))
+        except ValueError:
+            return JsonResponse({'error': 'offset and limit must be numbers.'}, status=400)
+        limit = min(max(limit, 0), getattr(settings, 'ARREARS_API_MAX_LIMIT', 1000))
+
+        result = arrears(contribution_type, church.id if church else None, min_months)
+        return JsonResponse({
+            'contribution_type': {'id': contribution_type.id, 'name': contribution_type.name,
+                                  'billing_period': contribution_type.billing_period,
+                                  'amount_per_period': str(contribution_type.amount_per_period)},
+            'church': church.id if church else None,
+            'as_of': result['as_of'].isoformat(),
+            'min_months': min_months,
+            'members_billed': result['members_billed'],
+            'members_behind': int(result['member_ids'].size),
+            'total_due': str(result['total_due']),
+            'offset': offset,
+            'members': [
+                {
+                    'id': row['individual'].id,
+                    'membership_id': row['individual'].membership_id,
+                    'name': row['individual'].full_name,
+                    'family': row['individual'].family.family_name if row['individual'].family_id else None,
+                    'months_behind': row['months_behind'],
+                    'amount_due': str(row['amount_due']),
+                }
+                for row in arrears_rows(result, offset, offset + limit)
+            ],
+        })
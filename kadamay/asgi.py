@@ -3,4 +3,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kadamay.settings')
 
+# ASGI entry point, next to kadamay/wsgi.py. Serves the whole project, and is the one to
+# use for the chat stream/long-poll endpoints: an open connection is a coroutine here,
+# instead of a blocked worker thread under WSGI. For example:
+#   gunicorn kadamay.asgi:application -k uvicorn.workers.UvicornWorker
 application = get_asgi_application()
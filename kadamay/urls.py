@@ -7,9 +7,13 @@ from django.conf.urls.static import static
 # Import RedirectView para sa redirection.
 from django.views.generic import RedirectView
 
+from apps.common.instrumentation import metrics_view
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # Per-view query/latency metrics (apps/common/instrumentation.py)
+    path('metrics/', metrics_view, name='metrics'),
     # Include URLs from your 'account' app
     path('account/', include('apps.account.urls')),
     # Include URLs from your 'theme' app (if it has any)